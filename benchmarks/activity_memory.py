@@ -0,0 +1,118 @@
+"""Memory and time of holding a large commit history: PyGithub objects and dicts vs raw JSON into an ActivityTable.
+
+Builds `--commits` synthetic commits as the REST API lists them (pages of 100, parsed from
+JSON), then turns them into activities three ways:
+
+- pygithub: a `Commit` object per commit, then one nested activity dict each (the old path);
+- dicts: the raw JSON straight into activity dicts;
+- table: the raw JSON into an `ActivityTable`.
+
+For each it reports the build time (under tracemalloc, so slower than usual), the peak
+memory while building, and what the finished activities keep alive. The table is also serialized back to dicts, which is what happens
+once at prompt time, and checked against the dicts the other paths built.
+
+    python benchmarks/activity_memory.py --commits 100000
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from datetime import datetime
+
+from standins import SyntheticGitHub
+from github import Github
+from github.Commit import Commit
+from services.activity_table import ActivityTable, parse_timestamp
+
+REPO = "octocat/big-repo"
+PAGE_SIZE = 100
+
+
+def raw_pages(count: int) -> list:
+    """The commits as the JSON bodies of the listing pages, newest first."""
+    data = SyntheticGitHub(commits=count)
+    return [
+        json.dumps([data.commit("https://api.github.com", REPO, index) for index in range(start, min(start + PAGE_SIZE, count))])
+        for start in range(0, count, PAGE_SIZE)
+    ]
+
+
+def with_pygithub(pages: list) -> list:
+    requester = Github(per_page=PAGE_SIZE).requester
+    commits = [Commit(requester, {}, raw) for page in pages for raw in json.loads(page)]
+    return [
+        {
+            "event_author": commit.author.login,
+            "event_created_at": commit.commit.author.date.isoformat(),
+            "event_repo": REPO,
+            "event_payload": {"commit_messages": [commit.commit.message], "changed_files_count": 2, "changed_lines_count": 12},
+        }
+        for commit in commits
+    ]
+
+
+def with_dicts(pages: list) -> list:
+    commits = [raw for page in pages for raw in json.loads(page)]
+    return [
+        {
+            "event_author": (raw.get("author") or {}).get("login") or raw["commit"]["author"]["name"],
+            "event_created_at": datetime.fromisoformat(raw["commit"]["author"]["date"].replace("Z", "+00:00")).isoformat(),
+            "event_repo": REPO,
+            "event_payload": {"commit_messages": [raw["commit"]["message"]], "changed_files_count": 2, "changed_lines_count": 12},
+        }
+        for raw in commits
+    ]
+
+
+def with_table(pages: list) -> ActivityTable:
+    commits = [raw for page in pages for raw in json.loads(page)]
+    table = ActivityTable()
+    for raw in commits:
+        author = raw["commit"]["author"]
+        table.append(
+            (raw.get("author") or {}).get("login") or author["name"],
+            parse_timestamp(author["date"]), REPO, raw["commit"]["message"], 2, 12,
+        )
+    return table
+
+
+def measure(build, pages: list) -> tuple:
+    """(result, seconds, peak bytes while building, bytes the result keeps)."""
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    result = build(pages)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak - baseline, current - baseline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commits", type=int, default=100000)
+    args = parser.parse_args()
+
+    pages = raw_pages(args.commits)
+    print(f"{args.commits} commits, {sum(map(len, pages)) / 2 ** 20:.1f} MB of JSON\n")
+    print(f"{'path':<10}{'seconds':>9}{'peak MB':>10}{'kept MB':>10}")
+    results = {}
+    for name, build in (("pygithub", with_pygithub), ("dicts", with_dicts), ("table", with_table)):
+        result, elapsed, peak, kept = measure(build, pages)
+        results[name] = result
+        print(f"{name:<10}{elapsed:>9.2f}{peak / 2 ** 20:>10.1f}{kept / 2 ** 20:>10.1f}")
+        del result
+
+    started = time.perf_counter()
+    serialized = results["table"].to_dicts()
+    print(f"\ntable -> dicts at prompt time: {time.perf_counter() - started:.2f}s")
+    if serialized != results["pygithub"] or serialized != results["dicts"]:
+        raise SystemExit("FAIL: the table doesn't serialize to the same activities.")
+    print("Same activities from all three paths.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Cost of the local commit digest and what it saves in prompt tokens.
+
+For growing synthetic histories, times `digest_commits` and compares the prompt payload
+with every commit message (no budget cut) against the digest: stats plus a sample. Also
+prints the digest of the smallest history, to eyeball what the model gets.
+
+    python benchmarks/commit_digest.py --sizes 1000 10000 100000
+"""
+import argparse
+import json
+import time
+
+from standins import SyntheticGitHub
+from services.activity_table import ActivityTable, parse_timestamp
+from services.commit_digest import digest_activities, digest_commits
+from services.prompt_builder import compact_json, estimate_tokens
+
+REPO = "octocat/big-repo"
+AUTHORS = ("octocat", "hubot", "monalisa", "dependabot[bot]")
+
+
+def history(count: int) -> ActivityTable:
+    data = SyntheticGitHub(commits=count)
+    table = ActivityTable()
+    for index in range(count):
+        commit = data.commit("https://api.github.com", REPO, index)
+        # Spread commits over the hours and days, with a few authors and repeated messages.
+        created_at = parse_timestamp(commit["commit"]["author"]["date"]) - (index * 7919) % 86400
+        message = "wip" if index % 17 == 0 else commit["commit"]["message"]
+        table.append(AUTHORS[index % 7 % len(AUTHORS)], created_at, REPO, message, 1 + index % 9, (index * 37) % 900)
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'commits':>9}{'digest ms':>11}{'raw tokens':>12}{'digest tokens':>15}")
+    for size in args.sizes:
+        table = history(size)
+        started = time.perf_counter()
+        digest_commits(table)
+        elapsed = time.perf_counter() - started
+        data = {"repo_full_name": REPO, "activities": table}
+        raw = estimate_tokens(compact_json(data))
+        digested = estimate_tokens(compact_json(digest_activities(data)))
+        print(f"{size:>9}{elapsed * 1000:>11.1f}{raw:>12}{digested:>15}")
+
+    stats, _ = digest_commits(history(min(args.sizes)))
+    print("\n" + json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
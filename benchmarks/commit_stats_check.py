@@ -0,0 +1,91 @@
+"""Checks of the batched commit stats query against the GraphQL endpoint of the GitHub stand-in.
+
+Runs `GitHubService.get_commits_stats` and `get_detail_repo_commits` against the stand-in
+and checks:
+
+- a full page: one query for 100 commits;
+- pagination: 250 commits in pages of 100, 100 and 50 following the cursor;
+- a partial last page when the history ends before the page does;
+- naive and non-UTC `since`/`until` sent to GraphQL as UTC timestamps;
+- a GitHub Enterprise layout, REST under `/api/v3` and GraphQL at `/api/graphql`;
+- the REST fallback: commits GraphQL has no file count for, and GraphQL failing altogether,
+  are fetched one by one with the same stats.
+
+Exits non-zero on the first mismatch.
+
+    python benchmarks/commit_stats_check.py
+"""
+import sys
+from datetime import datetime, timedelta, timezone
+
+from standins import SyntheticGitHub, fake_github_server
+from services.data_builder import get_detail_repo_commits
+from services.github_service import GitHubService
+
+# What the stand-in reports for every commit, through GraphQL or REST.
+EXPECTED = {"additions": 8, "deletions": 4, "changed_files": 2}
+
+
+def check(condition: bool, message: str):
+    if not condition:
+        raise SystemExit(f"FAIL: {message}")
+    print(f"ok  {message}")
+
+
+def run(data: SyntheticGitHub, call, graphql_errors: bool = False, enterprise: bool = False) -> tuple:
+    """(result, requests per route, GraphQL variables) of `call(service, data)` against a fresh stand-in."""
+    with fake_github_server(data, graphql_errors=graphql_errors, enterprise=enterprise) as github:
+        base_url = f"{github.url}/api/v3" if enterprise else github.url
+        result = call(GitHubService("check-token", base_url=base_url), data)
+        return result, dict(github.httpd.route_counts), github.httpd.graphql_variables
+
+
+def stats_of(max_commits=None, **window):
+    return lambda service, data: service.get_commits_stats(data.main_repo, max_commits=max_commits, **window)
+
+
+def main():
+    stats, routes, queries = run(SyntheticGitHub(commits=500), stats_of(100))
+    check(len(stats) == 100 and routes.get("POST graphql") == 1, "a full page of 100 commits in one query")
+    check(all(value == EXPECTED for value in stats.values()), "additions, deletions and changed files per commit")
+
+    data = SyntheticGitHub(commits=500)
+    stats, routes, queries = run(data, stats_of(250))
+    check([query["first"] for query in queries] == [100, 100, 50], "pages of 100, 100 and a partial 50")
+    check([query["after"] for query in queries] == [None, "100", "200"], "each page starts at the previous cursor")
+    check(list(stats) == [data.sha(data.main_repo, index) for index in range(250)], "the newest 250 commits, in order")
+
+    stats, routes, queries = run(SyntheticGitHub(commits=130), stats_of())
+    check(len(stats) == 130 and routes.get("POST graphql") == 2, "a partial last page where the history ends")
+
+    since = datetime(2025, 1, 1, 12, 0)
+    until = datetime(2025, 1, 2, 12, 0, tzinfo=timezone(timedelta(hours=2)))
+    _, _, queries = run(SyntheticGitHub(commits=10), stats_of(since=since, until=until))
+    check(queries[0]["since"] == "2025-01-01T12:00:00+00:00", "a naive since is sent as UTC")
+    check(queries[0]["until"] == "2025-01-02T10:00:00+00:00", "an aware until is converted to UTC")
+
+    stats, routes, _ = run(SyntheticGitHub(commits=500), stats_of(100), enterprise=True)
+    check(stats is not None and len(stats) == 100 and "POST unknown" not in routes,
+          "GitHub Enterprise: the query goes to /api/graphql")
+
+    def detail(service, data):
+        return get_detail_repo_commits(service, data.main_repo, max_commits=50).to_dicts()
+
+    data = SyntheticGitHub(commits=500)
+    data.huge_commits = {3, 17}
+    activities, routes, _ = run(data, detail)
+    check(routes.get("POST graphql") == 1 and routes.get("GET commit") == 2,
+          "commits without a GraphQL file count fall back to REST, one request each")
+    payloads = [activity["event_payload"] for activity in activities]
+    check(all(p["changed_files_count"] == 2 and p["changed_lines_count"] == 12 for p in payloads),
+          "the same stats from GraphQL and from the REST fallback")
+
+    activities, routes, _ = run(SyntheticGitHub(commits=500), detail, graphql_errors=True)
+    check(routes.get("GET commit") == 50 and [a["event_payload"] for a in activities] == payloads,
+          "a failing GraphQL query falls back to REST for every commit")
+    print("All commit stats checks passed.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+"""Event normalization throughput: the table-driven EventNormalizer against the if/elif chain it replaced.
+
+Builds synthetic events of every supported type (with some long comment and review bodies),
+normalizes them with both implementations and reports events per second. The legacy chain
+is kept below verbatim, `@beartype` check included, as the reference.
+
+    python benchmarks/event_normalization.py --events 10000 --repeat 5
+"""
+import argparse
+import random
+import time
+
+from beartype import beartype
+
+import standins  # noqa: F401 (puts src/ on the path)
+from models.enums.GithubEventEnum import GithubEventEnum
+from services.event_normalizer import EventNormalizer
+
+
+@beartype
+def legacy_event_payload(payload: dict, event_type: GithubEventEnum):
+    if event_type == GithubEventEnum.CommitComment:
+        comment_obj = payload.get("comment", {})
+        return {
+            "comment": comment_obj.get("body"),
+            "url": comment_obj.get("html_url"),
+        } if comment_obj.get("body") else {}
+
+    elif event_type in (GithubEventEnum.Create, GithubEventEnum.Delete):
+        return {
+            "ref_type": payload.get("ref_type"),
+            "ref": payload.get("ref"),
+        } if payload.get("ref_type") or payload.get("ref") else {}
+
+    elif event_type == GithubEventEnum.Fork:
+        forkee = payload.get("forkee", {})
+        parent_full_name = forkee.get("parent", {}).get("full_name") if "parent" in forkee else None
+        return {
+            "fork": forkee.get("full_name"),
+            "parent": parent_full_name,
+            "url": forkee.get("html_url"),
+        } if forkee.get("full_name") else {}
+
+    elif event_type == GithubEventEnum.Gollum:
+        pages = payload.get("pages", [])
+        page_titles = [page.get("title") for page in pages if "title" in page]
+        return {"gollum_pages": page_titles} if page_titles else {}
+
+    elif event_type == GithubEventEnum.IssueComment:
+        comment_obj = payload.get("comment", {})
+        return {
+            "issue_comment": comment_obj.get("body"),
+            "url": comment_obj.get("html_url"),
+            "issue_url": payload.get("issue", {}).get("html_url"),
+        } if comment_obj.get("body") else {}
+
+    elif event_type == GithubEventEnum.Issues:
+        issue_obj = payload.get("issue", {})
+        return {
+            "issue_title": issue_obj.get("title"),
+            "state": issue_obj.get("state"),
+            "url": issue_obj.get("html_url"),
+        } if issue_obj.get("title") else {}
+
+    elif event_type == GithubEventEnum.Member:
+        member_obj = payload.get("member", {})
+        return {
+            "member": member_obj.get("login"),
+            "action": payload.get("action"),
+        } if member_obj.get("login") else {}
+
+    elif event_type == GithubEventEnum.Public:
+        repo = payload.get("repo", {})
+        return {
+            "public_repo": repo.get("name"),
+        } if repo.get("name") else {}
+
+    elif event_type == GithubEventEnum.PullRequest:
+        pr_obj = payload.get("pull_request", {})
+        return {
+            "pull_request_title": pr_obj.get("title"),
+            "number": pr_obj.get("number"),
+            "state": pr_obj.get("state"),
+            "url": pr_obj.get("html_url"),
+        } if pr_obj.get("title") else {}
+
+    elif event_type == GithubEventEnum.PullRequestReview:
+        review_obj = payload.get("review", {})
+        pr_obj = payload.get("pull_request", {})
+        return {
+            "pull_request_review": review_obj.get("body"),
+            "state": review_obj.get("state"),
+            "pr_url": pr_obj.get("html_url"),
+        } if review_obj.get("body") else {}
+
+    elif event_type == GithubEventEnum.PullRequestReviewComment:
+        comment_obj = payload.get("comment", {})
+        pr_obj = payload.get("pull_request", {})
+        return {
+            "pull_request_review_comment": comment_obj.get("body"),
+            "url": comment_obj.get("html_url"),
+            "pr_url": pr_obj.get("html_url"),
+        } if comment_obj.get("body") else {}
+
+    elif event_type == GithubEventEnum.PullRequestReviewThread:
+        thread_obj = payload.get("thread", {})
+        pr_obj = payload.get("pull_request", {})
+        return {
+            "pull_request_review_thread": thread_obj.get("body"),
+            "pr_url": pr_obj.get("html_url"),
+        } if thread_obj.get("body") else {}
+
+    elif event_type == GithubEventEnum.Push:
+        ref = payload.get("ref")
+        commits = payload.get("commits", [])
+        commit_msgs = [c.get("message") for c in commits if "message" in c]
+        return {
+            "push_ref": ref,
+            "commit_messages": commit_msgs,
+            "size": payload.get("size"),
+        } if ref or commit_msgs else {}
+
+    elif event_type == GithubEventEnum.Release:
+        release_obj = payload.get("release", {})
+        return {
+            "release_name": release_obj.get("name"),
+            "tag_name": release_obj.get("tag_name"),
+            "url": release_obj.get("html_url"),
+        } if release_obj.get("name") or release_obj.get("tag_name") else {}
+
+    elif event_type == GithubEventEnum.Sponsorship:
+        sponsorship_obj = payload.get("sponsorship", {})
+        return {
+            "sponsorship_tier": sponsorship_obj.get("tier", {}).get("name"),
+            "sponsor": sponsorship_obj.get("sponsor", {}).get("login"),
+            "sponsoree": sponsorship_obj.get("sponsorable", {}).get("login"),
+        } if sponsorship_obj else {}
+
+    elif event_type == GithubEventEnum.Watch:
+        repo = payload.get("repo", {})
+        return {
+            "watch_repo": repo.get("name"),
+        } if repo.get("name") else {}
+
+    return {}
+
+
+def legacy_normalize(events: list) -> list:
+    activities = []
+    for event in events:
+        try:
+            event_type = GithubEventEnum(event["type"])
+        except ValueError:
+            continue
+        activities.append({
+            "event_type": event["type"],
+            "event_created_at": event["created_at"],
+            "event_repo": event["repo"]["name"],
+            "is_event_public": event["public"],
+            "event_payload": legacy_event_payload(event["payload"], event_type),
+        })
+    return activities
+
+
+def synthetic_payload(event_type: GithubEventEnum, index: int, rng: random.Random) -> dict:
+    url = f"https://github.com/octocat/repo/issues/{index}"
+    # Most bodies are a line or two, a few are pasted logs.
+    body = "Looks good to me. " * (rng.choice((1, 3, 10, 400)))
+    user = {"login": f"user{index}"}
+    return {
+        GithubEventEnum.CommitComment: lambda: {"comment": {"body": body, "html_url": url}},
+        GithubEventEnum.Create: lambda: {"ref_type": "branch", "ref": f"feature-{index}"},
+        GithubEventEnum.Delete: lambda: {"ref_type": "branch", "ref": f"feature-{index}"},
+        GithubEventEnum.Fork: lambda: {"forkee": {"full_name": f"user{index}/repo", "html_url": url, "parent": {"full_name": "octocat/repo"}}},
+        GithubEventEnum.Gollum: lambda: {"pages": [{"title": f"Page {n}"} for n in range(3)]},
+        GithubEventEnum.IssueComment: lambda: {"comment": {"body": body, "html_url": url}, "issue": {"html_url": url}},
+        GithubEventEnum.Issues: lambda: {"action": "opened", "issue": {"title": f"Bug {index}", "state": "open", "html_url": url}},
+        GithubEventEnum.Member: lambda: {"member": user, "action": "added"},
+        GithubEventEnum.Public: lambda: {"repo": {"name": "octocat/repo"}},
+        GithubEventEnum.PullRequest: lambda: {"pull_request": {"title": f"Fix {index}", "number": index, "state": "open", "html_url": url}},
+        GithubEventEnum.PullRequestReview: lambda: {"review": {"body": body, "state": "approved"}, "pull_request": {"html_url": url}},
+        GithubEventEnum.PullRequestReviewComment: lambda: {"comment": {"body": body, "html_url": url}, "pull_request": {"html_url": url}},
+        GithubEventEnum.PullRequestReviewThread: lambda: {"thread": {"body": body}, "pull_request": {"html_url": url}},
+        GithubEventEnum.Push: lambda: {"ref": "refs/heads/main", "size": 3, "commits": [{"message": f"Commit {index}.{n}"} for n in range(3)]},
+        GithubEventEnum.Release: lambda: {"release": {"name": f"v{index}", "tag_name": f"v{index}", "html_url": url}},
+        GithubEventEnum.Sponsorship: lambda: {"sponsorship": {"tier": {"name": "Gold"}, "sponsor": user, "sponsorable": {"login": "octocat"}}},
+        GithubEventEnum.Watch: lambda: {"action": "started"},
+    }[event_type]()
+
+
+def synthetic_events(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    types = list(GithubEventEnum)
+    events = []
+    for index in range(count):
+        event_type = rng.choice(types)
+        events.append({
+            "id": str(10 ** 10 - index),
+            "type": event_type.value,
+            "created_at": "2025-01-01T00:00:00Z",
+            "repo": {"name": "octocat/repo"},
+            "public": True,
+            "payload": synthetic_payload(event_type, index, rng),
+        })
+    return events
+
+
+def best_of(normalize, events: list, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        normalize(events)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-text-length", type=int, default=None, help="Truncate bodies (no truncation by default, like the chain).")
+    args = parser.parse_args()
+
+    events = synthetic_events(args.events)
+    normalizer = EventNormalizer(max_text_length=args.max_text_length)
+    if args.max_text_length is None and normalizer.normalize_all(events) != legacy_normalize(events):
+        raise SystemExit("FAIL: the table-driven normalizer disagrees with the legacy chain.")
+
+    results = {
+        "if/elif chain": best_of(legacy_normalize, events, args.repeat),
+        "compiled table": best_of(normalizer.normalize_all, events, args.repeat),
+    }
+    for name, seconds in results.items():
+        print(f"{name:>16}: {seconds * 1000:8.1f} ms  {args.events / seconds:>12,.0f} events/s")
+    print(f"{'speed-up':>16}: {results['if/elif chain'] / results['compiled table']:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
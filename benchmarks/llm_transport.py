@@ -0,0 +1,65 @@
+"""Per-turn latency of LLMService against a local OpenAI-compatible stand-in.
+
+Compares a fresh connection per turn (what a bare `requests.post` does) with the pooled
+keep-alive session owned by LLMService. The stand-in sleeps `--handshake-ms` on every new
+connection to stand in for the TCP+TLS handshake of a real provider.
+
+    python benchmarks/llm_transport.py --turns 20 --handshake-ms 60
+"""
+import argparse
+import statistics
+import time
+
+import requests
+
+from standins import fake_llm_server
+from helpers.settings import Settings
+from services.llm_service import LLMService
+
+
+def run_turns(send, turns: int):
+    latencies = []
+    for turn in range(turns):
+        started = time.perf_counter()
+        send([{"role": "user", "content": f"turn {turn}"}])
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--handshake-ms", type=float, default=60.0)
+    args = parser.parse_args()
+
+    with fake_llm_server(handshake_delay=args.handshake_ms / 1000) as server:
+        settings = Settings(
+            ROAST_LLM_PROVIDER="OPENAI",
+            ROAST_LLM_MODEL_ID="stand-in",
+            ROAST_DEFAULT_API_KEY="key",
+            ROAST_OPENAI_BASE_URL=f"{server.url}/chat/completions",
+        )
+        service = LLMService(settings)
+        service.set_model(settings.ROAST_LLM_MODEL_ID)
+
+        def unpooled(messages):
+            requests.post(
+                settings.ROAST_OPENAI_BASE_URL, json={"model": "stand-in", "messages": messages}, timeout=45
+            ).raise_for_status()
+
+        results = {
+            "fresh connection per turn": run_turns(unpooled, args.turns),
+            "pooled LLMService": run_turns(lambda messages: service.generate_text(messages=messages), args.turns),
+        }
+        connections = server.httpd.connections
+
+    for name, latencies in results.items():
+        print(
+            f"{name:>28}: median {statistics.median(latencies) * 1000:7.1f} ms"
+            f"  p95 {sorted(latencies)[int(len(latencies) * 0.95) - 1] * 1000:7.1f} ms"
+        )
+    print(f"{'connections opened':>28}: {connections} for {args.turns * 2} turns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Load test of `roast serve` against local GitHub and LLM stand-ins.
+
+Starts the HTTP API in-process over one GitRoaster, then has `--clients` concurrent clients
+send `--requests` requests each: a repo roast that opens a session, a follow-up chat in that
+session, and a user roast. Reports throughput, latency percentiles per endpoint and how many
+requests were turned away with a 503. `--cli-samples` also times `roast repo` run as a
+fresh process, which is what the server saves a caller that shells out per request.
+
+    python benchmarks/load_test.py --clients 8 --requests 20
+    python benchmarks/load_test.py --workers 2 --queue-size 2 --clients 16   # backpressure
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+
+import requests
+
+from standins import SRC_DIR, SyntheticGitHub, fake_github_server, fake_llm_server
+from helpers.settings import Settings
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def client(url: str, data: SyntheticGitHub, requests_per_client: int, use_cache: bool, results: list, lock):
+    http = requests.Session()
+    session = None
+    for index in range(requests_per_client):
+        step = index % 3
+        if step == 0:
+            endpoint, body = "/roast/repo", {"repo": data.main_repo, "max_commits": 100, "use_cache": use_cache}
+        elif step == 1 and session:
+            endpoint, body = "/chat", {"session": session, "message": "Be even meaner."}
+        else:
+            endpoint, body = "/roast/user", {"username": data.login, "use_cache": use_cache}
+        started = time.perf_counter()
+        response = http.post(url + endpoint, json=body, timeout=600)
+        elapsed = time.perf_counter() - started
+        if endpoint == "/roast/repo" and response.status_code == 200:
+            session = response.json()["session"]
+        elif response.status_code == 503:
+            time.sleep(float(response.headers.get("Retry-After", 1)) / 10)
+        with lock:
+            results.append((endpoint, response.status_code, elapsed))
+
+
+def time_cli(samples: int, data: SyntheticGitHub) -> list:
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "main.py", "repo", data.main_repo, "--max-commits", "100", "--no-cache"],
+            cwd=SRC_DIR, capture_output=True, text=True,
+        )
+        if completed.returncode != 0:
+            raise SystemExit(f"roast repo failed:\n{completed.stdout}{completed.stderr}")
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=15, help="Requests per client.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queue-size", type=int, default=16)
+    parser.add_argument("--github-latency-ms", type=float, default=20.0)
+    parser.add_argument("--llm-delay-ms", type=float, default=200.0, help="Time the stand-in LLM takes per answer.")
+    parser.add_argument("--use-cache", action="store_true", help="Let repeated roasts come from the result cache.")
+    parser.add_argument("--cli-samples", type=int, default=0, help="Also time this many `roast repo` processes.")
+    args = parser.parse_args()
+
+    data = SyntheticGitHub(commits=300, tree_entries=3000)
+    with tempfile.TemporaryDirectory() as home, \
+            fake_github_server(data, latency=args.github_latency_ms / 1000) as github, \
+            fake_llm_server(generation_delay=args.llm_delay_ms / 1000) as llm:
+        # A throwaway app directory for the server and the CLI processes alike.
+        os.environ.update(HOME=home, XDG_CONFIG_HOME=os.path.join(home, ".config"))
+        from helpers.config import save_config
+        from roaster import GitRoaster
+        from services.roast_server import RoastServer
+
+        settings = Settings(
+            ROAST_LLM_PROVIDER="OPENAI",
+            ROAST_LLM_MODEL_ID="stand-in",
+            ROAST_DEFAULT_API_KEY="key",
+            ROAST_OPENAI_BASE_URL=f"{llm.url}/chat/completions",
+            ROAST_GITHUB_TOKEN="load-test-token",
+            ROAST_GITHUB_API_URL=github.url,
+        )
+        save_config(settings)
+        server = RoastServer(("127.0.0.1", 0), GitRoaster(settings), workers=args.workers, queue_size=args.queue_size)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        results = []
+        lock = threading.Lock()
+        clients = [
+            threading.Thread(target=client, args=(server.url, data, args.requests, args.use_cache, results, lock))
+            for _ in range(args.clients)
+        ]
+        started = time.perf_counter()
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        wall = time.perf_counter() - started
+        server.shutdown()
+        server.server_close()
+        github_requests, llm_requests = github.httpd.requests, llm.httpd.requests
+
+        cli_timings = time_cli(args.cli_samples, data) if args.cli_samples else []
+
+    statuses = Counter(status for _, status, _ in results)
+    served = [result for result in results if result[1] == 200]
+    print(f"{len(results)} requests from {args.clients} clients in {wall:.2f}s: "
+          f"{len(served) / wall:.1f} roasts+chats/s, statuses {dict(sorted(statuses.items()))}")
+    print(f"GitHub requests: {github_requests}, LLM requests: {llm_requests}")
+    print(f"\n{'endpoint':<14}{'ok':>6}{'503':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    by_endpoint = defaultdict(list)
+    for endpoint, status, elapsed in results:
+        by_endpoint[endpoint].append((status, elapsed))
+    for endpoint, rows in sorted(by_endpoint.items()):
+        latencies = [elapsed for status, elapsed in rows if status == 200] or [0.0]
+        print(
+            f"{endpoint:<14}{sum(status == 200 for status, _ in rows):>6}{sum(status == 503 for status, _ in rows):>6}"
+            f"{percentile(latencies, 0.5) * 1000:>10.0f}{percentile(latencies, 0.95) * 1000:>10.0f}"
+            f"{percentile(latencies, 0.99) * 1000:>10.0f}"
+        )
+    if cli_timings:
+        repo_latencies = [elapsed for status, elapsed in by_endpoint["/roast/repo"] if status == 200]
+        print(f"\n`roast repo` as a new process: median {statistics.median(cli_timings) * 1000:.0f} ms "
+              f"vs {statistics.median(repo_latencies) * 1000:.0f} ms through the server under load")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Checks of the git-backed repo data source against repositories built on the spot.
+
+Creates a fixture repository with `git init` and a few commits (a binary file, a multi-line
+message, nested directories), and a long generated history with `git fast-import`, then:
+
+- builds the fixture's data with `build_local_repo_data` and checks it has the same keys,
+  activity fields and `files_structure` shape as `build_repo_data` against the GitHub
+  stand-in, and that the commits, line counts, tree and language bytes match what was committed;
+- makes a blobless partial clone of it and checks that the files structure and languages
+  fetch nothing, that the history costs a single batched fetch, and that both give the same
+  data as the full repository;
+- clones it with a token and checks the token never shows up on a git command line;
+- reads the long history while git writes half a megabyte of tracing to stderr.
+
+Each check is a `test_` function, so pytest collects them as well. Exits non-zero on the
+first mismatch.
+
+    python benchmarks/local_repo_check.py
+    python -m pytest benchmarks/local_repo_check.py
+"""
+import glob
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+
+from standins import SyntheticGitHub, fake_github_server
+from services import local_repo
+from services.activity_table import json_default
+from services.data_builder import build_local_repo_data, build_repo_data
+from services.github_service import GitHubService
+from services.local_repo import LocalRepository
+
+# (path, content) per commit, oldest first; None deletes the file.
+COMMITS = [
+    ("initial layout", {"README.md": "# fixture\n\nA repo for checks.\n", "src/app.py": "print('hi')\n", "LICENSE": "MIT\n"}),
+    ("add helpers\n\nWith a body line.", {"src/util/strings.py": "a = 1\nb = 2\n", "web/index.js": "x()\n"}),
+    ("binary asset", {"assets/logo.png": b"\x89PNG\x00\x01\x02"}),
+    ("fix app", {"src/app.py": "print('hello')\nprint('again')\n", "web/index.js": None}),
+]
+LONG_HISTORY = 1500
+
+# Set up once by setup_module: the temporary root and the fixture repositories in it.
+fixtures = {}
+
+
+def git(cwd: str, *args, env=None, input=None) -> str:
+    return subprocess.run(
+        ["git", "-C", cwd, *args], check=True, capture_output=True, text=True, env=env, input=input
+    ).stdout
+
+
+def make_fixture(path: str):
+    git(path, "init", "--quiet", "--initial-branch=main")
+    git(path, "config", "uploadpack.allowFilter", "true")
+    git(path, "config", "uploadpack.allowAnySHA1InWant", "true")
+    for index, (message, files) in enumerate(COMMITS):
+        for name, content in files.items():
+            target = os.path.join(path, name)
+            if content is None:
+                os.remove(target)
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb" if isinstance(content, bytes) else "w") as f:
+                f.write(content)
+        git(path, "add", "--all")
+        env = dict(os.environ, GIT_AUTHOR_DATE=f"2024-01-0{index + 1}T23:30:00+02:00", GIT_COMMITTER_DATE="2024-01-09T00:00:00Z")
+        git(path, "-c", "user.name=octocat", "-c", "user.email=octocat@example.com", "commit", "--quiet", "-m", message, env=env)
+
+
+def make_long_history(path: str, commits: int):
+    """`commits` commits, each rewriting one of 50 files, in a single pack."""
+    git(path, "init", "--quiet", "--initial-branch=main")
+    stream = []
+    for index in range(1, commits + 1):
+        content = f"line {index}\n" * 3
+        stream.append(
+            f"commit refs/heads/main\ncommitter octocat <octocat@example.com> {1700000000 + index} +0000\n"
+            f"data 7\nchange\nM 100644 inline f{index % 50}.py\ndata {len(content)}\n{content}\n"
+        )
+    git(path, "fast-import", "--quiet", input="".join(stream))
+
+
+def setup_module():
+    root = tempfile.mkdtemp()
+    fixtures["root"] = root
+    fixtures["fixture"] = os.path.join(root, "fixture")
+    os.makedirs(fixtures["fixture"])
+    make_fixture(fixtures["fixture"])
+    fixtures["long"] = os.path.join(root, "long")
+    os.makedirs(fixtures["long"])
+    make_long_history(fixtures["long"], LONG_HISTORY)
+    fixtures["local"] = plain(build_local_repo_data(LocalRepository(fixtures["fixture"], name="octocat/fixture")))
+
+
+def teardown_module():
+    shutil.rmtree(fixtures.pop("root"), ignore_errors=True)
+    fixtures.clear()
+
+
+def check(condition: bool, message: str):
+    if not condition:
+        raise AssertionError(message)
+    print(f"ok  {message}")
+
+
+def shape(value):
+    """Keys (recursively for dicts) and element types, not values."""
+    if isinstance(value, dict):
+        return {key: shape(item) for key, item in value.items()}
+    return type(value).__name__
+
+
+def plain(data: dict) -> dict:
+    return json.loads(json.dumps(data, default=json_default))
+
+
+def github_reference() -> dict:
+    data = SyntheticGitHub(commits=5, tree_entries=50)
+    with fake_github_server(data) as github:
+        return plain(build_repo_data(GitHubService("check-token", base_url=github.url), data.main_repo))
+
+
+def fetches(trace_dir: str) -> int:
+    """git fetch processes (lazy or explicit) recorded in the trace2 event logs so far."""
+    count = 0
+    for name in glob.glob(os.path.join(trace_dir, "*")):
+        with open(name) as f:
+            count += sum(1 for line in f if '"event":"cmd_name"' in line and '"name":"fetch"' in line)
+    return count
+
+
+def history_stats(activities: list) -> list:
+    return [(a["event_payload"]["changed_files_count"], a["event_payload"]["changed_lines_count"]) for a in activities]
+
+
+def test_same_shape_as_github():
+    local = fixtures["local"]
+    reference = github_reference()
+    check(local.keys() == reference.keys(), "same top-level keys as build_repo_data")
+    check(shape(local["activities"][0]) == shape(reference["activities"][0]), "same activity fields")
+    check(shape(local["files_structure"]).keys() == shape(reference["files_structure"]).keys(),
+          "same files_structure keys")
+
+
+def test_fixture_contents():
+    local = fixtures["local"]
+    activities = local["activities"]
+    check([a["event_payload"]["commit_messages"][0] for a in activities] == [m for m, _ in reversed(COMMITS)],
+          "commits newest first with full messages")
+    check([a["event_created_at"] for a in activities][-1] == "2024-01-01T21:30:00+00:00", "author dates in UTC")
+    check(history_stats(activities) == [(2, 4), (1, 0), (2, 3), (3, 5)],
+          "numstat file and line counts (binary files count no lines)")
+    structure = local["files_structure"]
+    check(structure["total_entries"] == 5 and structure["total_directories"] == 3, "tree entries and directories")
+    check(structure["top_level"] == ["LICENSE", "README.md", "assets/", "src/"], "top-level listing (web/ was emptied)")
+    python_bytes = len(COMMITS[3][1]["src/app.py"]) + len(COMMITS[1][1]["src/util/strings.py"])
+    check(local["languages"] == {"Python": python_bytes}, "bytes per language, like GitHub's breakdown")
+    check(local["repo_readme"].startswith("# fixture") and local["repo_license"] == "MIT\n", "README and license")
+
+
+def test_partial_clone_fetches():
+    root = fixtures["root"]
+    clone = os.path.join(root, "clone.git")
+    git(root, "clone", "--quiet", "--bare", "--filter=blob:none", f"file://{fixtures['fixture']}", clone)
+    repo = LocalRepository(clone, name="octocat/fixture")
+    check(repo.promisor_remote == "origin", "the clone is partial")
+    trace_dir = os.path.join(root, "trace")
+    os.makedirs(trace_dir)
+    os.environ["GIT_TRACE2_EVENT"] = trace_dir
+    try:
+        check(repo.files_structure() == fixtures["local"]["files_structure"], "same files structure from the partial clone")
+        check(repo.languages() == {}, "no language bytes from the partial clone, they'd need every blob")
+        check(fetches(trace_dir) == 0, "files structure and languages fetch no blobs")
+        history = [(c["changed_files"], c["changed_lines"]) for c in repo.iter_commits()]
+        check(history == history_stats(fixtures["local"]["activities"]), "same history stats from the partial clone")
+        check(fetches(trace_dir) == 1, "the history's blobs come in one batched fetch")
+        list(repo.iter_commits())
+        check(fetches(trace_dir) == 1, "nothing fetched again once the blobs are there")
+    finally:
+        del os.environ["GIT_TRACE2_EVENT"]
+
+
+def test_token_stays_off_the_command_line():
+    commands = []
+    run, popen = subprocess.run, subprocess.Popen
+
+    def recording(original):
+        def wrapper(command, *args, **kwargs):
+            commands.append((command, kwargs.get("env") or {}))
+            return original(command, *args, **kwargs)
+        return wrapper
+
+    local_repo.subprocess.run, local_repo.subprocess.Popen = recording(run), recording(popen)
+    try:
+        root = fixtures["root"]
+        # Served as <root>/octocat/fixture.git; a file:// remote ignores the header, so the clone goes through.
+        os.makedirs(os.path.join(root, "octocat"))
+        os.symlink(fixtures["fixture"], os.path.join(root, "octocat", "fixture.git"))
+        directory = os.path.join(root, "clones")
+        repo = LocalRepository.clone("octocat/fixture", directory, base_url=f"file://{root}", token="secret-token")
+        list(repo.iter_commits())
+        LocalRepository.clone("octocat/fixture", directory, base_url=f"file://{root}", token="secret-token")
+    finally:
+        local_repo.subprocess.run, local_repo.subprocess.Popen = run, popen
+    check(len(commands) > 3, "clone, fetch and reads all ran")
+    check(not any("secret" in " ".join(command) or "Basic" in " ".join(command) for command, _ in commands),
+          "the token is on no git command line")
+    check(all(env.get("GIT_CONFIG_KEY_0") == "http.extraHeader" for _, env in commands),
+          "every git command gets the auth header through its environment")
+
+
+def test_chatty_stderr_does_not_block():
+    repo = LocalRepository(fixtures["long"])
+    commits = []
+    # Every object read is traced to stderr, far more than a pipe holds.
+    os.environ["GIT_TRACE_PACK_ACCESS"] = "2"
+    try:
+        reader = threading.Thread(target=lambda: commits.extend(repo.iter_commits()), daemon=True)
+        reader.start()
+        reader.join(timeout=60)
+    finally:
+        del os.environ["GIT_TRACE_PACK_ACCESS"]
+    check(not reader.is_alive() and len(commits) == LONG_HISTORY, "the history reads through heavy stderr output")
+
+
+def main():
+    setup_module()
+    try:
+        for name, test in list(globals().items()):
+            if name.startswith("test_"):
+                test()
+    except AssertionError as e:
+        print(f"FAIL: {e}")
+        return 1
+    finally:
+        teardown_module()
+    print("All local repo checks passed.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
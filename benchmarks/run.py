@@ -0,0 +1,178 @@
+"""End-to-end roast benchmarks against local GitHub and LLM stand-ins, no network needed.
+
+Each scenario serves a synthetic account of a given size, runs a full roast through
+GitRoaster with a fresh cache directory, and reports latency, GitHub requests (total and
+per endpoint), LLM requests, prompt size and peak Python memory. Scenarios with an update
+step roast once, change the account, and measure the second roast in the same cache
+directory, which is what a daily re-roast costs. Request counts are
+compared with `baseline.json`: the run fails when any scenario makes more requests than
+its baseline, which is how hidden API calls sneak in.
+
+    python benchmarks/run.py
+    python benchmarks/run.py --scenario repo-large --runs 3 --latency-ms 50
+    python benchmarks/run.py --update-baseline
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from standins import SyntheticGitHub, fake_github_server, fake_llm_server
+from helpers.settings import Settings
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+SCENARIOS = {
+    "repo": ("repo", lambda: SyntheticGitHub(commits=500, tree_entries=5000)),
+    # The tree is bigger than one recursive listing may be, so it's walked subtree by subtree.
+    "repo-large": ("repo", lambda: SyntheticGitHub(commits=5000, tree_entries=60000, tree_truncate_at=20000)),
+    "user": ("user", lambda: SyntheticGitHub(events=90)),
+    # No public events: activity comes from the most recently updated repositories.
+    "user-no-events": ("user", lambda: SyntheticGitHub(events=0, repos=30)),
+    # Three commits landed (touching files) since the last roast, which left a snapshot behind.
+    "repo-reroast": ("repo", lambda: SyntheticGitHub(commits=500, tree_entries=5000)),
+}
+# Applied between a first, unmeasured roast and the measured one.
+UPDATES = {
+    "repo-reroast": lambda data: data.push(3),
+}
+
+
+def _roast(kind: str, target: str, github_url: str, llm_url: str, home: str, measure_memory: bool, results):
+    """Runs in a child process, so the stand-ins' own allocations stay out of the memory numbers."""
+    # A throwaway app directory: no cached responses or roasts from earlier runs.
+    os.environ.update(HOME=home, XDG_CONFIG_HOME=os.path.join(home, ".config"))
+    from roaster import GitRoaster
+
+    roaster = GitRoaster(Settings(
+        ROAST_LLM_PROVIDER="OPENAI",
+        ROAST_LLM_MODEL_ID="stand-in",
+        ROAST_DEFAULT_API_KEY="key",
+        ROAST_OPENAI_BASE_URL=f"{llm_url}/chat/completions",
+        ROAST_GITHUB_TOKEN="benchmark-token",
+        ROAST_GITHUB_API_URL=github_url,
+    ))
+    if measure_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    if kind == "repo":
+        roaster.roast_repo(target, use_cache=False)
+    else:
+        roaster.roast_user(target, use_cache=False)
+    results.put({
+        "seconds": time.perf_counter() - started,
+        "prompt_tokens": roaster.last_prompt_tokens,
+        "peak_bytes": tracemalloc.get_traced_memory()[1] if measure_memory else None,
+    })
+
+
+def roast_once(kind: str, data: SyntheticGitHub, latency: float, measure_memory: bool, update=None) -> dict:
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    target = data.main_repo if kind == "repo" else data.login
+    with tempfile.TemporaryDirectory() as home, fake_github_server(data, latency=latency) as github, fake_llm_server() as llm:
+        for measured in ([False, True] if update else [True]):
+            if measured and update:
+                update(data)
+                with github.httpd.lock:
+                    github.httpd.requests = 0
+                    github.httpd.route_counts.clear()
+                llm.httpd.requests = 0
+                results.get()
+            child = context.Process(
+                target=_roast, args=(kind, target, github.url, llm.url, home, measure_memory and measured, results)
+            )
+            child.start()
+            child.join()
+            if child.exitcode != 0:
+                raise SystemExit(f"The {kind} roast of {target} failed (exit code {child.exitcode}).")
+        return dict(
+            results.get(),
+            requests=github.httpd.requests,
+            routes=dict(sorted(github.httpd.route_counts.items())),
+            llm_requests=llm.httpd.requests,
+        )
+
+
+def run_scenario(name: str, runs: int, latency: float) -> dict:
+    kind, make_data = SCENARIOS[name]
+    update = UPDATES.get(name)
+    results = [roast_once(kind, make_data(), latency, measure_memory=False, update=update) for _ in range(runs)]
+    # tracemalloc slows everything down, memory gets a run of its own.
+    memory = roast_once(kind, make_data(), latency, measure_memory=True, update=update)
+    result = dict(results[0], seconds=statistics.median(r["seconds"] for r in results), peak_bytes=memory["peak_bytes"])
+    result["stable_requests"] = all(r["routes"] == result["routes"] for r in results + [memory])
+    return result
+
+
+def check_against_baseline(results: dict, baseline: dict) -> list:
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if result["requests"] > expected["requests"]:
+            regressions.append(f"{name}: {result['requests']} GitHub requests, baseline {expected['requests']}")
+        for route, count in result["routes"].items():
+            if count > expected["routes"].get(route, 0):
+                regressions.append(f"{name}: {count} x {route}, baseline {expected['routes'].get(route, 0)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Run only these scenarios.")
+    parser.add_argument("--runs", type=int, default=1, help="Timed runs per scenario, the median is reported.")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Added to every GitHub response.")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these request counts as the new baseline.")
+    parser.add_argument("--json", help="Also write the full results to this file.")
+    args = parser.parse_args()
+
+    names = args.scenario or list(SCENARIOS)
+    results = {}
+    print(f"{'scenario':<16}{'seconds':>9}{'github':>8}{'llm':>5}{'prompt tok':>12}{'peak MB':>9}")
+    for name in names:
+        result = results[name] = run_scenario(name, args.runs, args.latency_ms / 1000)
+        print(
+            f"{name:<16}{result['seconds']:>9.2f}{result['requests']:>8}{result['llm_requests']:>5}"
+            f"{result['prompt_tokens'] or 0:>12}{result['peak_bytes'] / 2 ** 20:>9.1f}"
+            + ("" if result["stable_requests"] else "  (request counts vary between runs)")
+        )
+        for route, count in result["routes"].items():
+            print(f"{'':<4}{route:<28}{count:>6}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    if args.update_baseline:
+        baseline.update({
+            name: {"requests": result["requests"], "routes": result["routes"]} for name, result in results.items()
+        })
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nBaseline updated: {BASELINE_PATH}")
+        return
+
+    regressions = check_against_baseline(results, baseline)
+    if regressions:
+        print("\nFAIL: more GitHub requests than the baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("\nRequest counts within baseline." if baseline else "\nNo baseline yet, run with --update-baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Stress test of request coalescing: concurrent lookups of one repo or user must make one upstream call.
+
+First hammers SingleFlightCache directly with a slow loader that counts its calls, including
+a loader that fails (the error must reach every waiter and must not be cached). Then runs
+GitHubService against the GitHub stand-in with many threads asking for the same repositories
+and users at once, and counts the requests that reach the server. Exits non-zero on any
+extra upstream call.
+
+    python benchmarks/single_flight_stress.py --threads 64 --rounds 20
+"""
+import argparse
+import sys
+import threading
+import time
+from collections import Counter
+
+from standins import SyntheticGitHub, fake_github_server
+from services.github_service import GitHubService
+from services.single_flight import SingleFlightCache
+
+
+def run_threads(count: int, target) -> list:
+    """Start `count` threads released together by a barrier; return what each got (value or exception)."""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def worker(index):
+        barrier.wait()
+        try:
+            results[index] = target(index)
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def stress_cache(threads: int, rounds: int, keys: int) -> list:
+    failures = []
+    for round_number in range(rounds):
+        cache = SingleFlightCache(maxsize=1000, ttl=3600)
+        loads = Counter()
+        lock = threading.Lock()
+
+        def load(key):
+            with lock:
+                loads[key] += 1
+            time.sleep(0.01)
+            return f"value-{key}"
+
+        results = run_threads(threads, lambda index: cache.get_or_load(index % keys, lambda: load(index % keys)))
+        if any(loads[key] != 1 for key in range(keys)):
+            failures.append(f"round {round_number}: loads per key {dict(loads)}")
+        if any(result != f"value-{index % keys}" for index, result in enumerate(results)):
+            failures.append(f"round {round_number}: wrong values handed out")
+
+    cache = SingleFlightCache(maxsize=10, ttl=3600)
+    calls = Counter()
+
+    def failing():
+        calls["failing"] += 1
+        time.sleep(0.02)
+        raise ConnectionError("upstream down")
+
+    results = run_threads(threads, lambda _: cache.get_or_load("key", failing))
+    if calls["failing"] != 1 or not all(isinstance(result, ConnectionError) for result in results):
+        failures.append(f"failing loader ran {calls['failing']} times, results {Counter(type(r).__name__ for r in results)}")
+    if cache.get_or_load("key", lambda: "recovered") != "recovered":
+        failures.append("an error was cached")
+    return failures
+
+
+def stress_service(threads: int, repos: int) -> tuple:
+    data = SyntheticGitHub(repos=repos)
+    names = data.repo_names()[:repos]
+    with fake_github_server(data, latency=0.02) as github:
+        service = GitHubService("stress-token", base_url=github.url)
+
+        def lookup(index):
+            if index % 2 == 0:
+                return service.get_user(username=data.login).login
+            return service.get_repository(names[index // 2 % len(names)]).full_name
+
+        results = run_threads(threads, lookup)
+        routes = dict(github.httpd.route_counts)
+    errors = [result for result in results if isinstance(result, Exception)]
+    failures = [f"{len(errors)} lookups failed, e.g. {errors[0]!r}"] if errors else []
+    if routes.get("GET repo", 0) > len(names):
+        failures.append(f"{routes['GET repo']} repository requests for {len(names)} repositories")
+    if routes.get("GET user", 0) > 1:
+        failures.append(f"{routes['GET user']} user requests for 1 user")
+    return routes, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--keys", type=int, default=4)
+    args = parser.parse_args()
+
+    failures = stress_cache(args.threads, args.rounds, args.keys)
+    print(f"SingleFlightCache: {args.rounds} rounds of {args.threads} threads over {args.keys} keys, "
+          f"{'OK' if not failures else 'FAIL'}")
+
+    routes, service_failures = stress_service(args.threads, repos=args.keys)
+    failures += service_failures
+    print(f"GitHubService: {args.threads} concurrent lookups of {args.keys} repos and 1 user -> "
+          + ", ".join(f"{count} x {route}" for route, count in sorted(routes.items())))
+
+    if failures:
+        print("\nFAIL:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nOne upstream call per key.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,538 @@
+"""Local stand-ins for the remote services Git-Roaster talks to, used by the benchmarks."""
+import base64
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Optional
+from urllib.parse import urlparse, parse_qs, urlencode, unquote
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients dropping pooled connections they have no room for is expected under load.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StandInServer:
+    """Runs a handler class on a local port in a background thread."""
+
+    def __init__(self, handler_class, **attributes):
+        self.httpd = _QuietHTTPServer(("127.0.0.1", 0), handler_class)
+        self.httpd.daemon_threads = True
+        self.httpd.connections = 0
+        self.httpd.requests = 0
+        self.httpd.lock = threading.Lock()
+        for name, value in attributes.items():
+            setattr(self.httpd, name, value)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body in one write, otherwise Nagle + delayed ACK add ~40ms to every keep-alive reply.
+    wbufsize = 1 << 16
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+        # Stand-in for the TCP+TLS handshake a real provider costs on every new connection.
+        time.sleep(getattr(self.server, "handshake_delay", 0))
+
+    def count_request(self):
+        with self.server.lock:
+            self.server.requests += 1
+
+    def send_json(self, obj, status=200, headers=None):
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+
+class FakeLLMHandler(StandInHandler):
+    """OpenAI-compatible `/chat/completions` answering with a canned roast."""
+
+    def do_POST(self):
+        self.count_request()
+        body = self.read_json()
+        time.sleep(getattr(self.server, "generation_delay", 0))
+        content = getattr(self.server, "reply", "## Roast\n\nThis repository is a cry for help.")
+        if body.get("stream"):
+            return self.send_stream(content)
+        self.send_json({
+            "id": "chatcmpl-standin",
+            "object": "chat.completion",
+            "model": body.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        })
+
+
+    def send_stream(self, content):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        words = content.split(" ")
+        for index, word in enumerate(words):
+            delta = word if index == len(words) - 1 else word + " "
+            event = json.dumps({"choices": [{"index": 0, "delta": {"content": delta}}]})
+            self.write_chunk(f"data: {event}\n\n".encode("utf-8"))
+            time.sleep(getattr(self.server, "token_delay", 0))
+        self.write_chunk(b"data: [DONE]\n\n")
+        self.write_chunk(b"")
+
+    def write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+def fake_llm_server(handshake_delay: float = 0.0, generation_delay: float = 0.0, **attributes):
+    return StandInServer(FakeLLMHandler, handshake_delay=handshake_delay, generation_delay=generation_delay, **attributes)
+
+
+class SyntheticGitHub:
+    """Deterministic data for a fake GitHub account: one big repository, a few small ones,
+    a profile repository and a feed of recent events. Sizes are configurable."""
+
+    EXTENSIONS = (".py", ".js", ".md", ".json", ".yml", ".ts", ".css", ".html")
+
+    def __init__(
+        self,
+        login: str = "octocat",
+        commits: int = 500,
+        tree_entries: int = 5000,
+        events: int = 90,
+        repos: int = 6,
+        tree_truncate_at: int = 100000,
+        readme_bytes: int = 6000,
+    ):
+        self.login = login
+        self.commits = commits
+        self.tree_entries = tree_entries
+        self.events = events
+        self.repos = repos
+        self.tree_truncate_at = tree_truncate_at
+        self.readme = self.make_readme(readme_bytes)
+        self.license = "MIT License\n\nPermission is hereby granted, free of charge..."
+        self.epoch = 1735689600  # 2025-01-01
+        self._paths = None
+        # Moved by `push`: commits landed on the big repository since, and how often its files changed.
+        self.pushed = 0
+        self.tree_version = 0
+        # Commit indexes GraphQL reports no file count for, like GitHub does for huge commits.
+        self.huge_commits = set()
+
+    @staticmethod
+    def make_readme(size: int) -> str:
+        """A README of about `size` bytes laid out like real ones: badges, an intro, then sections."""
+        parts = [
+            "# Synthetic project\n",
+            "[![CI](https://github.com/octocat/big-repo/actions/workflows/ci.yml/badge.svg)](https://github.com/octocat/big-repo/actions)"
+            " [![PyPI](https://img.shields.io/pypi/v/synthetic.svg)](https://pypi.org/project/synthetic/)"
+            " [![License: MIT](https://img.shields.io/badge/License-MIT-yellow.svg)](LICENSE)\n",
+            "A synthetic project for benchmarks. " + "Lorem ipsum dolor sit amet. " * 8 + "\n",
+            "## Installation\n\n```bash\npip install synthetic\n```\n",
+        ]
+        section = 1
+        while sum(map(len, parts)) < size:
+            parts.append(f"## Section {section}\n\n" + "Lorem ipsum dolor sit amet. " * 20 + "\n")
+            section += 1
+        return "\n".join(parts)[:size]
+
+    @property
+    def main_repo(self) -> str:
+        return f"{self.login}/big-repo"
+
+    def repo_names(self) -> list:
+        return [self.main_repo] + [f"{self.login}/small-{i}" for i in range(self.repos - 1)]
+
+    def commit_count(self, repo: str) -> int:
+        return self.commits + self.pushed if repo == self.main_repo else 40
+
+    def push(self, commits: int = 3, change_files: bool = True):
+        """Land new commits on the big repository, like a day of work does."""
+        self.pushed += commits
+        self.tree_version += change_files
+
+    def sha(self, repo: str, index: int) -> str:
+        """Sha of the `index`-th newest commit; shas are commit numbers, so they stay put across pushes."""
+        return f"{self.commit_count(repo) - 1 - index:040x}"
+
+    def index_of(self, repo: str, ref: str) -> int:
+        """Position (0 = head) of a commit sha; anything else is taken for the branch, i.e. the head."""
+        try:
+            return self.commit_count(repo) - 1 - int(ref, 16) if len(ref) == 40 else 0
+        except ValueError:
+            return 0
+
+    def tree_sha(self, repo: str, prefix: str = "") -> str:
+        return hashlib.sha1(f"{repo}:{prefix}:{self.tree_version}".encode("utf-8")).hexdigest()
+
+    def blob_sha(self, path: str) -> str:
+        text = {"README.md": self.readme, "LICENSE": self.license}.get(path)
+        return hashlib.sha1(text.encode("utf-8")).hexdigest() if text is not None else "b" * 40
+
+    def timestamp(self, seconds_ago: int) -> str:
+        return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.epoch - seconds_ago))
+
+    def commit(self, base: str, repo: str, index: int) -> dict:
+        sha = self.sha(repo, index)
+        number = int(sha, 16)
+        return {
+            "sha": sha,
+            "url": f"{base}/repos/{repo}/commits/{sha}",
+            "commit": {
+                "message": f"{['fix', 'feat', 'chore', 'wip'][number % 4]}: change number {number}\n\n" + "details " * (number % 20),
+                "author": {"name": self.login, "email": f"{self.login}@example.com", "date": self.timestamp((index - self.pushed) * 3600)},
+                "tree": {"sha": self.tree_sha(repo)},
+            },
+            "author": {"login": self.login, "id": 1},
+        }
+
+    def paths(self) -> list:
+        if self._paths is None:
+            self._paths = ["README.md", "LICENSE", ".github/workflows/ci.yml"] + [
+                f"pkg{i % 25}/mod{(i // 25) % 8}/file{i}{self.EXTENSIONS[i % len(self.EXTENSIONS)]}"
+                for i in range(max(self.tree_entries - 3, 0))
+            ]
+        return self._paths
+
+    def tree(self, prefix: str, recursive: bool):
+        """Entries under `prefix` ("" for the root), like the git trees API lists them."""
+        entries = {}
+        start = f"{prefix}/" if prefix else ""
+        for path in self.paths():
+            if not path.startswith(start):
+                continue
+            parts = path[len(start):].split("/")
+            for depth in range(1, len(parts)):
+                if not recursive and depth > 1:
+                    break
+                directory = "/".join(parts[:depth])
+                entries.setdefault(directory, {"path": directory, "mode": "040000", "type": "tree", "sha": f"tree:{start}{directory}"})
+            if recursive or len(parts) == 1:
+                entries[path[len(start):]] = {"path": path[len(start):], "mode": "100644", "type": "blob", "sha": self.blob_sha(path), "size": 1200}
+        return list(entries.values())
+
+    def event(self, index: int) -> dict:
+        kind = ["PushEvent", "WatchEvent", "IssuesEvent", "PullRequestEvent", "CreateEvent"][index % 5]
+        repo = self.repo_names()[index % self.repos]
+        payloads = {
+            "PushEvent": {"ref": "refs/heads/main", "size": 2, "commits": [{"message": f"push {index} commit {n}"} for n in range(2)]},
+            "WatchEvent": {"action": "started", "repo": {"name": repo}},
+            "IssuesEvent": {"action": "opened", "issue": {"title": f"Issue {index}", "state": "open", "html_url": f"https://github.com/{repo}/issues/{index}"}},
+            "PullRequestEvent": {"action": "opened", "pull_request": {"title": f"PR {index}", "number": index, "state": "open", "html_url": f"https://github.com/{repo}/pull/{index}"}},
+            "CreateEvent": {"ref_type": "branch", "ref": f"feature-{index}"},
+        }
+        return {
+            "id": str(10 ** 10 - index),
+            "type": kind,
+            "actor": {"login": self.login},
+            "repo": {"name": repo},
+            "payload": payloads[kind],
+            "public": True,
+            "created_at": self.timestamp(index * 1800),
+        }
+
+
+class FakeGitHubHandler(StandInHandler):
+    """The slice of the GitHub REST and GraphQL APIs that Git-Roaster uses, over a SyntheticGitHub.
+
+    Every request is counted per route in `server.route_counts`, responses carry ETags and
+    rate limit headers, and `latency` seconds are added to every response.
+    """
+
+    ROUTES = [
+        ("user", r"/user"),
+        ("user", r"/users/(?P<login>[^/]+)"),
+        ("events", r"/users/(?P<login>[^/]+)/events(?:/public)?"),
+        ("user_repos", r"/users/(?P<login>[^/]+)/repos"),
+        ("repo", r"/repos/(?P<repo>[^/]+/[^/]+)"),
+        ("commits", r"/repos/(?P<repo>[^/]+/[^/]+)/commits"),
+        ("commit", r"/repos/(?P<repo>[^/]+/[^/]+)/commits/(?P<sha>[^/]+)"),
+        ("branches", r"/repos/(?P<repo>[^/]+/[^/]+)/branches"),
+        ("branch", r"/repos/(?P<repo>[^/]+/[^/]+)/branches/(?P<branch>[^/]+)"),
+        ("compare", r"/repos/(?P<repo>[^/]+/[^/]+)/compare/(?P<base>[^.]+)\.\.\.(?P<head>[^/]+)"),
+        ("readme", r"/repos/(?P<repo>[^/]+/[^/]+)/readme"),
+        ("license", r"/repos/(?P<repo>[^/]+/[^/]+)/license"),
+        ("languages", r"/repos/(?P<repo>[^/]+/[^/]+)/languages"),
+        ("tree", r"/repos/(?P<repo>[^/]+/[^/]+)/git/trees/(?P<sha>.+)"),
+    ]
+
+    @property
+    def data(self) -> SyntheticGitHub:
+        return self.server.data
+
+    @property
+    def base(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}{self.server.api_prefix}"
+
+    def count_route(self, route: str):
+        with self.server.lock:
+            self.server.route_counts[route] = self.server.route_counts.get(route, 0) + 1
+
+    def send_api(self, obj, status=200, link=None, extra_headers=None):
+        body = json.dumps(obj).encode("utf-8")
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        headers = {
+            "ETag": etag,
+            "Cache-Control": "private, max-age=60, s-maxage=60",
+            "X-RateLimit-Limit": "5000",
+            "X-RateLimit-Remaining": "4999",
+            "X-RateLimit-Reset": str(int(time.time()) + 3600),
+            "X-RateLimit-Resource": "core",
+        }
+        if link:
+            headers["Link"] = link
+        headers.update(extra_headers or {})
+        time.sleep(getattr(self.server, "latency", 0))
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_json(obj, status=status, headers=headers)
+
+    def send_raw(self, body: bytes):
+        """A file in the raw media type, honouring a `Range: bytes=start-end` request like GitHub's CDN does.
+
+        The ETag is the whole file's, so a conditional ranged request gets a 304 while it's unchanged.
+        """
+        time.sleep(getattr(self.server, "latency", 0))
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        status, total = 200, len(body)
+        if match:
+            start, end = int(match.group(1)), int(match.group(2) or total - 1)
+            body, status = body[start:end + 1], 206
+            content_range = f"bytes {start}-{start + len(body) - 1}/{total}"
+        self.send_response(status)
+        self.send_header("Content-Type", "application/vnd.github.raw")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "private, max-age=60, s-maxage=60")
+        if status == 206:
+            self.send_header("Content-Range", content_range)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def not_found(self):
+        self.send_api({"message": "Not Found", "documentation_url": "https://docs.github.com/rest"}, status=404)
+
+    def page(self, items: list, query: dict, path: str, extra_headers=None):
+        per_page = int(query.get("per_page", ["30"])[0])
+        page = int(query.get("page", ["1"])[0])
+        chunk = items[(page - 1) * per_page:page * per_page]
+        last = max((len(items) + per_page - 1) // per_page, 1)
+        link = None
+        if page < last:
+            params = {key: values[0] for key, values in query.items()}
+            links = []
+            for rel, number in (("next", page + 1), ("last", last)):
+                params["page"] = str(number)
+                links.append(f'<{self.base}{path}?{urlencode(params)}>; rel="{rel}"')
+            link = ", ".join(links)
+        self.send_api(chunk, link=link, extra_headers=extra_headers)
+
+    def do_GET(self):
+        self.count_request()
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        prefix = self.server.api_prefix
+        path = url.path[len(prefix):] if url.path.startswith(prefix) else None
+        for route, pattern in self.ROUTES:
+            match = path is not None and re.fullmatch(pattern, path)
+            if match:
+                self.count_route(f"GET {route}")
+                return getattr(self, f"get_{route}")(query=query, path=path, **match.groupdict())
+        self.count_route("GET unknown")
+        self.not_found()
+
+    def get_user(self, login=None, **_):
+        login = login or self.data.login
+        if login != self.data.login:
+            return self.not_found()
+        self.send_api({
+            "login": login, "id": 1, "type": "User", "name": "Octo Cat", "bio": "Synthetic benchmark user",
+            "public_repos": self.data.repos, "url": f"{self.base}/users/{login}",
+        })
+
+    def get_events(self, login, query, path):
+        if login != self.data.login:
+            return self.not_found()
+        self.page(
+            [self.data.event(i) for i in range(self.data.events)], query, path,
+            extra_headers={"X-Poll-Interval": "60"}
+        )
+
+    def repository(self, name: str) -> dict:
+        index = self.data.repo_names().index(name) if name in self.data.repo_names() else 0
+        return {
+            "id": 1000 + index, "name": name.split("/", 1)[1], "full_name": name, "private": False,
+            "owner": {"login": self.data.login, "id": 1}, "description": f"Synthetic repository {name}",
+            "default_branch": "main", "stargazers_count": 42 + index, "forks_count": 7,
+            "url": f"{self.base}/repos/{name}", "pushed_at": self.data.timestamp(index * 86400),
+            "updated_at": self.data.timestamp(index * 86400), "created_at": self.data.timestamp(10 ** 7),
+            "license": {"key": "mit", "name": "MIT License", "spdx_id": "MIT", "url": f"{self.base}/licenses/mit"},
+        }
+
+    def known_repo(self, repo: str) -> bool:
+        return repo in self.data.repo_names() or repo == f"{self.data.login}/{self.data.login}"
+
+    def get_user_repos(self, login, query, path):
+        if login != self.data.login:
+            return self.not_found()
+        self.page([self.repository(name) for name in self.data.repo_names()], query, path)
+
+    def get_repo(self, repo, **_):
+        if not self.known_repo(repo):
+            return self.not_found()
+        self.send_api(self.repository(repo))
+
+    def get_commits(self, repo, query, path):
+        if not self.known_repo(repo):
+            return self.not_found()
+        start = self.data.index_of(repo, query.get("sha", [""])[0])
+        commits = [self.data.commit(self.base, repo, index) for index in range(start, self.data.commit_count(repo))]
+        self.page(commits, query, path)
+
+    def get_commit(self, repo, sha, **_):
+        commit = self.data.commit(self.base, repo, self.data.index_of(repo, sha))
+        commit["stats"] = {"total": 12, "additions": 8, "deletions": 4}
+        commit["files"] = [{"filename": f"file{n}.py", "additions": 4, "deletions": 2, "changes": 6, "status": "modified"} for n in range(2)]
+        self.send_api(commit)
+
+    def get_branches(self, repo, query, path):
+        self.page([{"name": name, "commit": {"sha": "a" * 40}} for name in ("main", "develop", "feature")], query, path)
+
+    def get_branch(self, repo, branch, **_):
+        if not self.known_repo(repo):
+            return self.not_found()
+        head = self.data.commit(self.base, repo, 0)
+        self.send_api({"name": unquote(branch), "commit": head, "protected": False})
+
+    def get_compare(self, repo, base, head, **_):
+        if not self.known_repo(repo):
+            return self.not_found()
+        base_index, head_index = self.data.index_of(repo, base), self.data.index_of(repo, head)
+        ahead_by, behind_by = max(base_index - head_index, 0), max(head_index - base_index, 0)
+        commits = [self.data.commit(self.base, repo, index) for index in range(base_index - 1, head_index - 1, -1)]
+        self.send_api({
+            "status": "ahead" if ahead_by else "behind" if behind_by else "identical",
+            "ahead_by": ahead_by, "behind_by": behind_by, "total_commits": ahead_by,
+            "commits": commits[:250],
+        })
+
+    def content(self, repo: str, path: str, text: str) -> dict:
+        return {
+            "type": "file", "encoding": "base64", "name": path, "path": path, "sha": self.data.blob_sha(path),
+            "size": len(text), "content": base64.b64encode(text.encode("utf-8")).decode("ascii"),
+            "url": f"{self.base}/repos/{repo}/contents/{path}",
+        }
+
+    def get_readme(self, repo, **_):
+        if "raw" in self.headers.get("Accept", ""):
+            return self.send_raw(self.data.readme.encode("utf-8"))
+        self.send_api(self.content(repo, "README.md", self.data.readme))
+
+    def get_license(self, repo, **_):
+        license_file = self.content(repo, "LICENSE", self.data.license)
+        license_file["license"] = {"key": "mit", "name": "MIT License", "spdx_id": "MIT"}
+        self.send_api(license_file)
+
+    def get_languages(self, repo, **_):
+        self.send_api({"Python": 120000, "JavaScript": 40000, "CSS": 5000})
+
+    def get_tree(self, repo, sha, query, **_):
+        sha = unquote(sha)
+        prefix = sha[len("tree:"):] if sha.startswith("tree:") else ""
+        entries = self.data.tree(prefix, recursive="recursive" in query)
+        truncated = len(entries) > self.data.tree_truncate_at
+        self.send_api({
+            "sha": self.data.tree_sha(repo, prefix),
+            "url": f"{self.base}/repos/{repo}/git/trees/{sha}",
+            "tree": entries[:self.data.tree_truncate_at],
+            "truncated": truncated,
+        })
+
+    def do_POST(self):
+        self.count_request()
+        # GitHub Enterprise serves REST under /api/v3 but GraphQL at /api/graphql.
+        if urlparse(self.path).path != ("/api/graphql" if self.server.api_prefix else "/graphql"):
+            self.count_route("POST unknown")
+            return self.not_found()
+        self.count_route("POST graphql")
+        variables = self.read_json().get("variables") or {}
+        with self.server.lock:
+            self.server.graphql_variables.append(variables)
+        if self.server.graphql_errors:
+            return self.send_api({"data": None, "errors": [{"type": "INTERNAL", "message": "Something went wrong."}]})
+        repo = f"{variables.get('owner')}/{variables.get('name')}"
+        start = int(variables.get("after") or self.data.index_of(repo, variables.get("ref") or ""))
+        end = min(start + int(variables.get("first") or 100), self.data.commit_count(repo))
+        nodes = [
+            {"oid": self.data.sha(repo, index), "additions": 8, "deletions": 4,
+             "changedFilesIfAvailable": None if index in self.data.huge_commits else 2}
+            for index in range(start, end)
+        ]
+        self.send_api({"data": {"repository": {"object": {"history": {
+            "pageInfo": {"hasNextPage": end < self.data.commit_count(repo), "endCursor": str(end)},
+            "nodes": nodes,
+        }}}}})
+
+
+def fake_github_server(
+    data: Optional[SyntheticGitHub] = None,
+    latency: float = 0.0,
+    graphql_errors: bool = False,
+    enterprise: bool = False
+):
+    """The GitHub stand-in. Every GraphQL query's variables are kept in `graphql_variables`; with
+    `graphql_errors`, queries get an error response, as when GraphQL is unavailable. With
+    `enterprise`, the API is laid out like GitHub Enterprise Server's: REST under `/api/v3`."""
+    return StandInServer(
+        FakeGitHubHandler, data=data or SyntheticGitHub(), latency=latency, route_counts={},
+        graphql_errors=graphql_errors, graphql_variables=[], api_prefix="/api/v3" if enterprise else "",
+    )
@@ -0,0 +1,99 @@
+"""CLI startup time: how long `roast --help` takes and what it imports.
+
+Runs the CLI in fresh interpreters (with a throwaway config directory), reports the median
+wall time next to a bare interpreter's and next to one that only imports the CLI framework,
+and lists the slowest imports from `-X importtime`. Exits non-zero when:
+
+- a module that only roasting needs (PyGithub, pydantic, requests, ...) is imported just to
+  print the help, which is what regresses startup;
+- the CLI's own startup, on top of importing typer and typer_shell, goes past `--budget-ms`.
+
+The budget leaves the framework out because typer imports rich's markdown and syntax
+highlighting stack as soon as rich is installed (about 250 ms on a typical machine), and
+nothing this project defers can avoid that. The total overhead is reported all the same.
+
+    python benchmarks/startup.py --runs 10
+    python benchmarks/startup.py -- config --help
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from standins import SRC_DIR
+
+# Only a roast needs these; `--help` and `config` must not import them.
+DEFERRED_MODULES = ("github", "pydantic", "requests", "beartype", "cachetools", "roaster", "services.github_service")
+DEFAULT_BUDGET_MS = 150.0
+# Imported by any typer CLI before a line of ours runs.
+FRAMEWORK_IMPORTS = "import typer, typer_shell"
+
+
+def run(argv: list, env: dict, importtime: bool = False):
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + argv
+    started = time.perf_counter()
+    completed = subprocess.run(command, cwd=SRC_DIR, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise SystemExit(f"{' '.join(argv)} failed:\n{completed.stdout}{completed.stderr}")
+    return elapsed, completed.stderr
+
+
+def parse_importtime(output: str) -> dict:
+    """Cumulative microseconds per module, from `-X importtime` output."""
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Most the CLI may add on top of importing its framework.")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("cli_args", nargs="*", default=["--help"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, HOME=home, XDG_CONFIG_HOME=os.path.join(home, ".config"))
+        argv = ["main.py"] + args.cli_args
+        # Interleaved, so a busy moment on the machine weighs on all three alike.
+        samples = [
+            (run(["-c", "pass"], env)[0], run(["-c", FRAMEWORK_IMPORTS], env)[0], run(argv, env)[0])
+            for _ in range(args.runs)
+        ]
+        baseline, framework, startup = (statistics.median(column) for column in zip(*samples))
+        modules = parse_importtime(run(argv, env, importtime=True)[1])
+
+    own_ms = (startup - framework) * 1000
+    print(f"{'roast ' + ' '.join(args.cli_args):>24}: median {startup * 1000:7.1f} ms")
+    print(f"{'typer + typer_shell':>24}: median {framework * 1000:7.1f} ms")
+    print(f"{'bare interpreter':>24}: median {baseline * 1000:7.1f} ms")
+    print(f"{'total overhead':>24}: {(startup - baseline) * 1000:7.1f} ms")
+    print(f"{'CLI on top of typer':>24}: {own_ms:7.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    # Only top-level modules, their cumulative time already includes what they import.
+    top_level = {name: micros for name, micros in modules.items() if "." not in name and not name.startswith("_")}
+    print(f"\nSlowest imports:")
+    for name, micros in sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{name:>24}: {micros / 1000:7.1f} ms")
+
+    eager = [name for name in DEFERRED_MODULES if name in modules]
+    if eager:
+        print(f"\nFAIL: imported at startup although only roasting needs them: {', '.join(eager)}")
+        sys.exit(1)
+    if own_ms > args.budget_ms:
+        print(f"\nFAIL: the CLI adds {own_ms:.0f} ms to startup, over the {args.budget_ms:.0f} ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
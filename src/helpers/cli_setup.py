@@ -17,7 +17,10 @@ def get_or_create_config():
         "ROAST_DEFAULT_API_KEY": "",
         "ROAST_OPENAI_API_KEY": "",
         "ROAST_OPENAI_BASE_URL": "",
-        "ROAST_GROQ_API_KEY": ""
+        "ROAST_GROQ_API_KEY": "",
+        "ROAST_GITHUB_API_URL": "",
+        "ROAST_PROMPT_TOKEN_BUDGET": 0,
+        "ROAST_HISTORY_SUMMARIZE": False
     }
     try:
         existing_config = load_config()
@@ -124,6 +127,33 @@ def update_base_url(config, value: Optional[str] = None):
     return config
 
 
+def update_token_budget(config, value: Optional[int] = None):
+    """Updates the token budget for the collected data sent in a roast prompt (0 uses the model default)."""
+    if value is None:
+        current = getattr(config, "ROAST_PROMPT_TOKEN_BUDGET", 0)
+        value = input(f"Prompt token budget (0 for the model default) [{current}]: ").strip() or current
+    else:
+        single_print_statement()
+
+    config.ROAST_PROMPT_TOKEN_BUDGET = max(int(value), 0)
+    print(f"✅ Prompt token budget set to {config.ROAST_PROMPT_TOKEN_BUDGET or 'the model default'}.")
+    return config
+
+
+def update_history_summarize(config, value: Optional[bool] = None):
+    """Updates whether old chat turns are summarized by the LLM instead of dropped."""
+    if value is None:
+        current = getattr(config, "ROAST_HISTORY_SUMMARIZE", False)
+        choice = input(f"Summarize old chat turns instead of dropping them? (y/n) [{'y' if current else 'n'}]: ").strip().lower()
+        value = current if not choice else choice.startswith("y")
+    else:
+        single_print_statement()
+
+    config.ROAST_HISTORY_SUMMARIZE = value
+    print(f"✅ Chat history summarization {'enabled' if value else 'disabled'}.")
+    return config
+
+
 def setup_config(config):
     """Runs the full, interactive setup process for all keys."""
     from .settings import Settings
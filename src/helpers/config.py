@@ -4,6 +4,13 @@ import json
 
 APP_NAME = "GitRoaster"
 
+# Commits collected per repository roast unless the command says otherwise.
+DEFAULT_MAX_COMMITS = 200
+
+# `roast serve`: roasts running at once, and roasts allowed to wait before requests get a 503.
+DEFAULT_SERVER_WORKERS = 4
+DEFAULT_SERVER_QUEUE_SIZE = 16
+
 def get_config_path():
     config_dir = get_app_dir(APP_NAME)
     os.makedirs(config_dir, exist_ok=True)
@@ -19,4 +26,10 @@ def save_config(config):
     if not isinstance(config, dict):
         config = config.model_dump()
     with open(get_config_path(), 'w') as f:
-        json.dump(config, f, indent=2)
\ No newline at end of file
+        json.dump(config, f, indent=2)
+
+def get_cache_dir(name: str):
+    """Returns (and creates) a cache directory under the app directory."""
+    cache_dir = os.path.join(get_app_dir(APP_NAME), "cache", name)
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
@@ -0,0 +1,86 @@
+import hashlib
+import os
+import tempfile
+import threading
+from typing import Optional
+
+
+class DiskCache:
+    """A directory of files keyed by string, evicting the least recently used entries by total size."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._total_bytes = sum(size for _, _, size in self._entries())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest())
+
+    def _entries(self):
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.startswith("."):
+                stat = entry.stat()
+                yield entry.path, stat.st_mtime, stat.st_size
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the stored bytes for `key`, or None. A hit marks the entry as recently used."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def set(self, key: str, data: bytes):
+        """Store `data` under `key`, evicting old entries if the cache grows past its size limit."""
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+
+        with self._lock:
+            previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            self._total_bytes += len(data) - previous_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def delete(self, key: str):
+        path = self._path(key)
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                return
+            self._total_bytes -= size
+
+    def clear(self):
+        with self._lock:
+            for path, _, _ in list(self._entries()):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._total_bytes = 0
+
+    def _evict(self):
+        # Drop down to 90% of the limit so eviction doesn't run on every write once full.
+        target = self.max_bytes * 0.9
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        for path, _, size in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        self._total_bytes = total
@@ -9,6 +9,9 @@ class Settings(BaseModel):
     ROAST_OPENAI_BASE_URL: str = ""
     ROAST_GROQ_API_KEY: str = ""
     ROAST_GITHUB_TOKEN: str = ""
+    ROAST_GITHUB_API_URL: str = ""
+    ROAST_PROMPT_TOKEN_BUDGET: int = 0
+    ROAST_HISTORY_SUMMARIZE: bool = False
 
 def get_settings():
     config = load_config()
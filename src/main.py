@@ -1,46 +1,120 @@
-from rich.progress import Progress, SpinnerColumn, TextColumn
+import sys
+import time
+import typer
+from typer_shell import make_typer_shell
+from typing_extensions import Annotated
+from typing import Optional, List
+from datetime import datetime
 from rich import print
-from rich.markdown import Markdown
-from rich.rule import Rule
-
-with Progress(SpinnerColumn(), TextColumn("{task.description}")) as progress:
-    task = progress.add_task("Initializing Git-Roaster...", total=None)
-
-    import typer
-    from typer_shell import make_typer_shell
-    from roaster import GitRoaster
-    from typing_extensions import Annotated
-    from typing import Optional, List
-    from helpers.cli_setup import (
-        ensure_config_exists, setup_config, update_github_token, update_llm_provider, update_api_key, update_model_id, update_base_url, save_config
-    )
+from helpers.config import DEFAULT_MAX_COMMITS, DEFAULT_SERVER_WORKERS, DEFAULT_SERVER_QUEUE_SIZE
+from services.batch_runner import DEFAULT_COLLECT_WORKERS, DEFAULT_GENERATE_WORKERS
+from helpers.cli_setup import (
+    ensure_config_exists, setup_config, update_github_token, update_llm_provider, update_api_key, update_model_id, update_base_url, update_token_budget, update_history_summarize, save_config
+)
 
-    ensure_config_exists()
-    roaster = GitRoaster()
+# Everything heavy (PyGithub, pydantic, requests, the LLM client) is imported when a command
+# first needs it, so `--help` and `config` start without paying for it.
 
+app = make_typer_shell(
+    prompt="git-roaster >> ",
+    intro="Review your Github repo or user profile in a unique, funny, and sarcastic way (type 'exit' or 'quit' to exit interactive mode)."
+)
+
+_roaster = None
+
+
+def get_roaster():
+    """Create the GitRoaster on first use; the interactive shell then keeps reusing it."""
+    global _roaster
+    if _roaster is None:
+        from roaster import GitRoaster
+        ensure_config_exists()
+        _roaster = GitRoaster()
+    return _roaster
+
+
+DATE_FORMATS = ["%Y-%m-%d", "%Y-%m-%dT%H:%M:%S"]
+
+
+# Re-parsing the whole markdown on every token is wasteful, a few frames per second is plenty.
+RENDER_PER_SECOND = 8
+
+
+def render_stream(chunks) -> str:
+    """Render streamed markdown progressively as it arrives, return the assembled text."""
+    from rich.live import Live
+    from rich.markdown import Markdown
+    from rich.spinner import Spinner
+
+    text = ""
+    last_render = 0.0
+    with Live(
+        Spinner("dots", text="Waiting for the roast..."),
+        refresh_per_second=RENDER_PER_SECOND,
+        vertical_overflow="visible",
+    ) as live:
+        for chunk in chunks:
+            text += chunk
+            now = time.monotonic()
+            if now - last_render >= 1 / RENDER_PER_SECOND:
+                live.update(Markdown(text))
+                last_render = now
+        live.update(Markdown(text))
+    return text
+
+
+def print_profile(tracer, wall_seconds: float):
+    """Print where a roast's time went, span by span, with the HTTP traffic inside each."""
+    from rich.table import Table
+
+    table = Table(title=f"Profile ({wall_seconds:.2f}s wall time)", title_justify="left")
+    for column in ("Span", "Kind", "Calls", "Total (s)", "Avg (ms)", "HTTP", "Cached", "KB"):
+        table.add_column(column, justify="left" if column in ("Span", "Kind") else "right")
+    for row in tracer.summary():
+        table.add_row(
+            row["name"] + (f" [red]({row['errors']} failed)[/red]" if row["errors"] else ""),
+            row["category"],
+            str(row["count"]),
+            f"{row['seconds']:.2f}",
+            f"{row['seconds'] / row['count'] * 1000:.0f}",
+            str(row["http_calls"]),
+            str(row["cache_hits"]),
+            f"{row['bytes'] / 1024:.1f}",
+        )
+    totals = tracer.totals()
+    table.add_section()
+    table.add_row("all HTTP requests", "", "", "", "", str(totals["http_calls"]), str(totals["cache_hits"]), f"{totals['bytes'] / 1024:.1f}")
+    print(table)
+    print("[dim]Spans run in parallel and nest, so their totals add up to more than the wall time.[/dim]")
 
-    app = make_typer_shell(
-        prompt="git-roaster >> ",
-        intro="Review your Github repo or user profile in a unique, funny, and sarcastic way (type 'exit' or 'quit' to exit interactive mode)."
-    )
 
-    progress.update(task, description="Initialization complete!", completed=1)
+def with_spinner(task_name: str, method: str, *args, profile: bool = False, trace_out: Optional[str] = None, **kwargs):
+    """Run a GitRoaster method with a spinner while data is collected, then stream its reply to the terminal.
 
+    With `profile`, a timing table is printed afterwards; with `trace_out`, a Chrome trace is written there.
+    """
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from rich.rule import Rule
+    from services.tracing import tracer
 
-def with_spinner(task_name: str, fn, *args):
-    """Run a function with a spinner, return its result."""
+    if profile or trace_out:
+        tracer.enable()
+    started = time.perf_counter()
     try:
         with Progress(SpinnerColumn(), TextColumn("{task.description}")) as progress:
-            task = progress.add_task(task_name, total=None)
-            result = fn(*args)
+            task = progress.add_task("Initializing Git-Roaster..." if _roaster is None else task_name, total=None)
+            roaster = get_roaster()
+            progress.update(task, description=task_name)
+            chunks = getattr(roaster, method)(*args, stream=True, **kwargs)
             progress.update(task, description="Done!", completed=1)
         
         print()
-        try:
-            print(Markdown(result))
-        except Exception:
-            print(result)
+        result = render_stream(chunks)
         print("\n")
+        if roaster.last_from_cache:
+            print("[dim]Served from the result cache (use --refresh for a fresh roast)[/dim]")
+        elif roaster.last_prompt_tokens:
+            print(f"[dim]Prompt size: ~{roaster.last_prompt_tokens} tokens[/dim]")
         print(Rule(style="dim white"))
         print()
         return result
@@ -50,21 +124,72 @@ def with_spinner(task_name: str, fn, *args):
     except Exception as e:
         print(f":x: [bold red]An unexpected error occurred:[/bold red] {e}")
         raise typer.Exit(code=1)
+    finally:
+        if tracer.enabled:
+            tracer.disable()
+            if profile:
+                print_profile(tracer, time.perf_counter() - started)
+            if trace_out:
+                tracer.write_chrome_trace(trace_out)
+                print(f"[dim]Trace written to {trace_out} (open it in chrome://tracing or ui.perfetto.dev)[/dim]")
 
 
 @app.command(help="Roast a GitHub repository.")
 def repo(
     repo_full_name: Annotated[
-        str,
-        typer.Argument(..., help="The full name of the repository (e.g., 'AbdoAlshoki2/Git-Roaster').")
-    ],
+        Optional[str],
+        typer.Argument(..., help="The full name of the repository (e.g., 'AbdoAlshoki2/Git-Roaster'). Optional with --path.")
+    ] = None,
     branch: Annotated[
         Optional[str],
         typer.Option("--branch", "-b", help="The branch to roast. Defaults to the repository's default branch.")
-    ] = None
+    ] = None,
+    since: Annotated[
+        Optional[datetime],
+        typer.Option("--since", help="Only consider commits made after this date.", formats=DATE_FORMATS)
+    ] = None,
+    until: Annotated[
+        Optional[datetime],
+        typer.Option("--until", help="Only consider commits made before this date.", formats=DATE_FORMATS)
+    ] = None,
+    max_commits: Annotated[
+        int,
+        typer.Option("--max-commits", help="Maximum number of commits to collect (0 for no limit).", min=0)
+    ] = DEFAULT_MAX_COMMITS,
+    no_cache: Annotated[
+        bool,
+        typer.Option("--no-cache", help="Don't read or store the roast in the result cache.")
+    ] = False,
+    refresh: Annotated[
+        bool,
+        typer.Option("--refresh", help="Generate a fresh roast even if an identical one is cached.")
+    ] = False,
+    profile: Annotated[
+        bool,
+        typer.Option("--profile", help="Print where the time went: GitHub calls, cache hits, the LLM.")
+    ] = False,
+    trace_out: Annotated[
+        Optional[str],
+        typer.Option("--trace-out", help="Write a Chrome trace (JSON) of the roast to this file.")
+    ] = None,
+    path: Annotated[
+        Optional[str],
+        typer.Option("--path", help="Roast the local git repository at this path instead, offline.")
+    ] = None,
+    clone: Annotated[
+        bool,
+        typer.Option("--clone", help="Read history and files from a partial clone instead of the API (faster for big repos).")
+    ] = False,
+    full: Annotated[
+        bool,
+        typer.Option("--full", help="Collect everything from scratch instead of updating the stored snapshot.")
+    ] = False
 ):
     """Roasts a GitHub repository based on its full name."""
-    with_spinner("Collecting & roasting repo data...", roaster.roast_repo, repo_full_name, branch)
+    with_spinner(
+        "Collecting & roasting repo data...", "roast_repo", repo_full_name, branch, since, until, max_commits,
+        use_cache=not no_cache, refresh=refresh, profile=profile, trace_out=trace_out, path=path, clone=clone, full=full
+    )
 
 
 @app.command(help="Roast a GitHub user.")
@@ -72,16 +197,167 @@ def user(
     username: Annotated[
         Optional[str],
         typer.Argument(..., help="The username of the GitHub user.")
+    ] = None,
+    since: Annotated[
+        Optional[datetime],
+        typer.Option("--since", help="Only consider activity after this date.", formats=DATE_FORMATS)
+    ] = None,
+    no_cache: Annotated[
+        bool,
+        typer.Option("--no-cache", help="Don't read or store the roast in the result cache.")
+    ] = False,
+    refresh: Annotated[
+        bool,
+        typer.Option("--refresh", help="Generate a fresh roast even if an identical one is cached.")
+    ] = False,
+    profile: Annotated[
+        bool,
+        typer.Option("--profile", help="Print where the time went: GitHub calls, cache hits, the LLM.")
+    ] = False,
+    trace_out: Annotated[
+        Optional[str],
+        typer.Option("--trace-out", help="Write a Chrome trace (JSON) of the roast to this file.")
     ] = None
 ):
     """Roasts a GitHub user based on their username."""
-    with_spinner("Collecting & roasting user data...", roaster.roast_user, username)
+    with_spinner(
+        "Collecting & roasting user data...", "roast_user", username, since, use_cache=not no_cache, refresh=refresh,
+        profile=profile, trace_out=trace_out
+    )
+
+
+@app.command(help="Roast many repositories and users listed in a file ('-' for stdin), writing the roasts as JSONL.")
+def batch(
+    targets_file: Annotated[
+        str,
+        typer.Argument(..., help="File with one target per line: 'repo owner/name', 'user login' or a bare name.")
+    ],
+    output: Annotated[
+        str,
+        typer.Option("--output", "-o", help="JSONL file the results are appended to.")
+    ] = "roasts.jsonl",
+    collect_workers: Annotated[
+        int,
+        typer.Option("--collect-workers", help="Targets whose GitHub data is collected at the same time.", min=1)
+    ] = DEFAULT_COLLECT_WORKERS,
+    generate_workers: Annotated[
+        int,
+        typer.Option("--generate-workers", help="Roasts generated by the LLM at the same time.", min=1)
+    ] = DEFAULT_GENERATE_WORKERS,
+    max_commits: Annotated[
+        int,
+        typer.Option("--max-commits", help="Maximum number of commits to collect per repository (0 for no limit).", min=0)
+    ] = DEFAULT_MAX_COMMITS,
+    resume: Annotated[
+        bool,
+        typer.Option("--resume/--no-resume", help="Skip targets already roasted in the output file, or start it over.")
+    ] = True,
+    no_cache: Annotated[
+        bool,
+        typer.Option("--no-cache", help="Don't read or store the roasts in the result cache.")
+    ] = False,
+    refresh: Annotated[
+        bool,
+        typer.Option("--refresh", help="Generate fresh roasts even if identical ones are cached.")
+    ] = False
+):
+    """Roasts every target of a file, collecting and generating in parallel."""
+    from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, MofNCompleteColumn, TimeElapsedColumn
+    from services.batch_runner import BatchRunner, parse_targets
+
+    try:
+        if targets_file == "-":
+            targets = parse_targets(sys.stdin)
+        else:
+            with open(targets_file, encoding="utf-8") as f:
+                targets = parse_targets(f)
+    except (OSError, ValueError) as e:
+        print(f":x: [bold red]Error:[/bold red] {e}")
+        raise typer.Exit(code=1)
+
+    with Progress(
+        SpinnerColumn(), TextColumn("{task.description}"), BarColumn(), MofNCompleteColumn(), TimeElapsedColumn()
+    ) as progress:
+        task = progress.add_task("Initializing Git-Roaster...", total=len(targets))
+        try:
+            runner = BatchRunner(
+                get_roaster(), collect_workers=collect_workers, generate_workers=generate_workers,
+                max_commits=max_commits, use_cache=not no_cache, refresh=refresh
+            )
+        except (ConnectionError, ValueError) as e:
+            print(f":x: [bold red]Error:[/bold red] {e}")
+            raise typer.Exit(code=1)
+        progress.update(task, description="Roasting...")
+
+        def on_result(record, stats):
+            if record["status"] != "ok":
+                progress.console.print(f":x: [red]{record['kind']} {record['target']}:[/red] {record['error']}")
+            progress.update(
+                task, completed=stats.skipped + stats.done,
+                description=f"Roasting... {stats.per_minute:.1f}/min, {stats.failed} failed"
+            )
+
+        stats = runner.run(targets, output, resume=resume, on_result=on_result)
+        progress.update(task, completed=stats.skipped + stats.done)
+
+    print(
+        f"Roasted {stats.succeeded} ({stats.cached} from cache), {stats.failed} failed, {stats.skipped} already done "
+        f"in {stats.elapsed:.1f}s ({stats.per_minute:.1f} targets/min). Results in [bold]{output}[/bold]."
+    )
+    if stats.done:
+        print(
+            f"[dim]Average per target: collection {stats.collect_seconds / stats.done:.1f}s, "
+            f"generation {stats.generate_seconds / max(stats.succeeded, 1):.1f}s[/dim]"
+        )
+    if stats.failed:
+        raise typer.Exit(code=1)
+
+
+@app.command(help="Serve roasts over an HTTP API, keeping caches and connections warm between requests.")
+def serve(
+    host: Annotated[
+        str,
+        typer.Option("--host", help="Address to listen on.")
+    ] = "127.0.0.1",
+    port: Annotated[
+        int,
+        typer.Option("--port", "-p", help="Port to listen on.")
+    ] = 8080,
+    workers: Annotated[
+        int,
+        typer.Option("--workers", help="Roasts running at the same time.", min=1)
+    ] = DEFAULT_SERVER_WORKERS,
+    queue_size: Annotated[
+        int,
+        typer.Option("--queue-size", help="Roasts allowed to wait for a worker; past that, requests get a 503.", min=1)
+    ] = DEFAULT_SERVER_QUEUE_SIZE,
+    allow_clone: Annotated[
+        bool,
+        typer.Option("--allow-clone", help="Let clients roast repos from a partial clone kept on this machine.")
+    ] = False
+):
+    """Runs the HTTP API until interrupted."""
+    from services.roast_server import RoastServer
+
+    try:
+        server = RoastServer((host, port), get_roaster(), workers=workers, queue_size=queue_size, allow_clone=allow_clone)
+    except (ConnectionError, ValueError, OSError) as e:
+        print(f":x: [bold red]Error:[/bold red] {e}")
+        raise typer.Exit(code=1)
+    print(f"Serving roasts on [bold]{server.url}[/bold] with {workers} workers (Ctrl+C to stop)")
+    print("[dim]POST /roast/repo, POST /roast/user, POST /chat, DELETE /sessions/<id>, GET /health[/dim]")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
 
 
 @app.command(name="msg")
 def user_message(message: List[str]):
     prompt = " ".join(message)
-    with_spinner("Generating response...", roaster.normal_chat, prompt)
+    with_spinner("Generating response...", "normal_chat", prompt)
 
 @app.command(help="Configure Git-Roaster settings.")
 def config(
@@ -105,9 +381,20 @@ def config(
         Optional[str],
         typer.Option("--set-base-url", help="Set the base URL for OpenAI.")
     ] = None,
+    token_budget: Annotated[
+        Optional[int],
+        typer.Option("--set-token-budget", help="Set the token budget for the data in a roast prompt (0 for the model default).", min=0)
+    ] = None,
+    history_summarize: Annotated[
+        Optional[bool],
+        typer.Option("--set-history-summarize/--unset-history-summarize", help="Summarize old chat turns with the LLM instead of dropping them.")
+    ] = None,
 ):
-    """Run the configuration setup and reload the roaster instance."""
-    settings = roaster.settings
+    """Run the configuration setup and reload the roaster instance, if one is running."""
+    from helpers.settings import get_settings
+
+    ensure_config_exists()
+    settings = get_settings()
     if github_token:
         settings = update_github_token(settings, github_token)
     if llm_provider:
@@ -118,13 +405,18 @@ def config(
         settings = update_model_id(settings, model_id)
     if base_url:
         settings = update_base_url(settings, base_url)
+    if token_budget is not None:
+        settings = update_token_budget(settings, token_budget)
+    if history_summarize is not None:
+        settings = update_history_summarize(settings, history_summarize)
     
-    if any([github_token, llm_provider, api_key, model_id, base_url]):
+    if any([github_token, llm_provider, api_key, model_id, base_url, token_budget is not None, history_summarize is not None]):
         save_config(settings)
     else:
         setup_config(settings.model_dump())
 
-    roaster.reload_config()
+    if _roaster is not None:
+        _roaster.reload_config()
 
 
 if __name__ == "__main__":
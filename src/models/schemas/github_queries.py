@@ -0,0 +1,14 @@
+COMMIT_STATS_QUERY = """
+query($owner: String!, $name: String!, $ref: String!, $first: Int!, $after: String, $since: GitTimestamp, $until: GitTimestamp) {
+  repository(owner: $owner, name: $name) {
+    object(expression: $ref) {
+      ... on Commit {
+        history(first: $first, after: $after, since: $since, until: $until) {
+          pageInfo { hasNextPage endCursor }
+          nodes { oid additions deletions changedFilesIfAvailable }
+        }
+      }
+    }
+  }
+}
+"""
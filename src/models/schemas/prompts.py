@@ -46,3 +46,19 @@ USER_MESSAGE_PROMPT = Template(
         "Respond in your sarcastic GitHub Roaster persona."
     ])
 )
+
+HISTORY_SUMMARY_PROMPT = Template(
+    "\n".join([
+        "Summarize this earlier part of a GitHub roasting conversation in at most 150 words.",
+        "Keep the names of the repos and users that were roasted and the main points made about them.",
+        "",
+        "$conversation"
+    ])
+)
+
+DATA_DIGEST_PROMPT = Template(
+    "\n".join([
+        "[Earlier GitHub data, reduced to a digest to save space]",
+        "$digest"
+    ])
+)
@@ -1,37 +1,82 @@
-import json
+import os
+from datetime import datetime
 from typing import Optional
 
 from helpers.settings import get_settings, Settings
+from helpers.config import get_cache_dir
+from helpers.disk_cache import DiskCache
 from models.enums.LLMEnum import LLMEnum
 from services.llm_service import LLMService
-from models.schemas.prompts import REPO_REVIEW_PROMPT, USER_REVIEW_PROMPT, USER_MESSAGE_PROMPT, SYSTEM_PROMPT
-from services.data_builder import build_repo_data, build_user_data
+from models.schemas.prompts import (
+    REPO_REVIEW_PROMPT, USER_REVIEW_PROMPT, USER_MESSAGE_PROMPT, SYSTEM_PROMPT, HISTORY_SUMMARY_PROMPT, DATA_DIGEST_PROMPT
+)
+from services.data_builder import build_repo_data, build_repo_data_incremental, build_local_repo_data, build_user_data, DEFAULT_MAX_COMMITS
 from services.github_service import GitHubService
+from services.local_repo import LocalRepository
+from services.snapshot_store import SnapshotStore
+from services.http_cache import HTTP_CACHE_MAX_BYTES
+from services.result_cache import ResultCache, RESULT_CACHE_MAX_BYTES
+from services.event_ingestor import EVENT_CACHE_MAX_BYTES
+from services.commit_digest import digest_activities
+from services.prompt_builder import fit_to_budget, resolve_token_budget, estimate_tokens, describe_data
+from services.history_manager import ChatHistory, HISTORY_HEADROOM_TOKENS
+from services.tracing import traced
 
 
 class GitRoaster:
 
     def __init__(self, settings: Settings = None):
         self.settings = settings or get_settings()
-        self.github_service = GitHubService(self.settings.ROAST_GITHUB_TOKEN)
+        self.http_cache = DiskCache(get_cache_dir("http"), HTTP_CACHE_MAX_BYTES)
+        self.result_cache = ResultCache(DiskCache(get_cache_dir("results"), RESULT_CACHE_MAX_BYTES))
+        self.event_cache = DiskCache(get_cache_dir("events"), EVENT_CACHE_MAX_BYTES)
+        self.snapshots = SnapshotStore(os.path.join(get_cache_dir("snapshots"), "repos.sqlite3"))
+        self.github_service = self._new_github_service(self.settings)
         self.llm_service = LLMService(self.settings)
         self.llm_service.set_model(self.settings.ROAST_LLM_MODEL_ID)
-        self.chat_history = [
-            self.llm_service.construct_prompt(SYSTEM_PROMPT.substitute(), LLMEnum.SYSTEM.value)
-        ]
+        self.chat_history = self._new_history()
+        self.last_timings = {}
+        self.last_prompt_tokens = None
+        self.last_from_cache = False
+
+    def _new_github_service(self, settings: Settings) -> GitHubService:
+        # An empty API URL means github.com; anything else is a GitHub Enterprise (or stand-in) server.
+        return GitHubService(
+            settings.ROAST_GITHUB_TOKEN, base_url=settings.ROAST_GITHUB_API_URL or None,
+            http_cache=self.http_cache, event_cache=self.event_cache
+        )
+
+    def _history_token_cap(self) -> int:
+        budget = resolve_token_budget(self.settings.ROAST_LLM_MODEL_ID, self.settings.ROAST_PROMPT_TOKEN_BUDGET)
+        return budget + HISTORY_HEADROOM_TOKENS
+
+    def _new_history(self) -> ChatHistory:
+        return ChatHistory(
+            self.llm_service.construct_prompt(SYSTEM_PROMPT.substitute(), LLMEnum.SYSTEM.value),
+            token_cap=self._history_token_cap(),
+            summarizer=self._summarize_turns if self.settings.ROAST_HISTORY_SUMMARIZE else None,
+        )
+
+    def _summarize_turns(self, messages: list) -> str:
+        """Condense old chat turns into a short summary with one extra LLM call."""
+        conversation = "\n\n".join(f"{message['role']}: {message['content']}" for message in messages)
+        prompt = HISTORY_SUMMARY_PROMPT.substitute(conversation=conversation)
+        return self.llm_service.generate_text(
+            messages=[self.llm_service.construct_prompt(prompt, LLMEnum.USER.value)]
+        )
     
-    def _append_to_history(self, role, content):
-        """Append message to history and enforce max size."""
-        self.chat_history.append(
-            self.llm_service.construct_prompt(content, role)
+    def _append_to_history(self, role, content, summary: Optional[str] = None, history: Optional[ChatHistory] = None):
+        """Append message to history (the shared one by default) and enforce max size."""
+        (history if history is not None else self.chat_history).append(
+            self.llm_service.construct_prompt(content, role), summary=summary
         )
     
     def reload_config(self):
         """Reloads configuration and re-initializes services if settings have changed."""
         new_settings = get_settings()
 
-        if self.settings.ROAST_GITHUB_TOKEN != new_settings.ROAST_GITHUB_TOKEN:
-            self.github_service = GitHubService(new_settings.ROAST_GITHUB_TOKEN)
+        if (self.settings.ROAST_GITHUB_TOKEN, self.settings.ROAST_GITHUB_API_URL) != (new_settings.ROAST_GITHUB_TOKEN, new_settings.ROAST_GITHUB_API_URL):
+            self.github_service = self._new_github_service(new_settings)
 
         llm_settings_changed = any([
             self.settings.ROAST_LLM_PROVIDER != new_settings.ROAST_LLM_PROVIDER,
@@ -41,58 +86,274 @@ class GitRoaster:
         ])
 
         if llm_settings_changed:
-            self.llm_service = LLMService(new_settings)
+            self.llm_service.reconfigure(new_settings)
             self.llm_service.set_model(new_settings.ROAST_LLM_MODEL_ID)
 
-            self.chat_history = [
-                self.llm_service.construct_prompt(SYSTEM_PROMPT.substitute(), LLMEnum.SYSTEM.value)
-            ] if new_settings.ROAST_LLM_PROVIDER != self.settings.ROAST_LLM_PROVIDER else self.chat_history
-
+        provider_changed = new_settings.ROAST_LLM_PROVIDER != self.settings.ROAST_LLM_PROVIDER
         self.settings = new_settings
+        if provider_changed:
+            self.chat_history = self._new_history()
+        else:
+            self.chat_history.token_cap = self._history_token_cap()
+            self.chat_history.summarizer = self._summarize_turns if new_settings.ROAST_HISTORY_SUMMARIZE else None
+
+
+    def _result_key(self, content: str) -> str:
+        return ResultCache.key(
+            self.llm_service.provider, self.llm_service.model_id, self.chat_history.system_message["content"], content
+        )
+
+    def _generate_review(
+        self,
+        content: str,
+        stream: bool = False,
+        summary: Optional[str] = None,
+        use_cache: bool = False,
+        refresh: bool = False
+    ):
+        """Generates a review using the configured LLM provider.
 
+        With `stream`, returns an iterator of text pieces instead; the assembled reply is added
+        to the history once the stream is exhausted. `summary` is what `content` shrinks to in
+        the history once a newer roast comes in. With `use_cache`, a review already generated
+        for the same prompt is reused and new ones are stored; `refresh` skips the lookup but
+        still stores the new review.
+        """
+        self.last_from_cache = False
+        cache_key = self._result_key(content) if use_cache else None
+        cached = self.result_cache.get(cache_key) if use_cache and not refresh else None
+        if cached is not None:
+            self.last_from_cache = True
+            self._append_to_history(LLMEnum.USER.value, content, summary=summary)
+            self._append_to_history(LLMEnum.ASSISTANT.value, cached)
+            return iter([cached]) if stream else cached
 
-    def _generate_review(self, content: str) -> str:
-        """Generates a review using the configured LLM provider."""
-        self._append_to_history(LLMEnum.USER.value, content)
-        response = self.llm_service.generate_text(messages=self.chat_history)
+        if stream:
+            return self._stream_review(content, summary, cache_key)
+        return self._reply(self.chat_history, content, summary, cache_key)
+
+    def _reply(self, history: ChatHistory, content: str, summary: Optional[str] = None, cache_key: Optional[str] = None):
+        """Ask the LLM about `content` in `history`, storing the answer under `cache_key` if given."""
+        self._append_to_history(LLMEnum.USER.value, content, summary=summary, history=history)
+        response = self.llm_service.generate_text(messages=history.messages())
 
         if not response:
             raise ConnectionError("Failed to get a response from the LLM service. Check your API key and network.")
 
-        self._append_to_history(LLMEnum.ASSISTANT.value, response)
+        self._append_to_history(LLMEnum.ASSISTANT.value, response, history=history)
+        if cache_key:
+            self.result_cache.set(cache_key, response)
         return response
 
-    def roast_repo(self, repo_full_name: str, branch: Optional[str] = None) -> str:
-        """Generates a review for a given GitHub repository."""
+    def _stream_review(self, content: str, summary: Optional[str] = None, cache_key: Optional[str] = None):
+        self._append_to_history(LLMEnum.USER.value, content, summary=summary)
+        parts = []
+        for delta in self.llm_service.stream_text(messages=self.chat_history.messages()):
+            parts.append(delta)
+            yield delta
+
+        response = "".join(parts)
+        if not response:
+            raise ConnectionError("Failed to get a response from the LLM service. Check your API key and network.")
+        self._append_to_history(LLMEnum.ASSISTANT.value, response)
+        if cache_key:
+            self.result_cache.set(cache_key, response)
+
+    @traced("build prompt", "phase")
+    def _render_data_prompt(self, template, field: str, data: dict):
+        """Fit collected data into the model's token budget and render it into the prompt template.
+
+        Returns the prompt and the compact version of it that later stands in for it in the history.
+        """
+        budget = resolve_token_budget(self.settings.ROAST_LLM_MODEL_ID, self.settings.ROAST_PROMPT_TOKEN_BUDGET)
+        # Long commit histories go in as local stats and a sample rather than every message.
+        payload, _ = fit_to_budget(digest_activities(data), budget)
+        prompt_content = template.substitute(**{field: payload})
+        summary = template.substitute(**{field: DATA_DIGEST_PROMPT.substitute(digest=describe_data(data))})
+        return prompt_content, summary
+
+    def _build_data_prompt(self, template, field: str, data: dict):
+        prompt_content, summary = self._render_data_prompt(template, field, data)
+        self.last_prompt_tokens = estimate_tokens(prompt_content)
+        return prompt_content, summary
+
+    def _local_repository(self, repo_full_name: Optional[str], path: Optional[str]) -> LocalRepository:
+        if path:
+            return LocalRepository(path, name=repo_full_name)
+        return LocalRepository.clone(
+            repo_full_name, get_cache_dir("clones"),
+            base_url=self.settings.ROAST_GITHUB_API_URL or None, token=self.settings.ROAST_GITHUB_TOKEN or None
+        )
+
+    @traced("collect repo data", "phase")
+    def _collect_repo_data(
+        self,
+        repo_full_name: Optional[str],
+        timings: Optional[dict] = None,
+        path: Optional[str] = None,
+        clone: bool = False,
+        full: bool = False,
+        **window
+    ):
+        """Collect repository data from GitHub, or with git from a local `path` (offline) or a partial `clone`.
+
+        Without a date window, GitHub data is updated from the stored snapshot of the repository
+        unless `full` asks for everything from scratch.
+        """
+        if not repo_full_name and not path:
+            raise ValueError("A repository name is required unless a local path is given.")
+        if path or clone:
+            return build_local_repo_data(
+                self._local_repository(repo_full_name, path), repo_full_name,
+                github_service=None if path else self.github_service, timings=timings, **window
+            )
+        since, until = window.pop("since", None), window.pop("until", None)
         try:
-            repo_data = build_repo_data(self.github_service, repo_full_name, branch=branch)
+            if since or until:
+                return build_repo_data(self.github_service, repo_full_name, timings=timings, since=since, until=until, **window)
+            return build_repo_data_incremental(self.github_service, self.snapshots, repo_full_name, timings=timings, full=full, **window)
         except AttributeError:
             raise ValueError(f"Could not find repository '{repo_full_name}'. Please check that the name is correct and that you have access to it.")
 
-        prompt_content = REPO_REVIEW_PROMPT.substitute(repo_data=json.dumps(repo_data, indent=2))
+    @traced("collect user data", "phase")
+    def _collect_user_data(self, username: str, since: Optional[datetime] = None):
+        try:
+            return build_user_data(self.github_service, username, since=since)
+        except AttributeError:
+            raise ValueError(f"Could not find user '{username}'. Please check that the username is correct.")
+
+    def roast_repo(
+        self,
+        repo_full_name: Optional[str],
+        branch: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        max_commits: Optional[int] = DEFAULT_MAX_COMMITS,
+        stream: bool = False,
+        use_cache: bool = True,
+        refresh: bool = False,
+        path: Optional[str] = None,
+        clone: bool = False,
+        full: bool = False
+    ):
+        """Generates a review for a given GitHub repository, looking only at commits inside the window.
+
+        With `path`, the local repository there is roasted instead, without any GitHub call;
+        with `clone`, history and files come from a partial clone rather than the API.
+        `full` rebuilds the stored snapshot of the repository instead of updating it.
+        """
+        self.last_timings = {}
+        repo_data = self._collect_repo_data(
+            repo_full_name, timings=self.last_timings, path=path, clone=clone, full=full,
+            branch=branch, since=since, until=until, max_commits=max_commits
+        )
 
-        
-        review = self._generate_review(prompt_content)
+        prompt_content, summary = self._build_data_prompt(REPO_REVIEW_PROMPT, "repo_data", repo_data)
+        review = self._generate_review(
+            prompt_content, stream=stream, summary=summary, use_cache=use_cache, refresh=refresh
+        )
         return review
 
-    def roast_user(self, username: Optional[str] = None) -> str:
-        """Generates a review for a given GitHub user."""
+    def roast_user(
+        self,
+        username: Optional[str] = None,
+        since: Optional[datetime] = None,
+        stream: bool = False,
+        use_cache: bool = True,
+        refresh: bool = False
+    ):
+        """Generates a review for a given GitHub user, looking only at activity after `since`."""
         if not username:
             try:
                 username = self.github_service.get_user().login
             except Exception:
                  raise ValueError("Username is required when not authenticated. Please provide a username or set a GitHub token.")
-        try:
-            user_data = build_user_data(self.github_service, username)
-        except AttributeError:
-            raise ValueError(f"Could not find user '{username}'. Please check that the username is correct.")
+        user_data = self._collect_user_data(username, since=since)
 
-        prompt_content = USER_REVIEW_PROMPT.substitute(user_data=json.dumps(user_data, indent=2))
-        review = self._generate_review(prompt_content)
+        prompt_content, summary = self._build_data_prompt(USER_REVIEW_PROMPT, "user_data", user_data)
+        review = self._generate_review(
+            prompt_content, stream=stream, summary=summary, use_cache=use_cache, refresh=refresh
+        )
         return review
 
-    def normal_chat(self, message: str) -> str:
+    def prepare_roast(self, kind: str, name: str, max_commits: Optional[int] = DEFAULT_MAX_COMMITS) -> str:
+        """Collect the data of a repo (`kind` "repo") or user ("user") and render its roast prompt.
+
+        Unlike `roast_repo`/`roast_user`, nothing about the current conversation is touched, so
+        several targets can be prepared at once from different threads.
+        """
+        if kind == "repo":
+            data = self._collect_repo_data(name, max_commits=max_commits)
+            return self._render_data_prompt(REPO_REVIEW_PROMPT, "repo_data", data)[0]
+        if kind == "user":
+            return self._render_data_prompt(USER_REVIEW_PROMPT, "user_data", self._collect_user_data(name))[0]
+        raise ValueError(f"Unknown roast target kind '{kind}', expected 'repo' or 'user'.")
+
+    def roast_isolated(self, prompt_content: str, use_cache: bool = True, refresh: bool = False):
+        """Generate a roast for a prepared prompt in a conversation of its own.
+
+        Returns the review and whether it came from the result cache. The shared chat history
+        is left alone, which makes this safe to call from several threads.
+        """
+        cache_key = self._result_key(prompt_content) if use_cache else None
+        if cache_key and not refresh:
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return cached, True
+
+        history = self._new_history()
+        history.append(self.llm_service.construct_prompt(prompt_content, LLMEnum.USER.value))
+        response = self.llm_service.generate_text(messages=history.messages())
+        if not response:
+            raise ConnectionError("Failed to get a response from the LLM service. Check your API key and network.")
+        if cache_key:
+            self.result_cache.set(cache_key, response)
+        return response, False
+
+    def new_session(self) -> ChatHistory:
+        """An empty conversation of its own, for `roast_in_session` and `chat_in_session`."""
+        return self._new_history()
+
+    def roast_in_session(
+        self,
+        history: ChatHistory,
+        kind: str,
+        name: Optional[str],
+        use_cache: bool = True,
+        refresh: bool = False,
+        **window
+    ):
+        """Roast a repo (`kind` "repo") or user ("user") inside the conversation `history`.
+
+        Returns the review and whether it came from the result cache. Nothing shared is
+        touched, so different sessions can be served from different threads; calls on one
+        history must not overlap.
+        """
+        if kind == "repo":
+            data = self._collect_repo_data(name, **window)
+            prompt_content, summary = self._render_data_prompt(REPO_REVIEW_PROMPT, "repo_data", data)
+        elif kind == "user":
+            if not name:
+                raise ValueError("A username is required.")
+            prompt_content, summary = self._render_data_prompt(USER_REVIEW_PROMPT, "user_data", self._collect_user_data(name))
+        else:
+            raise ValueError(f"Unknown roast target kind '{kind}', expected 'repo' or 'user'.")
+
+        cache_key = self._result_key(prompt_content) if use_cache else None
+        cached = self.result_cache.get(cache_key) if cache_key and not refresh else None
+        if cached is not None:
+            self._append_to_history(LLMEnum.USER.value, prompt_content, summary=summary, history=history)
+            self._append_to_history(LLMEnum.ASSISTANT.value, cached, history=history)
+            return cached, True
+        return self._reply(history, prompt_content, summary, cache_key), False
+
+    def chat_in_session(self, history: ChatHistory, message: str) -> str:
+        """Answer a follow-up message inside the conversation `history`."""
+        return self._reply(history, USER_MESSAGE_PROMPT.substitute(user_prompt=message))
+
+    def normal_chat(self, message: str, stream: bool = False):
         """Generates a response for a given message using the configured LLM provider."""
+        self.last_prompt_tokens = None
         prompt_content = USER_MESSAGE_PROMPT.substitute(user_prompt=message)
-        response = self._generate_review(prompt_content)
+        response = self._generate_review(prompt_content, stream=stream)
         return response
@@ -0,0 +1,192 @@
+import sys
+from array import array
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, Optional
+
+# Stands in for the stats of commits listed without them (a user's recent repositories).
+NO_STATS = -1
+
+
+def parse_timestamp(value: str) -> int:
+    """Epoch seconds of an ISO 8601 date as GitHub and git write them ("Z" or an offset)."""
+    return int(datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp())
+
+
+def _utc_offset_minutes(value: datetime) -> int:
+    offset = value.utcoffset()
+    return int(offset.total_seconds() // 60) if offset else 0
+
+
+def format_timestamp(seconds: int) -> str:
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat()
+
+
+class ActivityTable:
+    """Commit activities stored column by column instead of one nested dict per commit.
+
+    Dates are UTC epoch seconds (plus the author's UTC offset in minutes, when the source
+    knows it) and stats are ints in typed arrays; authors, repositories and visibilities are
+    interned once and referenced by index. Iterating yields the usual activity dicts, so the
+    table goes wherever a list of activities did, and that schema only gets built when the
+    data is serialized for the prompt. The columns themselves are exposed read-only for
+    batch computations over the whole history.
+    """
+    __slots__ = (
+        "_strings", "_string_ids", "_authors", "_repos", "_feasabilities",
+        "_created_at", "_utc_offsets", "_messages", "_changed_files", "_changed_lines",
+    )
+
+    def __init__(self):
+        self._strings = [None]
+        self._string_ids = {None: 0}
+        self._authors = array("I")
+        self._repos = array("I")
+        self._feasabilities = array("I")
+        self._created_at = array("q")
+        self._utc_offsets = array("h")
+        self._messages = []
+        self._changed_files = array("i")
+        self._changed_lines = array("i")
+
+    def _intern(self, value: Optional[str]) -> int:
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = self._string_ids[value] = len(self._strings)
+            self._strings.append(sys.intern(value))
+        return string_id
+
+    def append(
+        self,
+        author: Optional[str],
+        created_at: int,
+        repo: str,
+        message: str,
+        changed_files: int = NO_STATS,
+        changed_lines: int = NO_STATS,
+        repo_feasability: Optional[str] = None,
+        utc_offset: int = 0
+    ):
+        self._authors.append(self._intern(author))
+        self._repos.append(self._intern(repo))
+        self._feasabilities.append(self._intern(repo_feasability))
+        self._created_at.append(created_at)
+        self._utc_offsets.append(utc_offset)
+        self._messages.append(message)
+        self._changed_files.append(changed_files)
+        self._changed_lines.append(changed_lines)
+
+    def extend(self, activities: Iterable[dict]):
+        """Append another table, or activities given in the dict schema (a stored snapshot)."""
+        if isinstance(activities, ActivityTable):
+            for index in range(len(activities)):
+                self.append(
+                    activities._strings[activities._authors[index]],
+                    activities._created_at[index],
+                    activities._strings[activities._repos[index]],
+                    activities._messages[index],
+                    activities._changed_files[index],
+                    activities._changed_lines[index],
+                    activities._strings[activities._feasabilities[index]],
+                    activities._utc_offsets[index],
+                )
+            return
+        for activity in activities:
+            payload = activity.get("event_payload") or {}
+            created_at = datetime.fromisoformat(activity["event_created_at"].replace("Z", "+00:00"))
+            self.append(
+                activity.get("event_author"),
+                int(created_at.timestamp()),
+                activity.get("event_repo"),
+                "\n".join(payload.get("commit_messages") or []),
+                payload.get("changed_files_count", NO_STATS),
+                payload.get("changed_lines_count", NO_STATS),
+                activity.get("repo_feasability"),
+                _utc_offset_minutes(created_at),
+            )
+
+    @classmethod
+    def from_dicts(cls, activities: Iterable[dict]) -> "ActivityTable":
+        table = cls()
+        table.extend(activities)
+        return table
+
+    def __len__(self) -> int:
+        return len(self._created_at)
+
+    @property
+    def created_at(self) -> array:
+        return self._created_at
+
+    @property
+    def utc_offsets(self) -> array:
+        return self._utc_offsets
+
+    @property
+    def messages(self) -> list:
+        return self._messages
+
+    @property
+    def changed_files(self) -> array:
+        return self._changed_files
+
+    @property
+    def changed_lines(self) -> array:
+        return self._changed_lines
+
+    @property
+    def authors(self) -> list:
+        """The author of each activity (the interned strings, not copies)."""
+        strings = self._strings
+        return [strings[author] for author in self._authors]
+
+    def row(self, index: int) -> dict:
+        """The activity at `index` in the dict schema."""
+        payload = {"commit_messages": [self._messages[index]]}
+        if self._changed_files[index] != NO_STATS:
+            payload["changed_files_count"] = self._changed_files[index]
+            payload["changed_lines_count"] = self._changed_lines[index]
+        activity = {}
+        feasability = self._strings[self._feasabilities[index]]
+        if feasability is not None:
+            activity["repo_feasability"] = feasability
+        activity.update({
+            "event_author": self._strings[self._authors[index]],
+            "event_created_at": format_timestamp(self._created_at[index]),
+            "event_repo": self._strings[self._repos[index]],
+            "event_payload": payload,
+        })
+        return activity
+
+    def __iter__(self) -> Iterator[dict]:
+        return (self.row(index) for index in range(len(self)))
+
+    def to_dicts(self) -> list:
+        return list(self)
+
+    def head(self, count: Optional[int]) -> "ActivityTable":
+        """A table of the first `count` activities (all of them for None)."""
+        if count is None or count >= len(self):
+            return self
+        table = ActivityTable()
+        table._strings, table._string_ids = self._strings[:], dict(self._string_ids)
+        for column in self.__slots__[2:]:
+            setattr(table, column, getattr(self, column)[:count])
+        return table
+
+    def select(self, indexes: Iterable[int]) -> "ActivityTable":
+        """A table of the activities at `indexes`, in that order."""
+        indexes = list(indexes)
+        table = ActivityTable()
+        table._strings, table._string_ids = self._strings[:], dict(self._string_ids)
+        for column in self.__slots__[2:]:
+            values = getattr(self, column)
+            picked = [values[index] for index in indexes]
+            setattr(table, column, array(values.typecode, picked) if isinstance(values, array) else picked)
+        return table
+
+
+def json_default(value):
+    """`default` for `json.dumps`: a table is written as its list of activity dicts."""
+    if isinstance(value, ActivityTable):
+        return value.to_dicts()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
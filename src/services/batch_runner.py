@@ -0,0 +1,202 @@
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Optional
+from helpers.config import DEFAULT_MAX_COMMITS
+
+DEFAULT_COLLECT_WORKERS = 4
+DEFAULT_GENERATE_WORKERS = 2
+TARGET_KINDS = ("repo", "user")
+
+
+def parse_targets(lines: Iterable[str]) -> list:
+    """Read `(kind, name)` targets, one per line: `repo owner/name`, `user login`, or a bare name.
+
+    A bare name with a slash is a repository, anything else a user. Blank lines, `#` comments
+    and repeated targets are skipped.
+    """
+    targets = []
+    seen = set()
+    for number, line in enumerate(lines, start=1):
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        parts = line.split()
+        if len(parts) == 2 and parts[0].lower() in TARGET_KINDS:
+            kind, name = parts[0].lower(), parts[1]
+        elif len(parts) == 1:
+            kind, name = ("repo" if "/" in parts[0] else "user"), parts[0]
+        else:
+            raise ValueError(f"Line {number}: expected 'repo owner/name', 'user login' or a bare name, got '{line}'.")
+        if (kind, name) not in seen:
+            seen.add((kind, name))
+            targets.append((kind, name))
+    return targets
+
+
+def completed_targets(output_path: str) -> set:
+    """Targets already roasted successfully in an earlier run's output."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short by an interrupted run.
+                continue
+            if record.get("status") == "ok":
+                done.add((record.get("kind"), record.get("target")))
+    return done
+
+
+class BatchStats:
+    """Running totals of a batch, for progress and throughput reporting."""
+
+    def __init__(self, total: int, skipped: int = 0):
+        self.total = total
+        self.skipped = skipped
+        self.succeeded = 0
+        self.failed = 0
+        self.cached = 0
+        self.collect_seconds = 0.0
+        self.generate_seconds = 0.0
+        self.started = time.perf_counter()
+        self.finished = None
+
+    @property
+    def done(self) -> int:
+        return self.succeeded + self.failed
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def per_minute(self) -> float:
+        return self.done / self.elapsed * 60 if self.elapsed else 0.0
+
+
+class BatchRunner:
+    """Roasts many targets with collection and generation as two pipelined stages.
+
+    Collection workers fetch GitHub data and render prompts into a bounded queue, generation
+    workers take prompts off it and ask the LLM, each target in a conversation of its own.
+    The queue bound keeps collection from racing far ahead of a slow LLM. Every result is
+    appended to the JSONL output as soon as it is ready, so an interrupted batch can resume.
+    """
+
+    def __init__(
+        self,
+        roaster,
+        collect_workers: int = DEFAULT_COLLECT_WORKERS,
+        generate_workers: int = DEFAULT_GENERATE_WORKERS,
+        max_commits: Optional[int] = DEFAULT_MAX_COMMITS,
+        use_cache: bool = True,
+        refresh: bool = False
+    ):
+        self.roaster = roaster
+        self.collect_workers = max(collect_workers, 1)
+        self.generate_workers = max(generate_workers, 1)
+        self.max_commits = max_commits
+        self.use_cache = use_cache
+        self.refresh = refresh
+        self._lock = threading.Lock()
+
+    def run(
+        self,
+        targets: list,
+        output_path: str,
+        resume: bool = True,
+        on_result: Optional[Callable[[dict, BatchStats], None]] = None
+    ) -> BatchStats:
+        """Roast `targets` into `output_path`; with `resume`, targets already done there are skipped."""
+        done = completed_targets(output_path) if resume else set()
+        pending = [target for target in targets if target not in done]
+        stats = BatchStats(len(targets), skipped=len(targets) - len(pending))
+
+        to_collect = queue.Queue()
+        for target in pending:
+            to_collect.put(target)
+        # A couple of prompts ready per generation worker is enough to never leave one idle.
+        to_generate = queue.Queue(maxsize=self.generate_workers * 2)
+
+        with open(output_path, "a" if resume else "w", encoding="utf-8") as output:
+            def finish(kind: str, name: str, **fields):
+                record = {
+                    "kind": kind,
+                    "target": name,
+                    **fields,
+                    "finished_at": datetime.now(timezone.utc).isoformat(),
+                }
+                with self._lock:
+                    if record["status"] == "ok":
+                        stats.succeeded += 1
+                        stats.cached += record["cached"]
+                    else:
+                        stats.failed += 1
+                    stats.collect_seconds += record.get("collect_seconds", 0.0)
+                    stats.generate_seconds += record.get("generate_seconds", 0.0)
+                    output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    output.flush()
+                    if on_result is not None:
+                        on_result(record, stats)
+
+            def collect():
+                while True:
+                    try:
+                        kind, name = to_collect.get_nowait()
+                    except queue.Empty:
+                        return
+                    started = time.perf_counter()
+                    try:
+                        prompt = self.roaster.prepare_roast(kind, name, max_commits=self.max_commits)
+                    except Exception as e:
+                        finish(kind, name, status="error", error=str(e), collect_seconds=time.perf_counter() - started)
+                        continue
+                    to_generate.put((kind, name, prompt, time.perf_counter() - started))
+
+            def generate():
+                while True:
+                    item = to_generate.get()
+                    if item is None:
+                        return
+                    kind, name, prompt, collect_seconds = item
+                    started = time.perf_counter()
+                    try:
+                        review, cached = self.roaster.roast_isolated(prompt, use_cache=self.use_cache, refresh=self.refresh)
+                    except Exception as e:
+                        finish(
+                            kind, name, status="error", error=str(e),
+                            collect_seconds=collect_seconds, generate_seconds=time.perf_counter() - started
+                        )
+                        continue
+                    finish(
+                        kind, name, status="ok", review=review, cached=cached,
+                        collect_seconds=collect_seconds, generate_seconds=time.perf_counter() - started
+                    )
+
+            # Daemon threads, so Ctrl+C ends the batch; finished results are already on disk.
+            collectors = [
+                threading.Thread(target=collect, name=f"roast-batch-collect-{i}", daemon=True)
+                for i in range(min(self.collect_workers, len(pending)))
+            ]
+            generators = [
+                threading.Thread(target=generate, name=f"roast-batch-generate-{i}", daemon=True)
+                for i in range(self.generate_workers)
+            ]
+            for thread in collectors + generators:
+                thread.start()
+            for thread in collectors:
+                thread.join()
+            for _ in generators:
+                to_generate.put(None)
+            for thread in generators:
+                thread.join()
+
+        stats.finished = time.perf_counter()
+        return stats
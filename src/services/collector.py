@@ -0,0 +1,110 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Optional
+from services.tracing import tracer
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_CALL_TIMEOUT = 30.0
+
+_deadline = threading.local()
+
+
+class CollectionResult:
+    """Outcome of a concurrent collection: values, per-call timings and what went wrong."""
+
+    def __init__(self):
+        self.values = {}
+        self.timings = {}
+        self.errors = {}
+
+    def __getitem__(self, name):
+        return self.values[name]
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.errors)
+
+
+def call_time_left() -> Optional[float]:
+    """Seconds until the collected call running on this thread times out, None outside of one."""
+    deadline = getattr(_deadline, "value", None)
+    return None if deadline is None else deadline - time.perf_counter()
+
+
+def _timed(name: str, fn: Callable, deadline: float):
+    started = time.perf_counter()
+    # Read by the GitHub transport, so a call that timed out stops at its next request.
+    _deadline.value = deadline
+    try:
+        with tracer.span(f"collect {name}", "collect"):
+            return fn(), time.perf_counter() - started
+    except Exception as e:
+        e.elapsed = time.perf_counter() - started
+        raise
+    finally:
+        _deadline.value = None
+
+
+def collect_concurrently(
+    calls: dict,
+    defaults: Optional[dict] = None,
+    timeouts: Optional[dict] = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    default_timeout: float = DEFAULT_CALL_TIMEOUT
+) -> CollectionResult:
+    """Run independent zero-argument calls on a bounded thread pool.
+
+    A call that raises or runs past its timeout doesn't fail the collection: its default
+    value is used instead and the reason is recorded in `errors`. Calls listed without a
+    default are required, their exception is re-raised once the others are settled. A call
+    that times out isn't waited for, but its requests to GitHub fail from then on (see
+    `call_time_left`), so it doesn't keep a worker, a connection and quota busy.
+    """
+    defaults = defaults or {}
+    timeouts = timeouts or {}
+    result = CollectionResult()
+    if not calls:
+        return result
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(calls)), thread_name_prefix="roast-collect")
+    started = time.perf_counter()
+    pending = {}
+    for name, fn in calls.items():
+        deadline = started + timeouts.get(name, default_timeout)
+        pending[executor.submit(_timed, name, fn, deadline)] = (name, deadline)
+
+    required_error = None
+    try:
+        while pending:
+            next_deadline = min(deadline for _, deadline in pending.values())
+            done, _ = wait(pending, timeout=max(next_deadline - time.perf_counter(), 0), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                name, _ = pending.pop(future)
+                try:
+                    result.values[name], result.timings[name] = future.result()
+                except Exception as e:
+                    result.timings[name] = getattr(e, "elapsed", time.perf_counter() - started)
+                    result.errors[name] = e
+                    result.values[name] = defaults.get(name)
+                    if name not in defaults and required_error is None:
+                        required_error = e
+
+            now = time.perf_counter()
+            for future, (name, deadline) in list(pending.items()):
+                if deadline <= now:
+                    del pending[future]
+                    future.cancel()
+                    result.timings[name] = now - started
+                    result.errors[name] = TimeoutError(f"'{name}' did not finish within {timeouts.get(name, default_timeout)}s")
+                    result.values[name] = defaults.get(name)
+                    if name not in defaults and required_error is None:
+                        required_error = result.errors[name]
+    finally:
+        # Timed out calls wind down in the background, nobody waits for them.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if required_error is not None:
+        raise required_error
+    return result
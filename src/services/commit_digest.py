@@ -0,0 +1,126 @@
+import re
+from collections import Counter
+from services.activity_table import ActivityTable, NO_STATS, format_timestamp
+
+# Below this many commits the raw activities are cheap enough to send as they are.
+DIGEST_MIN_COMMITS = 60
+DIGEST_SAMPLE_SIZE = 30
+TOP_AUTHORS = 10
+TOP_DUPLICATES = 5
+# Local hours counted as late night, and the Monday=0 weekdays counted as weekend.
+LATE_NIGHT_HOURS = frozenset(range(0, 5))
+WEEKEND_DAYS = frozenset((5, 6))
+PERCENTILES = (10, 50, 90, 99)
+
+_FIX_RE = re.compile(r"\b(fix|fixe[sd]|fixing|hotfix|bugfix)\b", re.IGNORECASE)
+_WIP_RE = re.compile(r"\bwip\b", re.IGNORECASE)
+_REVERT_RE = re.compile(r"^revert\b", re.IGNORECASE)
+_MERGE_RE = re.compile(r"^merge (pull request|branch|remote-tracking)\b", re.IGNORECASE)
+
+SECONDS_PER_DAY = 86400
+# 1970-01-01 was a Thursday.
+EPOCH_WEEKDAY = 3
+
+
+def percentiles(values: list, points: tuple = PERCENTILES) -> dict:
+    """Nearest-rank percentiles of `values` (sorted once), keyed "p10", "p50", ..."""
+    if not values:
+        return {}
+    ordered = sorted(values)
+    last = len(ordered) - 1
+    return {f"p{point}": ordered[min(last, (len(ordered) * point) // 100)] for point in points}
+
+
+def _ratio(count: int, total: int) -> float:
+    return round(count / total, 3) if total else 0.0
+
+
+def _sample_indexes(table: ActivityTable, subjects: list, sample_size: int) -> list:
+    """Newest commits, the biggest ones and evenly spread others, newest first and without repeats."""
+    count = len(table)
+    by_date = sorted(range(count), key=table.created_at.__getitem__, reverse=True)
+    picked = dict.fromkeys(by_date[:sample_size // 3])
+    changed_lines = table.changed_lines
+    biggest = sorted((index for index in range(count) if changed_lines[index] != NO_STATS),
+                     key=changed_lines.__getitem__, reverse=True)
+    picked.update(dict.fromkeys(biggest[:3]))
+    seen_subjects = {subjects[index].lower() for index in picked}
+    step = max(count / max(sample_size - len(picked), 1), 1)
+    position = 0.0
+    while len(picked) < min(sample_size, count) and position < count:
+        index = by_date[int(position)]
+        # Spread over different messages, the duplicates are already counted in the stats.
+        if subjects[index].lower() not in seen_subjects:
+            picked[index] = None
+            seen_subjects.add(subjects[index].lower())
+        position += step
+    return sorted(picked, key=table.created_at.__getitem__, reverse=True)
+
+
+def digest_commits(table: ActivityTable, sample_size: int = DIGEST_SAMPLE_SIZE) -> tuple:
+    """Compute the telling facts of a commit history locally, in a few passes over the table's columns.
+
+    Returns the stats dict and a small representative sample of the activities (a table).
+    Times of day and weekdays are in the author's local time when the source knows their
+    UTC offset (local git), otherwise in UTC.
+    """
+    count = len(table)
+    local_times = [created + offset * 60 for created, offset in zip(table.created_at, table.utc_offsets)]
+    hours = Counter((time // 3600) % 24 for time in local_times)
+    weekdays = Counter((time // SECONDS_PER_DAY + EPOCH_WEEKDAY) % 7 for time in local_times)
+    days = {time // SECONDS_PER_DAY for time in local_times}
+
+    subjects = [message.split("\n", 1)[0].strip() for message in table.messages]
+    subject_counts = Counter(subject.lower() for subject in subjects)
+    duplicates = {subject: n for subject, n in subject_counts.items() if n > 1}
+    authors = Counter(table.authors)
+    churn = [lines for lines in table.changed_lines if lines != NO_STATS]
+    files = [changed for changed in table.changed_files if changed != NO_STATS]
+
+    stats = {
+        "commits": count,
+        "first_commit_at": format_timestamp(min(table.created_at)) if count else None,
+        "last_commit_at": format_timestamp(max(table.created_at)) if count else None,
+        "active_days": len(days),
+        "commits_per_active_day": round(count / len(days), 2) if days else 0,
+        "commits_by_hour": [hours.get(hour, 0) for hour in range(24)],
+        "commits_by_weekday_mon_to_sun": [weekdays.get(day, 0) for day in range(7)],
+        "late_night_ratio": _ratio(sum(hours[hour] for hour in LATE_NIGHT_HOURS), count),
+        "weekend_ratio": _ratio(sum(weekdays[day] for day in WEEKEND_DAYS), count),
+        "subject_length": dict(percentiles([len(subject) for subject in subjects]),
+                               mean=round(sum(map(len, subjects)) / count, 1) if count else 0),
+        "multiline_messages": sum("\n" in message.strip() for message in table.messages),
+        "fix_messages": sum(bool(_FIX_RE.search(subject)) for subject in subjects),
+        "wip_messages": sum(bool(_WIP_RE.search(subject)) for subject in subjects),
+        "revert_messages": sum(bool(_REVERT_RE.match(subject)) for subject in subjects),
+        "merge_messages": sum(bool(_MERGE_RE.match(subject)) for subject in subjects),
+        "single_word_messages": sum(len(subject.split()) <= 1 for subject in subjects),
+        "duplicate_messages": sum(duplicates.values()) - len(duplicates),
+        "most_repeated_messages": dict(Counter(duplicates).most_common(TOP_DUPLICATES)),
+        "authors": len(authors),
+        "author_share": {
+            author or "unknown": _ratio(n, count) for author, n in authors.most_common(TOP_AUTHORS)
+        },
+        "changed_lines": percentiles(churn),
+        "changed_files": percentiles(files),
+    }
+    sample = table.select(_sample_indexes(table, subjects, sample_size))
+    stats["sampled_activities"] = len(sample)
+    return stats, sample
+
+
+def digest_activities(
+    data: dict,
+    min_commits: int = DIGEST_MIN_COMMITS,
+    sample_size: int = DIGEST_SAMPLE_SIZE
+) -> dict:
+    """Repo or user data with a long commit history replaced by its stats and a sample.
+
+    Only commit histories (an `ActivityTable`) of at least `min_commits` are digested; other
+    data is returned as it is. The input dict isn't changed.
+    """
+    activities = data.get("activities")
+    if not isinstance(activities, ActivityTable) or len(activities) < min_commits:
+        return data
+    stats, sample = digest_commits(activities, sample_size)
+    return dict(data, commit_stats=stats, activities=sample)
@@ -1,6 +1,68 @@
+import functools
+import time
+from datetime import datetime
+from itertools import islice
 from typing import Optional
-from services.github_service import GitHubService, get_user_recent_activities, sort_repos_by_recent_update
+from services.github_service import GitHubService, get_user_recent_activities
+from services.collector import collect_concurrently
+from services.local_repo import LocalRepository
+from services.snapshot_store import SnapshotStore
+from services.activity_table import ActivityTable, NO_STATS, parse_timestamp
+from services.readme_outline import outline_readme
 from beartype import beartype
+from helpers.config import DEFAULT_MAX_COMMITS
+
+USER_FALLBACK_REPOS = 5
+USER_REPO_MAX_COMMITS = 30
+
+
+def iter_commit_window(commits, max_commits: Optional[int] = DEFAULT_MAX_COMMITS):
+    """Yield commits lazily, stopping (and so stopping pagination) once the budget is hit."""
+    if not commits:
+        return
+    yield from islice(commits, max_commits) if max_commits else commits
+
+
+def _append_commit(
+    activities: ActivityTable,
+    commit: dict,
+    repo_full_name: str,
+    changed_files: int = NO_STATS,
+    changed_lines: int = NO_STATS,
+    repo_feasability: Optional[str] = None
+):
+    """Add a commit as listed by the REST API (raw JSON) to `activities`."""
+    author = commit["commit"]["author"]
+    activities.append(
+        (commit.get("author") or {}).get("login") or author.get("name"),
+        parse_timestamp(author["date"]),
+        repo_full_name,
+        commit["commit"]["message"],
+        changed_files,
+        changed_lines,
+        repo_feasability,
+    )
+
+
+def _append_commits_with_stats(
+    github_service: GitHubService,
+    activities: ActivityTable,
+    repo_full_name: str,
+    commits: list,
+    stats: Optional[dict]
+):
+    """Add commits with their file and line stats: from `stats` (GraphQL) when there, else one REST call each."""
+    stats = stats or {}
+    for commit in commits:
+        commit_stats = stats.get(commit["sha"])
+        if commit_stats:
+            changed_files_count = commit_stats["changed_files"]
+            changed_lines_count = commit_stats["additions"] + commit_stats["deletions"]
+        else:
+            commit_stats = github_service.get_commit_stats(repo_full_name, commit["sha"]) or {}
+            changed_files_count = commit_stats.get("changed_files", 0)
+            changed_lines_count = commit_stats.get("changed_lines", 0)
+        _append_commit(activities, commit, repo_full_name, changed_files_count, changed_lines_count)
 
 
 @beartype
@@ -8,23 +70,15 @@ def get_repo_general_activities(
     github_service: GitHubService, 
     repo_full_name: str, 
     username: Optional[str] = None, 
-    repo_feasability: str = "public"
+    repo_feasability: str = "public",
+    max_commits: Optional[int] = USER_REPO_MAX_COMMITS,
+    since: Optional[datetime] = None
 ):
-    """Get general activity data for a repository."""
-    repo_commits = github_service.get_repo_commits(repo_full_name, author=username)
-    activities = []
-    
-    if repo_commits:
-        for commit in repo_commits:
-            activities.append({
-                "repo_feasability": repo_feasability,
-                "event_author": commit.author.login,
-                "event_created_at": commit.commit.author.date.isoformat(),
-                "event_repo": repo_full_name,
-                "event_payload": {
-                    "commit_messages": [commit.commit.message]
-                }
-            })
+    """Get general activity data for a repository, capped at `max_commits` commits made after `since`."""
+    repo_commits = github_service.iter_repo_commits(repo_full_name, author=username, since=since)
+    activities = ActivityTable()
+    for commit in iter_commit_window(repo_commits, max_commits):
+        _append_commit(activities, commit, repo_full_name, repo_feasability=repo_feasability)
     return activities
 
 
@@ -32,33 +86,33 @@ def get_repo_general_activities(
 def get_detail_repo_commits(
     github_service: GitHubService, 
     repo_full_name: str,
-    branch: Optional[str] = None
+    branch: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    max_commits: Optional[int] = DEFAULT_MAX_COMMITS
 ):
-    """Get detailed commit history for a repository."""
-    repo_commits = github_service.get_repo_commits(repo_full_name, branch=branch)
-    activities = []
-    
-    if repo_commits:
-        for commit in repo_commits:
-            author_login = getattr(getattr(commit, "author", None), "login", None) or getattr(commit.commit.author, "name", None)
-            activities.append({
-                "event_author": author_login,
-                "event_created_at": commit.commit.author.date.isoformat(),
-                "event_repo": repo_full_name,
-                "event_payload": {
-                    "commit_messages": [commit.commit.message],
-                    "changed_files_count": commit.files.totalCount,
-                    "changed_lines_count": commit.stats.total
-                }
-            })
+    """Get detailed commit history for a repository within the given window.
+
+    Commits are read as raw JSON pages, without building PyGithub objects. File and line
+    stats come from one batched GraphQL query; commits it couldn't cover fall back to a
+    per-commit REST fetch.
+    """
+    repo_commits = github_service.iter_repo_commits(repo_full_name, branch=branch, since=since, until=until)
+    commits = list(iter_commit_window(repo_commits, max_commits))
+    stats = github_service.get_commits_stats(
+        repo_full_name, branch=branch, since=since, until=until, max_commits=len(commits)
+    ) if commits else None
+    activities = ActivityTable()
+    _append_commits_with_stats(github_service, activities, repo_full_name, commits, stats)
     return activities
 
 @beartype
 def build_user_data(
     github_service: GitHubService, 
-    username: Optional[str] = None
+    username: Optional[str] = None,
+    since: Optional[datetime] = None
 ):
-    """Build comprehensive user data including profile and activities."""
+    """Build comprehensive user data including profile and activities, optionally only those after `since`."""
     user = github_service.get_user(username=username)
     if not user:
         raise ValueError(f"User '{username}' not found on GitHub.")
@@ -67,20 +121,31 @@ def build_user_data(
     
     readme = github_service.get_repo_readme(profile_repo.full_name) if profile_repo else ""
     
-    activities = get_user_recent_activities(github_service, username=username)
+    activities = get_user_recent_activities(github_service, username=username, since=since) or []
     
     if not activities:
-        repos = github_service.get_repositories(username=username)
-        sorted_repos = sort_repos_by_recent_update(repos)
-        for repo in sorted_repos[:5]:
-            repo_feasability = "private" if repo.private else "public"
-            repo_activities = get_repo_general_activities(
-                github_service, 
-                repo.full_name, 
-                username=user.login, 
-                repo_feasability=repo_feasability
-            )
-            activities.extend(repo_activities)
+        activities = ActivityTable()
+        # Only the first page of the server-side sorted listing is needed, however many repos the user has.
+        repos = github_service.get_repositories(username=username, sort="updated")
+        recent_repos = list(islice(repos, USER_FALLBACK_REPOS)) if repos else []
+        for repo in recent_repos:
+            github_service.cache_repository(repo)
+        collected = collect_concurrently(
+            {
+                repo.full_name: functools.partial(
+                    get_repo_general_activities,
+                    github_service,
+                    repo.full_name,
+                    username=user.login,
+                    repo_feasability="private" if repo.private else "public",
+                    since=since
+                )
+                for repo in recent_repos
+            },
+            defaults={repo.full_name: [] for repo in recent_repos},
+        )
+        for repo in recent_repos:
+            activities.extend(collected[repo.full_name])
 
     return {
         "username": user.login,
@@ -91,32 +156,321 @@ def build_user_data(
     }
 
 
+def get_repo_readme_outline(
+    github_service: GitHubService,
+    repo_full_name: str,
+    branch: Optional[str] = None,
+    revalidate: bool = False
+) -> str:
+    """Headings, badges and first sections of a repository's README, read from a capped download."""
+    readme = github_service.get_repo_readme_head(repo_full_name, branch=branch, revalidate=revalidate)
+    return outline_readme(*readme) if readme else ""
+
+
+def get_repo_license_id(repo) -> str:
+    """SPDX id of the license GitHub detected, taken from the repository metadata without a request."""
+    license_info = repo.license
+    if license_info is None:
+        return ""
+    # GitHub found a license file but couldn't tell which license it is.
+    return license_info.name if license_info.spdx_id in (None, "NOASSERTION") else license_info.spdx_id
+
+
+def _count_branches(github_service: GitHubService, repo_full_name: str):
+    branches = github_service.get_repo_branches(repo_full_name)
+    return branches.totalCount if branches else 0
+
+
+# Slow endpoints get more room before their partial default is used.
+REPO_CALL_TIMEOUTS = {
+    "files_structure": 60.0,
+    "activities": 120.0,
+}
+
+
 @beartype
 def build_repo_data(
     github_service: GitHubService, 
     repo_full_name: str,
-    branch: Optional[str] = None
+    branch: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    max_commits: Optional[int] = DEFAULT_MAX_COMMITS,
+    timings: Optional[dict] = None,
+    errors: Optional[dict] = None,
+    readme_branch: Optional[str] = None
 ):
-    """Build comprehensive repository data including metadata and activities."""
+    """Build comprehensive repository data including metadata and activities.
+
+    The repository itself is fetched first, every other call then runs concurrently and
+    falls back to an empty value if it fails or times out. Per-call durations (seconds)
+    are written into `timings` when a dict is given, and the calls that fell back to their
+    default into `errors`. The license is the SPDX id from the repository metadata and the
+    README (read at `readme_branch`, `branch` by default) is cut down to its outline.
+    """
+    started = time.perf_counter()
     repo = github_service.get_repository(repo_full_name)
-    branches = github_service.get_repo_branches(repo_full_name)
-    
-    readme = github_service.get_repo_readme(repo_full_name, branch=branch) or ""
-    license_text = github_service.get_repo_license(repo_full_name) or ""
-    
-    files_structure = github_service.get_repository_files_structure(repo_full_name, branch=branch)
+    repo_elapsed = time.perf_counter() - started
+    if not repo:
+        raise ValueError(f"Repository '{repo_full_name}' not found on GitHub.")
+
+    collected = collect_concurrently(
+        {
+            "branches_count": lambda: _count_branches(github_service, repo_full_name),
+            "readme": lambda: get_repo_readme_outline(github_service, repo_full_name, branch=readme_branch or branch),
+            "files_structure": lambda: github_service.get_repository_files_structure(repo_full_name, branch=branch),
+            "activities": lambda: get_detail_repo_commits(
+                github_service, repo_full_name, branch=branch, since=since, until=until, max_commits=max_commits
+            ),
+            "languages": lambda: github_service.get_repo_languages(repo_full_name),
+        },
+        defaults={
+            "branches_count": 0,
+            "readme": "",
+            "files_structure": {},
+            "activities": ActivityTable(),
+            "languages": {},
+        },
+        timeouts=REPO_CALL_TIMEOUTS,
+    )
+
+    if timings is not None:
+        timings.update({"repository": repo_elapsed, **collected.timings})
+    if errors is not None:
+        errors.update(collected.errors)
+
+    if len(collected.errors) == len(collected.values):
+        # Nothing but the repository came back, a roast of empty data isn't worth sending.
+        raise next(iter(collected.errors.values()))
 
-    
     return {
         "repo_full_name": repo_full_name,
         "repo_feasability": "private" if repo.private else "public",
         "repo_description": repo.description,
-        "repo_readme": readme,
-        "repo_license": license_text,
-        "activities": get_detail_repo_commits(github_service, repo_full_name, branch=branch),
+        "repo_readme": collected["readme"],
+        "repo_license": get_repo_license_id(repo),
+        "activities": collected["activities"],
         "stars_count": github_service.get_repo_stars_count(repo_full_name),
         "forks_count": github_service.get_repo_forks_count(repo_full_name),
-        "languages": github_service.get_repo_languages(repo_full_name),
-        "files_structure": files_structure,
-        "branches_count": branches.totalCount if branches else 0
-    }
\ No newline at end of file
+        "languages": collected["languages"],
+        "files_structure": collected["files_structure"],
+        "branches_count": collected["branches_count"]
+    }
+
+
+def _readme_shas(top_level_shas: dict) -> list:
+    """Blob shas of the top-level files GitHub could pick as the README."""
+    return [sha for path, sha in top_level_shas.items() if path.lower().startswith("readme")]
+
+
+def _compare_activities(github_service: GitHubService, repo_full_name: str, commits: list) -> ActivityTable:
+    """Activities for commits listed by the compare endpoint (oldest first), newest first like the full build."""
+    stats = github_service.get_commits_stats(
+        repo_full_name, branch=commits[-1]["sha"], max_commits=len(commits)
+    )
+    activities = ActivityTable()
+    _append_commits_with_stats(github_service, activities, repo_full_name, commits[::-1], stats)
+    return activities
+
+
+def _update_snapshot(
+    github_service: GitHubService,
+    repo,
+    snapshot: dict,
+    branch: str,
+    head: dict,
+    max_commits: Optional[int],
+    timings: dict
+) -> Optional[dict]:
+    """Bring a stored snapshot up to `head`, or None when only a full rebuild will do.
+
+    New commits come from one compare request; files, languages and the README are
+    fetched again only when the root tree or its blob changed.
+    """
+    repo_full_name = repo.full_name
+    data = dict(snapshot["data"])
+    calls = {}
+    if head["sha"] != snapshot["head_sha"]:
+        comparison = github_service.compare_commits(repo_full_name, snapshot["head_sha"], head["sha"])
+        commits = (comparison or {}).get("commits") or []
+        # A force push, or more new commits than fit the window (or than compare lists), starts over.
+        if (comparison or {}).get("status") != "ahead" or len(commits) != comparison.get("ahead_by") \
+                or (max_commits and len(commits) >= max_commits):
+            return None
+        calls["activities"] = lambda: _compare_activities(github_service, repo_full_name, commits)
+        calls["branches_count"] = lambda: _count_branches(github_service, repo_full_name)
+
+    def files_and_readme():
+        files_structure, top_level = github_service.get_repository_tree(repo_full_name, branch=head["sha"]) or ({}, {})
+        candidates = _readme_shas(top_level)
+        # Unknown after a full build (the raw download has no sha); learnt from the listing here.
+        if snapshot["readme_sha"] is not None and snapshot["readme_sha"] in candidates:
+            return files_structure, data["repo_readme"], snapshot["readme_sha"]
+        # Read by branch name, the cached copy may still be fresh but is known to be stale.
+        readme = get_repo_readme_outline(github_service, repo_full_name, branch=branch, revalidate=True)
+        return files_structure, readme, candidates[0] if len(candidates) == 1 else None
+
+    readme_sha = snapshot["readme_sha"]
+    if head["tree_sha"] != snapshot["tree_sha"]:
+        # The README is looked at once the recursive listing has given the top-level shas.
+        calls["files_structure"] = files_and_readme
+        calls["languages"] = lambda: github_service.get_repo_languages(repo_full_name)
+
+    # No defaults: merging a partial update into the snapshot would make it wrong for good.
+    collected = collect_concurrently(calls, timeouts=REPO_CALL_TIMEOUTS) if calls else None
+    if collected is not None:
+        timings.update(collected.timings)
+        if "activities" in calls:
+            data["branches_count"] = collected["branches_count"]
+        if "files_structure" in calls:
+            data["files_structure"], data["repo_readme"], readme_sha = collected["files_structure"]
+            data["languages"] = collected["languages"]
+
+    activities = collected["activities"] if "activities" in calls else ActivityTable()
+    activities.extend(data["activities"])
+    data.update({
+        "activities": activities.head(max_commits),
+        "repo_feasability": "private" if repo.private else "public",
+        "repo_description": repo.description,
+        "repo_license": get_repo_license_id(repo),
+        "stars_count": repo.stargazers_count,
+        "forks_count": repo.forks_count,
+    })
+    return {"data": data, "readme_sha": readme_sha}
+
+
+@beartype
+def build_repo_data_incremental(
+    github_service: GitHubService,
+    snapshots: SnapshotStore,
+    repo_full_name: str,
+    branch: Optional[str] = None,
+    max_commits: Optional[int] = DEFAULT_MAX_COMMITS,
+    timings: Optional[dict] = None,
+    full: bool = False
+):
+    """Build the same repository data as `build_repo_data`, starting from the stored snapshot.
+
+    The branch head is looked up first (one request). When it's the commit the snapshot was
+    built at, only the repository metadata is refreshed; when commits landed on top of it,
+    just those are fetched and merged in. Anything else (no snapshot, another commit window,
+    a force push, `full`) collects everything again at the head and stores the result.
+    """
+    timings = timings if timings is not None else {}
+    started = time.perf_counter()
+    repo = github_service.get_repository(repo_full_name)
+    if not repo:
+        raise ValueError(f"Repository '{repo_full_name}' not found on GitHub.")
+    branch = branch or repo.default_branch
+    head = github_service.get_branch_head(repo_full_name, branch)
+    timings["repository"] = time.perf_counter() - started
+    if not head:
+        raise ValueError(f"Branch '{branch}' not found in '{repo_full_name}'.")
+
+    snapshot = None if full else snapshots.get(repo_full_name, branch)
+    if snapshot and snapshot["max_commits"] == (max_commits or 0):
+        updated = _update_snapshot(github_service, repo, snapshot, branch, head, max_commits, timings)
+        if updated is not None:
+            snapshots.put(
+                repo_full_name, branch, updated["data"], head["sha"], max_commits=max_commits,
+                tree_sha=head["tree_sha"], readme_sha=updated["readme_sha"]
+            )
+            return updated["data"]
+
+    # Pinned to the head sha, so the snapshot is exactly what that commit looked like. The README
+    # is read by branch name instead: its URL, and so its cache entry, stay the same across
+    # pushes, and an unchanged README is revalidated for free.
+    errors = {}
+    data = build_repo_data(
+        github_service, repo_full_name, branch=head["sha"], max_commits=max_commits,
+        timings=timings, errors=errors, readme_branch=branch
+    )
+    if errors:
+        # Good enough for this roast, but storing it would keep the gaps until the next full build.
+        snapshots.delete(repo_full_name, branch)
+        return data
+    snapshots.put(
+        repo_full_name, branch, data, head["sha"], max_commits=max_commits,
+        tree_sha=head["tree_sha"]
+    )
+    return data
+
+
+@beartype
+def get_local_repo_commits(
+    local_repo: LocalRepository,
+    repo_full_name: str,
+    branch: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    max_commits: Optional[int] = DEFAULT_MAX_COMMITS
+):
+    """Get detailed commit history of a local repository, shaped like `get_detail_repo_commits`."""
+    activities = ActivityTable()
+    for commit in local_repo.iter_commits(branch=branch, since=since, until=until, max_commits=max_commits):
+        activities.append(
+            commit["author"], int(commit["date"].timestamp()), repo_full_name,
+            commit["message"], commit["changed_files"], commit["changed_lines"], utc_offset=commit["utc_offset"]
+        )
+    return activities
+
+
+@beartype
+def build_local_repo_data(
+    local_repo: LocalRepository,
+    repo_full_name: Optional[str] = None,
+    github_service: Optional[GitHubService] = None,
+    branch: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    max_commits: Optional[int] = DEFAULT_MAX_COMMITS,
+    timings: Optional[dict] = None
+):
+    """Build the same repository data as `build_repo_data`, reading history and files with git.
+
+    What git doesn't know (description, stars, forks, visibility) comes from GitHub when a
+    `github_service` is given, and so do the languages, which git could only measure by
+    downloading every blob of a partial clone. Without one nothing touches the network.
+    """
+    repo_full_name = repo_full_name or local_repo.full_name
+    calls = {
+        "branches_count": local_repo.branches_count,
+        "readme": lambda: outline_readme(local_repo.readme(branch=branch)),
+        "license": lambda: local_repo.license(branch=branch),
+        "files_structure": lambda: local_repo.files_structure(branch=branch),
+        "activities": lambda: get_local_repo_commits(
+            local_repo, repo_full_name, branch=branch, since=since, until=until, max_commits=max_commits
+        ),
+        "languages": lambda: local_repo.languages(branch=branch),
+    }
+    defaults = {
+        "branches_count": 0,
+        "readme": "",
+        "license": "",
+        "files_structure": {},
+        "activities": ActivityTable(),
+        "languages": {},
+    }
+    if github_service is not None:
+        calls["repository"] = lambda: github_service.get_repository(repo_full_name)
+        calls["languages"] = lambda: github_service.get_repo_languages(repo_full_name)
+        defaults["repository"] = None
+
+    collected = collect_concurrently(calls, defaults=defaults, timeouts=REPO_CALL_TIMEOUTS)
+    if timings is not None:
+        timings.update(collected.timings)
+
+    repo = collected.values.get("repository")
+    return {
+        "repo_full_name": repo_full_name,
+        "repo_feasability": ("private" if repo.private else "public") if repo else "local",
+        "repo_description": repo.description if repo else None,
+        "repo_readme": collected["readme"],
+        "repo_license": collected["license"],
+        "activities": collected["activities"],
+        "stars_count": repo.stargazers_count if repo else 0,
+        "forks_count": repo.forks_count if repo else 0,
+        "languages": collected["languages"],
+        "files_structure": collected["files_structure"],
+        "branches_count": collected["branches_count"]
+    }
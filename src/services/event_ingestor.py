@@ -0,0 +1,134 @@
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+from typing import Callable, Optional
+from helpers.disk_cache import DiskCache
+
+EVENTS_PER_PAGE = 100
+# The events API never goes further back than this many events, whatever the pagination says.
+MAX_EVENTS = 300
+DEFAULT_POLL_INTERVAL = 60
+EVENT_CACHE_MAX_BYTES = 20 * 1024 * 1024
+
+
+def _timestamp(moment: Optional[datetime]) -> Optional[str]:
+    """`moment` in the format of the API's `created_at`, so the two compare as strings."""
+    if moment is None:
+        return None
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class EventIngestor:
+    """Fetches a user's recent events page by page, remembering where the previous fetch stopped.
+
+    Pages are followed through their `Link` headers until `max_events` are collected, the
+    events get older than `since`, or an event seen by an earlier fetch comes up: the
+    newest event id is kept per user (the high-water mark) along with the events already
+    normalized, so a repeat roast only downloads what happened since. Within the
+    `X-Poll-Interval` GitHub asks for, the stored events are reused without any request.
+    `normalize` turns a raw event into an activity, or None for events to skip.
+
+    The stored state is kept per API server and token, like the HTTP cache, so events seen
+    with one token never come back for another. A fetch cut short by `since` stores how far
+    back it is complete, and a later fetch reaching further back starts over rather than
+    trusting a high-water mark with a gap behind it.
+    """
+
+    def __init__(
+        self,
+        session,
+        base_url: str,
+        normalize: Callable[[dict], Optional[dict]],
+        state: Optional[DiskCache] = None,
+        headers: Optional[dict] = None,
+        max_events: int = MAX_EVENTS,
+        clock: Callable[[], float] = time.time
+    ):
+        self.session = session
+        self.base_url = base_url
+        self.normalize = normalize
+        self.state = state
+        self.headers = headers or {}
+        self.max_events = max_events
+        self._clock = clock
+
+    def _key(self, login: str) -> str:
+        auth = hashlib.sha256(self.headers.get("Authorization", "").encode("utf-8")).hexdigest()
+        return "\n".join(["events", self.base_url, auth, login])
+
+    def _load(self, login: str) -> Optional[dict]:
+        if self.state is None:
+            return None
+        data = self.state.get(self._key(login))
+        try:
+            return json.loads(data) if data is not None else None
+        except ValueError:
+            return None
+
+    def _store(self, login: str, state: dict):
+        if self.state is not None:
+            self.state.set(self._key(login), json.dumps(state).encode("utf-8"))
+
+    def fetch(self, login: str, since: Optional[datetime] = None) -> list:
+        """Recent activities of `login`, newest first, optionally only those after `since`."""
+        cutoff = _timestamp(since)
+        state = self._load(login)
+        # Stored events only complete back to a cutoff can't serve a fetch reaching further back.
+        if state and state.get("since") and (not cutoff or cutoff < state["since"]):
+            state = None
+        now = self._clock()
+        if state and now < state["fetched_at"] + state["poll_interval"]:
+            return self._select(state["events"], since)
+
+        high_water_mark = int(state["last_id"]) if state else 0
+        seen = 0
+        fresh = []
+        poll_interval = DEFAULT_POLL_INTERVAL
+        stopped_by = None
+        url = f"{self.base_url}/users/{login}/events?per_page={EVENTS_PER_PAGE}"
+        while url and not stopped_by:
+            response = self.session.get(url, headers=self.headers, timeout=30)
+            response.raise_for_status()
+            poll_interval = int(response.headers.get("X-Poll-Interval") or poll_interval)
+            for event in response.json():
+                if int(event["id"]) <= high_water_mark:
+                    stopped_by = "mark"
+                    break
+                if cutoff and event["created_at"] < cutoff:
+                    stopped_by = "cutoff"
+                    break
+                activity = self.normalize(event)
+                if activity is not None:
+                    fresh.append([event["id"], activity])
+                seen += 1
+                if seen >= self.max_events:
+                    stopped_by = "limit"
+                    break
+            url = response.links.get("next", {}).get("url")
+
+        fresh_ids = [int(event_id) for event_id, _ in fresh]
+        if stopped_by == "cutoff":
+            # Events between the cutoff and the old mark were never read: keep only what was.
+            events, complete_since, last_id = fresh, cutoff, max(fresh_ids, default=0)
+        else:
+            known = {event_id for event_id, _ in fresh}
+            previous = state["events"] if state else []
+            events = (fresh + [entry for entry in previous if entry[0] not in known])[:self.max_events]
+            complete_since = state.get("since") if stopped_by == "mark" else None
+            last_id = max(fresh_ids, default=high_water_mark)
+        self._store(login, {
+            "last_id": last_id,
+            "since": complete_since,
+            "fetched_at": now,
+            "poll_interval": poll_interval,
+            "events": events,
+        })
+        return self._select(events, since)
+
+    @staticmethod
+    def _select(events: list, since: Optional[datetime]) -> list:
+        cutoff = _timestamp(since)
+        return [activity for _, activity in events if not cutoff or activity["event_created_at"] >= cutoff]
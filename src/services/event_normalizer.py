@@ -0,0 +1,231 @@
+from typing import Callable, Optional
+from models.enums.GithubEventEnum import GithubEventEnum
+
+# Free-text bodies (comments, reviews) longer than this are cut, None keeps them whole.
+MAX_EVENT_TEXT_LENGTH = 1000
+
+
+class Field:
+    """One value of a normalized payload: where it is in the raw payload and how to read it.
+
+    `path` is a dotted path into the payload; a `[]` segment maps the rest of the path over
+    a list, keeping only the items that have it (`commits[].message`). `text` fields are
+    free text and get truncated.
+    """
+    __slots__ = ("key", "path", "text")
+
+    def __init__(self, key: str, path: str, text: bool = False):
+        self.key = key
+        self.path = path
+        self.text = text
+
+
+# Per event type: the fields of its payload, and the paths of which at least one must be
+# set for the payload to be worth keeping (an empty payload otherwise).
+EVENT_SPECS = {
+    GithubEventEnum.CommitComment: (
+        [Field("comment", "comment.body", text=True), Field("url", "comment.html_url")],
+        ["comment.body"],
+    ),
+    GithubEventEnum.Create: (
+        [Field("ref_type", "ref_type"), Field("ref", "ref")],
+        ["ref_type", "ref"],
+    ),
+    GithubEventEnum.Delete: (
+        [Field("ref_type", "ref_type"), Field("ref", "ref")],
+        ["ref_type", "ref"],
+    ),
+    GithubEventEnum.Fork: (
+        [Field("fork", "forkee.full_name"), Field("parent", "forkee.parent.full_name"), Field("url", "forkee.html_url")],
+        ["forkee.full_name"],
+    ),
+    GithubEventEnum.Gollum: (
+        [Field("gollum_pages", "pages[].title")],
+        ["pages[].title"],
+    ),
+    GithubEventEnum.IssueComment: (
+        [
+            Field("issue_comment", "comment.body", text=True),
+            Field("url", "comment.html_url"),
+            Field("issue_url", "issue.html_url"),
+        ],
+        ["comment.body"],
+    ),
+    GithubEventEnum.Issues: (
+        [Field("issue_title", "issue.title"), Field("state", "issue.state"), Field("url", "issue.html_url")],
+        ["issue.title"],
+    ),
+    GithubEventEnum.Member: (
+        [Field("member", "member.login"), Field("action", "action")],
+        ["member.login"],
+    ),
+    GithubEventEnum.Public: (
+        [Field("public_repo", "repo.name")],
+        ["repo.name"],
+    ),
+    GithubEventEnum.PullRequest: (
+        [
+            Field("pull_request_title", "pull_request.title"),
+            Field("number", "pull_request.number"),
+            Field("state", "pull_request.state"),
+            Field("url", "pull_request.html_url"),
+        ],
+        ["pull_request.title"],
+    ),
+    GithubEventEnum.PullRequestReview: (
+        [
+            Field("pull_request_review", "review.body", text=True),
+            Field("state", "review.state"),
+            Field("pr_url", "pull_request.html_url"),
+        ],
+        ["review.body"],
+    ),
+    GithubEventEnum.PullRequestReviewComment: (
+        [
+            Field("pull_request_review_comment", "comment.body", text=True),
+            Field("url", "comment.html_url"),
+            Field("pr_url", "pull_request.html_url"),
+        ],
+        ["comment.body"],
+    ),
+    GithubEventEnum.PullRequestReviewThread: (
+        [Field("pull_request_review_thread", "thread.body", text=True), Field("pr_url", "pull_request.html_url")],
+        ["thread.body"],
+    ),
+    GithubEventEnum.Push: (
+        [Field("push_ref", "ref"), Field("commit_messages", "commits[].message", text=True), Field("size", "size")],
+        ["ref", "commits[].message"],
+    ),
+    GithubEventEnum.Release: (
+        [Field("release_name", "release.name"), Field("tag_name", "release.tag_name"), Field("url", "release.html_url")],
+        ["release.name", "release.tag_name"],
+    ),
+    GithubEventEnum.Sponsorship: (
+        [
+            Field("sponsorship_tier", "sponsorship.tier.name"),
+            Field("sponsor", "sponsorship.sponsor.login"),
+            Field("sponsoree", "sponsorship.sponsorable.login"),
+        ],
+        ["sponsorship"],
+    ),
+    GithubEventEnum.Watch: (
+        [Field("watch_repo", "repo.name")],
+        ["repo.name"],
+    ),
+}
+
+
+def compile_path(path: str) -> Callable[[dict], object]:
+    """An accessor reading `path` from a payload, None wherever the path doesn't lead anywhere."""
+    if "[]" in path:
+        head, _, rest = path.partition("[]")
+        read_list = compile_path(head.rstrip("."))
+        item_key = rest.lstrip(".")
+        read_item = compile_path(item_key)
+
+        def read_each(payload):
+            items = read_list(payload)
+            if not isinstance(items, list):
+                return []
+            return [read_item(item) for item in items if isinstance(item, dict) and item_key in item]
+        return read_each
+
+    keys = path.split(".")
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda payload: payload.get(key)
+    if len(keys) == 2:
+        first, second = keys
+
+        def read_two(payload):
+            value = payload.get(first)
+            return value.get(second) if isinstance(value, dict) else None
+        return read_two
+
+    def read_nested(payload):
+        value = payload
+        for key in keys:
+            if not isinstance(value, dict):
+                return None
+            value = value.get(key)
+        return value
+    return read_nested
+
+
+def _truncate(value, limit: int):
+    if isinstance(value, str):
+        return value if len(value) <= limit else value[:limit] + "…"
+    if isinstance(value, list):
+        return [_truncate(item, limit) for item in value]
+    return value
+
+
+def compile_spec(fields: list, required: list, max_text_length: Optional[int]) -> Callable[[dict], dict]:
+    """Build the function turning a raw payload into its normalized payload."""
+    readers = [(field.key, compile_path(field.path), field.text and max_text_length is not None) for field in fields]
+    checks = [compile_path(path) for path in required]
+
+    def extract(payload: dict) -> dict:
+        for check in checks:
+            if check(payload):
+                break
+        else:
+            return {}
+        result = {}
+        for key, read, truncate in readers:
+            value = read(payload)
+            result[key] = _truncate(value, max_text_length) if truncate else value
+        return result
+    return extract
+
+
+class EventNormalizer:
+    """Turns raw GitHub events into activities, with one compiled extractor per event type.
+
+    The extractors are built once from `EVENT_SPECS` (or the given `specs`), so supporting a
+    new event type is a table entry rather than another branch.
+    """
+
+    def __init__(self, max_text_length: Optional[int] = MAX_EVENT_TEXT_LENGTH, specs: Optional[dict] = None):
+        self.max_text_length = max_text_length
+        self._extractors = {
+            event_type.value: compile_spec(fields, required, max_text_length)
+            for event_type, (fields, required) in (specs or EVENT_SPECS).items()
+        }
+
+    def payload(self, payload: dict, event_type: str) -> dict:
+        """The normalized payload of an event of `event_type` (e.g. "PushEvent"), empty for unknown types."""
+        extract = self._extractors.get(event_type)
+        return extract(payload) if extract is not None else {}
+
+    def normalize(self, event: dict) -> Optional[dict]:
+        """The activity of a raw event, None for event types without a spec."""
+        extract = self._extractors.get(event["type"])
+        if extract is None:
+            return None
+        return {
+            "event_type": event["type"],
+            "event_created_at": event["created_at"],
+            "event_repo": event["repo"]["name"],
+            "is_event_public": event["public"],
+            "event_payload": extract(event["payload"]),
+        }
+
+    def normalize_all(self, events: list) -> list:
+        """The activities of a list of raw events, skipping event types without a spec."""
+        extractors = self._extractors
+        activities = []
+        for event in events:
+            extract = extractors.get(event["type"])
+            if extract is not None:
+                activities.append({
+                    "event_type": event["type"],
+                    "event_created_at": event["created_at"],
+                    "event_repo": event["repo"]["name"],
+                    "is_event_public": event["public"],
+                    "event_payload": extract(event["payload"]),
+                })
+        return activities
+
+
+event_normalizer = EventNormalizer()
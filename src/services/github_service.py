@@ -1,50 +1,132 @@
+from datetime import datetime, timezone
 from typing import Optional
 from beartype import beartype
-from cachetools import TTLCache
 import requests
-from models.enums.GithubEventEnum import GithubEventEnum
+from models.schemas.github_queries import COMMIT_STATS_QUERY
+from services.github_transport import create_session, attach_session
+from services.rate_limiter import RateLimitScheduler
+from services.single_flight import SingleFlightCache
+from services.tracing import trace_methods, traced
+from services.tree_summary import TreeListing, TreeSummary, TREE_SUMMARY_DEPTH
+from services.event_ingestor import EventIngestor
+from services.event_normalizer import event_normalizer
+from services.readme_outline import README_MAX_BYTES
+from helpers.disk_cache import DiskCache
+from urllib.parse import quote
+import contextlib
 import functools
+import inspect
+import json
+import threading
 from github import Github, Auth, GithubException, RateLimitExceededException, BadCredentialsException, UnknownObjectException
 
 
+def _utc_isoformat(moment: Optional[datetime]) -> Optional[str]:
+    """`moment` as an ISO 8601 timestamp in UTC; naive datetimes are taken as UTC already."""
+    if moment is None:
+        return None
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc).isoformat()
+    return moment.astimezone(timezone.utc).isoformat()
+
+
+def graphql_url_for(base_url: str) -> str:
+    """The GraphQL endpoint next to a REST API root: GitHub Enterprise serves REST under
+    `/api/v3` but GraphQL at `/api/graphql`, github.com (and anything else) at `/graphql`."""
+    base_url = base_url.rstrip("/")
+    if base_url.endswith("/api/v3"):
+        return base_url[:-len("/v3")] + "/graphql"
+    return f"{base_url}/graphql"
+
+
+@contextlib.contextmanager
+def _github_api_errors():
+    """Turn GitHub API errors into user-friendly ones; a missing object ends the block quietly."""
+    try:
+        yield
+    except RateLimitExceededException:
+        raise ConnectionError("GitHub API rate limit exceeded. Please wait or provide a token for a higher limit.")
+    except BadCredentialsException:
+        raise ValueError("Authentication failed. Please check your GitHub token.")
+    except UnknownObjectException:
+        pass
+    except GithubException as e:
+        raise ConnectionError(f"GitHub API error: {e.data.get('message', 'Unknown error')}")
+    except requests.exceptions.RequestException as e:
+        if e.response is not None and e.response.status_code == 403:
+            raise ConnectionError("GitHub API rate limit exceeded. Please wait or provide a token for a higher limit.")
+        raise ConnectionError(f"A network error occurred: {e}")
+
+
 def handle_github_api_errors(func):
-    """A decorator to handle common GitHub API errors and provide user-friendly messages."""
+    """A decorator to handle common GitHub API errors and provide user-friendly messages.
+
+    A generator function is covered while it's iterated, not just when it's called.
+    """
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def generator_wrapper(*args, **kwargs):
+            with _github_api_errors():
+                yield from func(*args, **kwargs)
+        return generator_wrapper
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        try:
+        with _github_api_errors():
             return func(*args, **kwargs)
-        except RateLimitExceededException:
-            raise ConnectionError("GitHub API rate limit exceeded. Please wait or provide a token for a higher limit.")
-        except BadCredentialsException:
-            raise ValueError("Authentication failed. Please check your GitHub token.")
-        except UnknownObjectException:
-            return None
-        except GithubException as e:
-            raise ConnectionError(f"GitHub API error: {e.data.get('message', 'Unknown error')}")
-        except requests.exceptions.RequestException as e:
-            if e.response is not None and e.response.status_code == 403:
-                raise ConnectionError("GitHub API rate limit exceeded. Please wait or provide a token for a higher limit.")
-            raise ConnectionError(f"A network error occurred: {e}")
+        return None
     return wrapper
 
+@trace_methods("github")
 class GitHubService:
+    API_URL = "https://api.github.com"
+    PER_PAGE = 100
+    GRAPHQL_PAGE_SIZE = 100
+    POOL_SIZE = 16
+    TREE_CHUNK_SIZE = 64 * 1024
+    # Cap on the listings fetched when a tree is too big for one recursive call.
+    MAX_TREE_FETCHES = 50
+
     @beartype
-    def __init__(self, token: Optional[str] = None):
-        """Initialize the GitHubService with an optional token."""
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        base_url: Optional[str] = None,
+        http_cache: Optional[DiskCache] = None,
+        scheduler: Optional[RateLimitScheduler] = None,
+        event_cache: Optional[DiskCache] = None
+    ):
+        """Initialize the GitHubService with an optional token, API base URL, on-disk HTTP cache, rate limit
+        scheduler and on-disk store for the events already fetched per user."""
         
         self.token = token
+        self.base_url = (base_url or self.API_URL).rstrip("/")
+        self.graphql_url = graphql_url_for(self.base_url)
         self.auth = None if not token or not token.strip() else self._create_auth(token)
         self.github_client = None
-        self.user_cache = TTLCache(maxsize=100, ttl=3600)
-        self.repo_cache = TTLCache(maxsize=100, ttl=3600)
+        self._client_lock = threading.Lock()
+        self.http_cache = http_cache
+        self.event_cache = event_cache
+        self.scheduler = scheduler or RateLimitScheduler()
+        self.session = create_session(self.POOL_SIZE, http_cache=http_cache, scheduler=self.scheduler)
+        # Shared by every thread: concurrent lookups of the same user or repo make one request.
+        self.user_cache = SingleFlightCache(maxsize=100, ttl=3600)
+        self.repo_cache = SingleFlightCache(maxsize=100, ttl=3600)
 
     def _create_auth(self, token: str):
         return Auth.Token(token=token)
 
     def _get_client(self):
-        if self.github_client is None:
-            self.github_client = Github(auth=self.auth)
-        return self.github_client
+        with self._client_lock:
+            if self.github_client is None:
+                # PyGithub sleeps 0.25s between requests by default, which serializes concurrent collection.
+                client = Github(
+                    auth=self.auth, base_url=self.base_url, per_page=self.PER_PAGE,
+                    pool_size=self.POOL_SIZE, seconds_between_requests=None
+                )
+                attach_session(client, self.session, self.base_url)
+                self.github_client = client
+            return self.github_client
 
     @beartype
     def clear_cache(self):
@@ -57,41 +139,33 @@ class GitHubService:
     @beartype
     def get_user(self, username: Optional[str] = None):
         """Get a user's information from GitHub, using a cache."""
+        if self.auth is None and not username:
+            raise ValueError("Username required for unauthenticated access")
         cache_key = username if username else "_authenticated_user"
-        if cache_key in self.user_cache:
-            return self.user_cache[cache_key]
+        return self.user_cache.get_or_load(cache_key, lambda: self._fetch_user(username))
 
+    def _fetch_user(self, username: Optional[str]):
         client = self._get_client()
-        if self.auth is not None:
-            user = client.get_user(login=username) if username else client.get_user()
-        else:
-            if not username:
-                raise ValueError("Username required for unauthenticated access")
-            user = client.get_user(login=username)
-
-        self.user_cache[cache_key] = user
-        return user
+        return client.get_user(login=username) if username else client.get_user()
 
     @handle_github_api_errors
     @beartype
     def get_repository(self, repo_full_name: str):
         """Get a specific repository from GitHub, with caching."""
-        if repo_full_name in self.repo_cache:
-            return self.repo_cache[repo_full_name]
-
-        client = self._get_client()
-        repo = client.get_repo(repo_full_name)
-        self.repo_cache[repo_full_name] = repo
-        return repo
+        return self.repo_cache.get_or_load(repo_full_name, lambda: self._get_client().get_repo(repo_full_name))
     
+    def cache_repository(self, repo):
+        """Remember a repository object that already came back as part of a listing."""
+        self.repo_cache.set(repo.full_name, repo)
+
     @handle_github_api_errors
     @beartype
-    def get_repositories(self, username: Optional[str] = None):
-        """Get all repositories of a specific user from GitHub."""
+    def get_repositories(self, username: Optional[str] = None, sort: Optional[str] = None):
+        """Get all repositories of a specific user from GitHub, optionally sorted server-side (e.g. 'updated')."""
         user = self.get_user(username=username)
         if not user:
             return []
-        return user.get_repos()
+        return user.get_repos(sort=sort, direction="desc") if sort else user.get_repos()
 
     @handle_github_api_errors
     @beartype
@@ -100,16 +174,123 @@ class GitHubService:
         repo = self.get_repository(repo_full_name)
         return repo.get_branches() if repo else []
 
+    def _api_headers(self) -> dict:
+        headers = {"Accept": "application/vnd.github+json"}
+        if self.auth is not None:
+            headers["Authorization"] = f"Bearer {self.auth.token}"
+        return headers
+
+    def _open_tree(self, repo_full_name: str, tree_ish: str, recursive: bool):
+        """Start streaming a git trees listing; the caller iterates the entries and closes the response."""
+        response = self.session.get(
+            f"{self.base_url}/repos/{repo_full_name}/git/trees/{quote(tree_ish)}",
+            params={"recursive": 1} if recursive else None,
+            headers=self._api_headers(),
+            stream=True,
+            timeout=60,
+        )
+        if response.status_code != 200:
+            response.close()
+            response.raise_for_status()
+        return response, TreeListing(response.iter_content(self.TREE_CHUNK_SIZE))
+
+    def _walk_tree(self, repo_full_name: str, tree_ish: str, max_depth: int, top_level: dict) -> TreeSummary:
+        """Summarize a tree too big for one recursive listing, one subtree at a time.
+
+        The root listing's entries also go into `top_level`, path to sha.
+        """
+        summary = TreeSummary(max_depth)
+        # (path, tree sha or ref, recursive): each directory is first tried in one recursive listing,
+        # and only split further when GitHub truncates that one too.
+        pending = [("", tree_ish, False)]
+        fetches = 0
+        while pending:
+            if fetches >= self.MAX_TREE_FETCHES:
+                summary.truncated = True
+                break
+            prefix, sha, recursive = pending.pop(0)
+            fetches += 1
+            response, listing = self._open_tree(repo_full_name, sha, recursive)
+            try:
+                if recursive:
+                    subtree = TreeSummary(max_depth)
+                    for entry in listing:
+                        subtree.add(entry["path"], entry["type"], entry.get("size"))
+                    if listing.truncated:
+                        pending.append((prefix, sha, False))
+                    else:
+                        summary.merge(subtree, prefix)
+                    continue
+                for entry in listing:
+                    path = f"{prefix}/{entry['path']}" if prefix else entry["path"]
+                    summary.add(path, entry["type"], entry.get("size"))
+                    if not prefix:
+                        top_level[path] = entry["sha"]
+                    if entry["type"] == "tree":
+                        pending.append((path, entry["sha"], True))
+            finally:
+                response.close()
+        return summary
+
     @handle_github_api_errors
     @beartype
-    def get_repository_files_structure(self, repo_full_name: str, branch: Optional[str] = None):
-        """Get the files structure of a specific repository from GitHub."""
+    def get_repository_files_structure(
+        self,
+        repo_full_name: str,
+        branch: Optional[str] = None,
+        max_depth: int = TREE_SUMMARY_DEPTH
+    ):
+        """Get a compact summary of the files structure of a specific repository from GitHub."""
+        tree = self.get_repository_tree(repo_full_name, branch=branch, max_depth=max_depth)
+        return tree[0] if tree else {}
+
+    @handle_github_api_errors
+    @beartype
+    def get_repository_tree(
+        self,
+        repo_full_name: str,
+        branch: Optional[str] = None,
+        max_depth: int = TREE_SUMMARY_DEPTH
+    ):
+        """Get the files structure summary of a repository and the sha of every top-level entry, by name.
+
+        The recursive tree listing is streamed and folded into per-directory counts as it
+        arrives, so memory stays flat however many files the repository has. The top-level
+        entries are the ones without a "/", so no second listing is needed for them. Both are
+        cached by tree sha, which changes whenever any file does.
+        """
         repo = self.get_repository(repo_full_name)
         if not repo:
-            return []
+            return None
         branch = branch if branch else repo.default_branch
-        files = repo.get_git_tree(branch, recursive=True)
-        return [file.path for file in files.tree]
+
+        response, listing = self._open_tree(repo_full_name, branch, recursive=True)
+        try:
+            listing.read_header()
+            cache_key = f"tree-overview\n{repo_full_name}\n{listing.sha}\n{max_depth}"
+            if self.http_cache is not None and listing.sha:
+                cached = self.http_cache.get(cache_key)
+                if cached is not None:
+                    cached = json.loads(cached)
+                    return cached["files_structure"], cached["top_level_shas"]
+            summary = TreeSummary(max_depth)
+            top_level = {}
+            for entry in listing:
+                summary.add(entry["path"], entry["type"], entry.get("size"))
+                if "/" not in entry["path"]:
+                    top_level[entry["path"]] = entry["sha"]
+        finally:
+            response.close()
+
+        if listing.truncated:
+            # GitHub caps recursive listings (100k entries / 7 MB) and returns a partial tree.
+            top_level = {}
+            summary = self._walk_tree(repo_full_name, listing.sha or branch, max_depth, top_level)
+        result = summary.to_dict()
+        if self.http_cache is not None and listing.sha:
+            cached = {"files_structure": result, "top_level_shas": top_level}
+            self.http_cache.set(cache_key, json.dumps(cached).encode("utf-8"))
+        return result, top_level
 
     @handle_github_api_errors
     @beartype
@@ -133,13 +314,113 @@ class GitHubService:
         
     @handle_github_api_errors
     @beartype
-    def get_repo_commits(self, repo_full_name: str, author: Optional[str] = None, branch: Optional[str] = None):
-        """Get the commits of a specific repository from GitHub."""
+    def iter_repo_commits(
+        self,
+        repo_full_name: str,
+        author: Optional[str] = None,
+        branch: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ):
+        """Iterate the commits of a repository as raw JSON, newest first, without building PyGithub objects.
+
+        Pages are fetched as the iteration reaches them, so stopping early stops pagination.
+        """
+        filters = {"author": author, "sha": branch, "since": since, "until": until}
+        params = {key: _utc_isoformat(value) if isinstance(value, datetime) else value for key, value in filters.items() if value}
+        response = self.session.get(
+            f"{self.base_url}/repos/{repo_full_name}/commits",
+            params=dict(params, per_page=self.PER_PAGE),
+            headers=self._api_headers(),
+            timeout=30,
+        )
+        # Unknown repositories and empty ones (409) have no commits to list.
+        if response.status_code in (404, 409):
+            return iter(())
+        response.raise_for_status()
+        return self._iter_pages(response)
+
+    @handle_github_api_errors
+    def _iter_pages(self, response):
+        """The items of a paginated listing, from its first response on, following the `next` links."""
+        while True:
+            yield from response.json()
+            next_url = response.links.get("next", {}).get("url")
+            if not next_url:
+                return
+            response = self.session.get(next_url, headers=self._api_headers(), timeout=30)
+            response.raise_for_status()
+
+    @beartype
+    def get_commits_stats(
+        self,
+        repo_full_name: str,
+        branch: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        max_commits: Optional[int] = None
+    ):
+        """Get additions, deletions and changed files for many commits at once through the GraphQL history.
+
+        Returns a dict keyed by commit sha, or None when GraphQL isn't usable (no token, API error)
+        so callers can fall back to the per-commit REST stats.
+        """
+        if self.auth is None:
+            return None
         repo = self.get_repository(repo_full_name)
         if not repo:
-            return []
-        branch = branch if branch else repo.default_branch
-        return repo.get_commits(sha=branch, author=author) if author else repo.get_commits(sha=branch)
+            return None
+
+        owner, name = repo_full_name.split("/", 1)
+        variables = {
+            "owner": owner,
+            "name": name,
+            "ref": branch if branch else repo.default_branch,
+            "since": _utc_isoformat(since),
+            "until": _utc_isoformat(until),
+            "after": None,
+        }
+        headers = {"Authorization": f"Bearer {self.auth.token}"}
+        stats = {}
+        # Commits seen, with or without stats: huge ones have no file count but still take their place.
+        seen = 0
+
+        while max_commits is None or seen < max_commits:
+            remaining = self.GRAPHQL_PAGE_SIZE if max_commits is None else max_commits - seen
+            variables["first"] = min(self.GRAPHQL_PAGE_SIZE, remaining)
+            try:
+                response = self.session.post(
+                    self.graphql_url,
+                    json={"query": COMMIT_STATS_QUERY, "variables": variables},
+                    headers=headers,
+                    timeout=30,
+                )
+                response.raise_for_status()
+                response_json = response.json()
+            except (requests.exceptions.RequestException, ValueError):
+                return None
+
+            history = ((((response_json.get("data") or {}).get("repository") or {}).get("object") or {}).get("history"))
+            if response_json.get("errors") or history is None:
+                return None
+
+            nodes = history.get("nodes") or []
+            seen += len(nodes)
+            for node in nodes:
+                if node.get("changedFilesIfAvailable") is None:
+                    continue
+                stats[node["oid"]] = {
+                    "additions": node["additions"],
+                    "deletions": node["deletions"],
+                    "changed_files": node["changedFilesIfAvailable"],
+                }
+
+            page_info = history.get("pageInfo") or {}
+            if not page_info.get("hasNextPage"):
+                break
+            variables["after"] = page_info.get("endCursor")
+
+        return stats
 
     @beartype
     def get_repo_stars_count(self, repo_full_name: str):
@@ -161,24 +442,113 @@ class GitHubService:
 
     @handle_github_api_errors
     @beartype
-    def get_repo_readme(self, repo_full_name: str, branch: Optional[str] = None):
-        """Get the README content of a specific repository from GitHub."""
+    def get_repo_readme_file(self, repo_full_name: str, branch: Optional[str] = None):
+        """Get the README of a specific repository from GitHub as `(content, blob sha)`."""
         repo = self.get_repository(repo_full_name)
         if not repo:
             return None
         branch = branch if branch else repo.default_branch
         readme = repo.get_readme(ref=branch)
-        return readme.decoded_content.decode("utf-8")
+        return readme.decoded_content.decode("utf-8"), readme.sha
+
+    @beartype
+    def get_repo_readme(self, repo_full_name: str, branch: Optional[str] = None):
+        """Get the README content of a specific repository from GitHub."""
+        readme = self.get_repo_readme_file(repo_full_name, branch=branch)
+        return readme[0] if readme else None
 
     @handle_github_api_errors
+    @beartype
+    def get_repo_readme_head(
+        self,
+        repo_full_name: str,
+        branch: Optional[str] = None,
+        max_bytes: int = README_MAX_BYTES,
+        revalidate: bool = False
+    ):
+        """Get at most `max_bytes` of the README of a repository as `(text, truncated)`, or None without one.
+
+        The raw media type skips the base64 JSON wrapping, a Range header asks for the head only,
+        and the body is streamed, so even a server ignoring the range sends no more than that.
+        The HTTP cache keeps the same head, so an unchanged README is revalidated for free;
+        `revalidate` skips a still-fresh cached copy, for when the README is known to have changed.
+        """
+        headers = dict(self._api_headers(), Accept="application/vnd.github.raw", Range=f"bytes=0-{max_bytes - 1}")
+        if revalidate:
+            headers["Cache-Control"] = "no-cache"
+        response = self.session.get(
+            f"{self.base_url}/repos/{repo_full_name}/readme",
+            params={"ref": branch} if branch else None,
+            headers=headers,
+            stream=True,
+            timeout=30,
+        )
+        try:
+            if response.status_code == 404:
+                return None
+            response.raise_for_status()
+            body = bytearray()
+            for chunk in response.iter_content(self.TREE_CHUNK_SIZE):
+                body += chunk
+                if len(body) > max_bytes:
+                    break
+            total = response.headers.get("Content-Range", "").rpartition("/")[2]
+        finally:
+            response.close()
+        truncated = len(body) > max_bytes or (total.isdigit() and int(total) > len(body))
+        # A cut in the middle of a multi-byte character is dropped.
+        return bytes(body[:max_bytes]).decode("utf-8", errors="ignore"), truncated
+
+    @handle_github_api_errors
+    @beartype
+    def get_repo_license_file(self, repo_full_name: str):
+        """Get the license of a specific repository from GitHub as `(content, blob sha)`."""
+        repo = self.get_repository(repo_full_name)
+        if not repo:
+            return None
+        license_file = repo.get_license()
+        return license_file.decoded_content.decode("utf-8"), license_file.sha
+
     @beartype
     def get_repo_license(self, repo_full_name: str):
         """Get the license of a specific repository from GitHub."""
+        license_file = self.get_repo_license_file(repo_full_name)
+        return license_file[0] if license_file else None
+
+    def _get_json(self, path: str, revalidate: bool = False):
+        headers = self._api_headers()
+        if revalidate:
+            headers["Cache-Control"] = "no-cache"
+        response = self.session.get(f"{self.base_url}{path}", headers=headers, timeout=30)
+        response.raise_for_status()
+        return response.json()
+
+    @handle_github_api_errors
+    @beartype
+    def get_branch_head(self, repo_full_name: str, branch: str):
+        """Get the head commit sha and root tree sha of a branch, in one small request.
+
+        Always revalidated, since a cached head would hide the commits pushed since.
+        """
+        commit = self._get_json(f"/repos/{repo_full_name}/branches/{quote(branch, safe='')}", revalidate=True)["commit"]
+        return {"sha": commit["sha"], "tree_sha": commit["commit"]["tree"]["sha"]}
+
+    @handle_github_api_errors
+    @beartype
+    def compare_commits(self, repo_full_name: str, base: str, head: str):
+        """Compare two commits: `status` ("ahead", "identical", "diverged", "behind"), `ahead_by`, and
+        the commits `head` has on top of `base`, oldest first (GitHub lists at most 250)."""
+        return self._get_json(f"/repos/{repo_full_name}/compare/{quote(base, safe='')}...{quote(head, safe='')}")
+
+    @handle_github_api_errors
+    @beartype
+    def get_commit_stats(self, repo_full_name: str, sha: str):
+        """Get the changed files and lines of one commit through REST (the fallback when GraphQL can't)."""
         repo = self.get_repository(repo_full_name)
         if not repo:
             return None
-        license_file = repo.get_license()
-        return license_file.decoded_content.decode("utf-8")
+        commit = repo.get_commit(sha)
+        return {"changed_files": commit.files.totalCount, "changed_lines": commit.stats.total}
 
     @handle_github_api_errors
     @beartype
@@ -195,161 +565,24 @@ class GitHubService:
         
 
 
-@beartype
-def get_event_payload(payload: dict, event_type: GithubEventEnum):
-    if event_type == GithubEventEnum.CommitComment:
-        comment_obj = payload.get("comment", {})
-        return {
-            "comment": comment_obj.get("body"),
-            "url": comment_obj.get("html_url"),
-        } if comment_obj.get("body") else {}
-
-    elif event_type in (GithubEventEnum.Create, GithubEventEnum.Delete):
-        return {
-            "ref_type": payload.get("ref_type"),
-            "ref": payload.get("ref"),
-        } if payload.get("ref_type") or payload.get("ref") else {}
-
-    elif event_type == GithubEventEnum.Fork:
-        forkee = payload.get("forkee", {})
-        parent_full_name = forkee.get("parent", {}).get("full_name") if "parent" in forkee else None
-        return {
-            "fork": forkee.get("full_name"),
-            "parent": parent_full_name,
-            "url": forkee.get("html_url"),
-        } if forkee.get("full_name") else {}
-
-    elif event_type == GithubEventEnum.Gollum:
-        pages = payload.get("pages", [])
-        page_titles = [page.get("title") for page in pages if "title" in page]
-        return {"gollum_pages": page_titles} if page_titles else {}
-
-    elif event_type == GithubEventEnum.IssueComment:
-        comment_obj = payload.get("comment", {})
-        return {
-            "issue_comment": comment_obj.get("body"),
-            "url": comment_obj.get("html_url"),
-            "issue_url": payload.get("issue", {}).get("html_url"),
-        } if comment_obj.get("body") else {}
-
-    elif event_type == GithubEventEnum.Issues:
-        issue_obj = payload.get("issue", {})
-        return {
-            "issue_title": issue_obj.get("title"),
-            "state": issue_obj.get("state"),
-            "url": issue_obj.get("html_url"),
-        } if issue_obj.get("title") else {}
-
-    elif event_type == GithubEventEnum.Member:
-        member_obj = payload.get("member", {})
-        return {
-            "member": member_obj.get("login"),
-            "action": payload.get("action"),
-        } if member_obj.get("login") else {}
-
-    elif event_type == GithubEventEnum.Public:
-        repo = payload.get("repo", {})
-        return {
-            "public_repo": repo.get("name"),
-        } if repo.get("name") else {}
-
-    elif event_type == GithubEventEnum.PullRequest:
-        pr_obj = payload.get("pull_request", {})
-        return {
-            "pull_request_title": pr_obj.get("title"),
-            "number": pr_obj.get("number"),
-            "state": pr_obj.get("state"),
-            "url": pr_obj.get("html_url"),
-        } if pr_obj.get("title") else {}
-
-    elif event_type == GithubEventEnum.PullRequestReview:
-        review_obj = payload.get("review", {})
-        pr_obj = payload.get("pull_request", {})
-        return {
-            "pull_request_review": review_obj.get("body"),
-            "state": review_obj.get("state"),
-            "pr_url": pr_obj.get("html_url"),
-        } if review_obj.get("body") else {}
-
-    elif event_type == GithubEventEnum.PullRequestReviewComment:
-        comment_obj = payload.get("comment", {})
-        pr_obj = payload.get("pull_request", {})
-        return {
-            "pull_request_review_comment": comment_obj.get("body"),
-            "url": comment_obj.get("html_url"),
-            "pr_url": pr_obj.get("html_url"),
-        } if comment_obj.get("body") else {}
-
-    elif event_type == GithubEventEnum.PullRequestReviewThread:
-        thread_obj = payload.get("thread", {})
-        pr_obj = payload.get("pull_request", {})
-        return {
-            "pull_request_review_thread": thread_obj.get("body"),
-            "pr_url": pr_obj.get("html_url"),
-        } if thread_obj.get("body") else {}
-
-    elif event_type == GithubEventEnum.Push:
-        ref = payload.get("ref")
-        commits = payload.get("commits", [])
-        commit_msgs = [c.get("message") for c in commits if "message" in c]
-        return {
-            "push_ref": ref,
-            "commit_messages": commit_msgs,
-            "size": payload.get("size"),
-        } if ref or commit_msgs else {}
-
-    elif event_type == GithubEventEnum.Release:
-        release_obj = payload.get("release", {})
-        return {
-            "release_name": release_obj.get("name"),
-            "tag_name": release_obj.get("tag_name"),
-            "url": release_obj.get("html_url"),
-        } if release_obj.get("name") or release_obj.get("tag_name") else {}
-
-    elif event_type == GithubEventEnum.Sponsorship:
-        sponsorship_obj = payload.get("sponsorship", {})
-        return {
-            "sponsorship_tier": sponsorship_obj.get("tier", {}).get("name"),
-            "sponsor": sponsorship_obj.get("sponsor", {}).get("login"),
-            "sponsoree": sponsorship_obj.get("sponsorable", {}).get("login"),
-        } if sponsorship_obj else {}
-
-    elif event_type == GithubEventEnum.Watch:
-        repo = payload.get("repo", {})
-        return {
-            "watch_repo": repo.get("name"),
-        } if repo.get("name") else {}
-
-    return {}
-
+@traced("get_user_recent_activities", "github")
 @handle_github_api_errors
 @beartype
-def get_user_recent_activities(github_service: GitHubService, username: Optional[str] = None):
+def get_user_recent_activities(
+    github_service: GitHubService,
+    username: Optional[str] = None,
+    since: Optional[datetime] = None
+):
+    """Get the recent public activity of a user (up to 300 events), newest first, optionally only after `since`."""
     user = github_service.get_user(username=username)
-    url = f"https://api.github.com/users/{user.login}/events"
-    header = {"Accept": "application/vnd.github+json"}
-    if github_service.auth is not None:
-        header.update({"Authorization": f"Bearer {github_service.auth.token}"})
-    response = requests.get(url, headers=header)
-
-    if response.status_code != 200:
-        response.raise_for_status() # Will be caught by the decorator
-        return [] # Should not be reached
-    
-    response_json = response.json()
-    result = []
-
-    for event in response_json:
-        result.append(
-            {
-                "event_type": event["type"],
-                "event_created_at": event["created_at"],
-                "event_repo": event["repo"]["name"],
-                "is_event_public": event["public"],
-                "event_payload": get_event_payload(event["payload"], GithubEventEnum(event["type"])),
-            }
-        )
-    return result
+    ingestor = EventIngestor(
+        github_service.session,
+        github_service.base_url,
+        event_normalizer.normalize,
+        state=github_service.event_cache,
+        headers=github_service._api_headers(),
+    )
+    return ingestor.fetch(user.login, since=since)
 
 
 @beartype
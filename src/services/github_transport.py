@@ -0,0 +1,128 @@
+import functools
+import threading
+from typing import Optional
+import requests
+from importlib.metadata import version
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from github.Requester import RequestsResponse
+from helpers.disk_cache import DiskCache
+from services.collector import call_time_left
+from services.http_cache import CachingAdapter
+from services.rate_limiter import RateLimitScheduler, ThrottledAdapter
+from services.tracing import TracingAdapter
+
+
+class SessionConnection:
+    """PyGithub connection backed by a shared requests session.
+
+    PyGithub keeps a single connection object per client and splits every call into
+    `request()` followed by `getresponse()`, which races when the client is used from
+    several threads. The pending request is kept per thread here, and the actual I/O
+    goes through the session owned by GitHubService.
+    """
+
+    def __init__(self, host, port=None, strict=False, timeout=None, retry=None, pool_size=None, protocol="https", session=None, **kwargs):
+        self.host = host
+        self.port = port if port else (443 if protocol == "https" else 80)
+        self.protocol = protocol
+        self.timeout = timeout
+        self.verify = kwargs.get("verify", True)
+        self.session = session
+        self._pending = threading.local()
+
+    def request(self, verb, url, input, headers, stream=False):
+        self._pending.request = (verb, url, input, headers, stream)
+
+    def getresponse(self):
+        verb, url, input, headers, stream = self._pending.request
+        response = self.session.request(
+            verb,
+            f"{self.protocol}://{self.host}:{self.port}{url}",
+            headers=headers,
+            data=input,
+            timeout=self.timeout,
+            verify=self.verify,
+            allow_redirects=False,
+            stream=stream,
+        )
+        return RequestsResponse(response)
+
+    def close(self):
+        # The session outlives the connection, it is closed by its owner.
+        pass
+
+
+class DeadlineAdapter(HTTPAdapter):
+    """Bounds every request by the time left to the collected call it's made for.
+
+    Past that time the request isn't sent at all, before it the connect and read timeouts are
+    cut down to what's left, so a call the collector gave up on stops instead of running on.
+    """
+
+    def send(self, request, timeout=None, **kwargs):
+        left = call_time_left()
+        if left is not None:
+            if left <= 0:
+                raise requests.exceptions.Timeout(f"Out of time before {request.method} {request.url}", request=request)
+            if isinstance(timeout, tuple):
+                timeout = tuple(left if part is None else min(part, left) for part in timeout)
+            else:
+                timeout = left if timeout is None else min(timeout, left)
+        return super().send(request, timeout=timeout, **kwargs)
+
+
+class DeadlineRetry(Retry):
+    """Transport retries that stop once the collected call the request is for has run out of time."""
+
+    def is_exhausted(self) -> bool:
+        left = call_time_left()
+        return super().is_exhausted() or (left is not None and left <= 0)
+
+
+class GitHubAdapter(TracingAdapter, CachingAdapter, ThrottledAdapter, DeadlineAdapter):
+    """Answers from the on-disk cache when it can, paces whatever has to reach GitHub, and
+    gives up on it once the collected call it's for has run out of time."""
+
+
+def create_session(pool_size: int, http_cache: Optional[DiskCache] = None, scheduler: Optional[RateLimitScheduler] = None):
+    """Create the pooled session shared by the PyGithub client and the raw API calls.
+
+    With an `http_cache`, GET responses are kept on disk and revalidated with conditional requests.
+    With a `scheduler`, requests are paced against the rate limit and throttled ones retried.
+    """
+    session = requests.Session()
+    # Same as PyGithub: a non-None auth stops requests from falling back to ~/.netrc
+    session.auth = lambda request: request
+    adapter = GitHubAdapter(
+        cache=http_cache,
+        scheduler=scheduler,
+        # Only transport failures are retried here, rate limiting is the scheduler's job.
+        max_retries=DeadlineRetry(total=3, backoff_factor=0.5, status_forcelist=(502, 503, 504)),
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# PyGithub has no per-client hook for the connection, so its private connection factory is
+# replaced. The PyGithub versions this was checked against are pinned in pyproject.toml.
+_CONNECTION_CLASS_ATTRIBUTE = "_Requester__connectionClass"
+
+
+def attach_session(client, session, base_url: str):
+    """Route every request made by a PyGithub client through the given session.
+
+    Raises a RuntimeError when the installed PyGithub doesn't have the connection factory this
+    relies on, rather than quietly leaving the client on its own connections.
+    """
+    requester = client.requester
+    if not hasattr(requester, _CONNECTION_CLASS_ATTRIBUTE):
+        raise RuntimeError(
+            f"PyGithub {version('PyGithub')} is not supported: its Requester has no connection class to "
+            f"replace, so requests can't go through the shared session. Install the version pinned in pyproject.toml."
+        )
+    protocol = "http" if base_url.startswith("http://") else "https"
+    setattr(requester, _CONNECTION_CLASS_ATTRIBUTE, functools.partial(SessionConnection, protocol=protocol, session=session))
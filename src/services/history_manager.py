@@ -0,0 +1,85 @@
+from typing import Callable, Optional
+from models.enums.LLMEnum import LLMEnum
+from services.prompt_builder import estimate_tokens
+
+# Room for the follow-up conversation on top of one full data prompt.
+HISTORY_HEADROOM_TOKENS = 8000
+
+
+class _Turn:
+    __slots__ = ("message", "summary", "tokens")
+
+    def __init__(self, message: dict, summary: Optional[str]):
+        self.message = message
+        self.summary = summary
+        self.tokens = estimate_tokens(message["content"])
+
+
+class ChatHistory:
+    """The conversation sent to the LLM, kept under a token cap.
+
+    The system prompt is always kept. A message can carry a compact `summary`: once a newer
+    message with a summary arrives (the next roast's data dump), the older one is replaced by
+    its summary. When the history is still over the cap, the oldest turns are dropped; with
+    a `summarizer`, they are folded into a rolling summary instead of being forgotten.
+    """
+
+    def __init__(self, system_message: dict, token_cap: int, summarizer: Optional[Callable[[list], str]] = None):
+        self.system_message = system_message
+        self.token_cap = token_cap
+        self.summarizer = summarizer
+        self.summary = None
+        self._turns = []
+
+    def __len__(self):
+        return len(self._turns)
+
+    def append(self, message: dict, summary: Optional[str] = None):
+        """Add a message; `summary` is what it shrinks to once a newer bulky message arrives."""
+        if summary is not None:
+            for turn in self._turns:
+                if turn.summary is not None:
+                    turn.message = dict(turn.message, content=turn.summary)
+                    turn.summary = None
+                    turn.tokens = estimate_tokens(turn.message["content"])
+        self._turns.append(_Turn(message, summary))
+        self._enforce_cap()
+
+    def pop(self) -> dict:
+        return self._turns.pop().message
+
+    def clear(self):
+        self.summary = None
+        self._turns = []
+
+    def tokens(self) -> int:
+        total = estimate_tokens(self.system_message["content"]) + sum(turn.tokens for turn in self._turns)
+        return total + (estimate_tokens(self.summary) if self.summary else 0)
+
+    def messages(self) -> list:
+        messages = [self.system_message]
+        if self.summary:
+            messages.append({
+                "role": LLMEnum.SYSTEM.value,
+                "content": f"Summary of the earlier conversation:\n{self.summary}",
+            })
+        messages.extend(turn.message for turn in self._turns)
+        return messages
+
+    def _enforce_cap(self):
+        dropped = []
+        # The newest message is the one about to be answered, it always stays.
+        while self.tokens() > self.token_cap and len(self._turns) > 1:
+            dropped.append(self._turns.pop(0).message)
+        # Don't leave an assistant reply without the message it answered at the front.
+        while len(self._turns) > 1 and self._turns[0].message["role"] == LLMEnum.ASSISTANT.value:
+            dropped.append(self._turns.pop(0).message)
+
+        if dropped and self.summarizer is not None:
+            if self.summary:
+                dropped.insert(0, {"role": LLMEnum.SYSTEM.value, "content": self.summary})
+            try:
+                self.summary = self.summarizer(dropped) or self.summary
+            except (ConnectionError, ValueError):
+                # Losing the old turns is better than failing the current one.
+                pass
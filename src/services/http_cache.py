@@ -0,0 +1,154 @@
+import hashlib
+import json
+import re
+import time
+import requests
+from typing import Optional
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from helpers.disk_cache import DiskCache
+
+HTTP_CACHE_MAX_BYTES = 100 * 1024 * 1024
+
+# Set on every cacheable response: "fresh" (served from disk), "revalidated" (304) or "miss".
+CACHE_STATUS_HEADER = "X-Roast-Cache"
+
+# The stored body is already decoded and complete, these would describe the original transfer.
+_TRANSFER_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+_RANGE_RE = re.compile(r"bytes=(\d+)-(\d+)")
+
+_CHUNK_SIZE = 64 * 1024
+
+
+def _freshness(headers) -> int:
+    """Seconds the response can be reused without revalidation, -1 when it must not be stored."""
+    cache_control = headers.get("Cache-Control", "").lower()
+    if "no-store" in cache_control:
+        return -1
+    if "no-cache" in cache_control:
+        return 0
+    match = _MAX_AGE_RE.search(cache_control)
+    return int(match.group(1)) if match else 0
+
+
+def _range_length(request) -> Optional[int]:
+    """Bytes asked for by a `Range: bytes=first-last` request, None for any other request."""
+    match = _RANGE_RE.fullmatch(request.headers.get("Range", "").strip())
+    return int(match.group(2)) - int(match.group(1)) + 1 if match else None
+
+
+def _read_head(response, limit: int):
+    """Read at most `limit + 1` bytes of a streamed body into the response and close it.
+
+    The extra byte tells a caller a server ignored the range and sent more.
+    """
+    body = bytearray()
+    try:
+        for chunk in response.iter_content(_CHUNK_SIZE):
+            body += chunk
+            if len(body) > limit:
+                break
+    finally:
+        response.close()
+    response._content = bytes(body[:limit + 1])
+    response._content_consumed = True
+
+
+class CachingAdapter(HTTPAdapter):
+    """Transport adapter keeping GET responses on disk and revalidating them with ETag/Last-Modified.
+
+    GitHub doesn't count a 304 Not Modified against the rate limit, so a revalidated hit costs
+    a round trip but no quota, and a hit within the response's max-age costs neither. A request
+    sent with `Cache-Control: no-cache` is always revalidated. Ranged requests are read and kept
+    only up to the range, even streamed ones and even when the server sends the whole body.
+    """
+
+    def __init__(self, cache: Optional[DiskCache] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def _cache_key(self, request) -> str:
+        # Responses differ per token, per media type and per byte range, none may leak into another's entry.
+        auth = hashlib.sha256(request.headers.get("Authorization", "").encode("utf-8")).hexdigest()
+        return "\n".join([request.url, request.headers.get("Accept", ""), request.headers.get("Range", ""), auth])
+
+    def _load(self, key: str):
+        data = self.cache.get(key)
+        if data is None:
+            return None
+        meta, _, body = data.partition(b"\n")
+        try:
+            return json.loads(meta), body
+        except ValueError:
+            return None
+
+    def _store(self, key: str, meta: dict, body: bytes):
+        self.cache.set(key, json.dumps(meta).encode("utf-8") + b"\n" + body)
+
+    def _build_response(self, request, meta: dict, body: bytes, cache_status: str):
+        response = requests.Response()
+        response.status_code = meta["status"]
+        response.reason = "OK"
+        response.headers = CaseInsensitiveDict(meta["headers"])
+        response.headers[CACHE_STATUS_HEADER] = cache_status
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response._content = body
+        response._content_consumed = True
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def send(self, request, stream=False, **kwargs):
+        limit = _range_length(request)
+        if self.cache is None or request.method != "GET" or (stream and limit is None):
+            return super().send(request, stream=stream, **kwargs)
+
+        key = self._cache_key(request)
+        entry = self._load(key)
+        if entry is not None:
+            meta, body = entry
+            must_revalidate = "no-cache" in request.headers.get("Cache-Control", "").lower()
+            if not must_revalidate and time.time() < meta["stored_at"] + meta["max_age"]:
+                return self._build_response(request, meta, body, "fresh")
+            if meta.get("etag"):
+                request.headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                request.headers["If-Modified-Since"] = meta["last_modified"]
+
+        response = super().send(request, stream=stream or limit is not None, **kwargs)
+        if limit is not None and response.status_code != 304:
+            _read_head(response, limit)
+
+        if response.status_code == 304 and entry is not None:
+            meta["stored_at"] = time.time()
+            if "Cache-Control" in response.headers:
+                meta["max_age"] = max(_freshness(response.headers), 0)
+            # Keep the rate limit view current, the stored ones are from the original response.
+            meta["headers"].update({
+                name: value for name, value in response.headers.items() if name.lower().startswith("x-ratelimit")
+            })
+            response.close()
+            self._store(key, meta, body)
+            return self._build_response(request, meta, body, "revalidated")
+
+        max_age = _freshness(response.headers)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        # A 206 is the partial content of a ranged request, which is keyed by its range.
+        if response.status_code in (200, 206) and max_age >= 0 and (etag or last_modified or max_age):
+            meta = {
+                "status": response.status_code,
+                "headers": {
+                    name: value for name, value in response.headers.items() if name.lower() not in _TRANSFER_HEADERS
+                },
+                "etag": etag,
+                "last_modified": last_modified,
+                "stored_at": time.time(),
+                "max_age": max_age,
+            }
+            self._store(key, meta, response.content)
+        response.headers[CACHE_STATUS_HEADER] = "miss"
+        return response
@@ -1,8 +1,14 @@
+import json
 import requests
 from beartype import beartype
 from models.enums.LLMEnum import LLMProviderEnum, LLMURLEnum
+from services.tracing import TracingAdapter, traced
 
 class LLMService:
+    CONNECT_TIMEOUT = 5
+    READ_TIMEOUT = 60
+    POOL_SIZE = 4
+
     @beartype
     def __init__(self, config):
         self.config = config
@@ -10,8 +16,27 @@ class LLMService:
         self.model_id = None
         self.api_key = None
         self.base_url = None
+        self.session = self._create_session()
         self.set_provider(self.provider)
 
+    def _create_session(self):
+        """Create the keep-alive session reused by every request to the provider."""
+        session = requests.Session()
+        adapter = TracingAdapter(pool_connections=1, pool_maxsize=self.POOL_SIZE)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    @beartype
+    def reconfigure(self, config):
+        """Apply new settings, keeping the open connections when the base URL stays the same."""
+        previous_base_url = self.base_url
+        self.config = config
+        self.set_provider(config.ROAST_LLM_PROVIDER)
+        if self.base_url != previous_base_url:
+            # Drops the pooled connections, the session opens new ones on the next request.
+            self.session.close()
+
     @beartype
     def set_provider(self, provider: str):
         self.provider = provider
@@ -29,9 +54,8 @@ class LLMService:
     def set_model(self, model_id: str):
         self.model_id = model_id
 
-    @beartype
-    def generate_text(self, messages: list):
-
+    def _post(self, messages: list, stream: bool = False):
+        """Send a chat completion request and return the raw response, raising on any failure."""
         if not self.model_id:
             raise ValueError("Model ID is not set")
             
@@ -47,9 +71,14 @@ class LLMService:
             "model": self.model_id,
             "messages": messages
         }
+        if stream:
+            data["stream"] = True
 
         try:
-            response = requests.post(url=self.base_url, headers=headers, json=data, timeout=45)
+            response = self.session.post(
+                url=self.base_url, headers=headers, json=data, stream=stream,
+                timeout=(self.CONNECT_TIMEOUT, self.READ_TIMEOUT)
+            )
         except requests.exceptions.Timeout:
             raise ConnectionError("Request timed out. The API might be overloaded.")
         except requests.exceptions.ConnectionError:
@@ -66,13 +95,39 @@ class LLMService:
                 error_msg += f": {response.text}"
             raise ConnectionError(error_msg)
 
-        response_json = response.json()
+        return response
+
+    @traced("generate_text", "llm")
+    @beartype
+    def generate_text(self, messages: list):
+        response_json = self._post(messages).json()
 
         if not response_json or not response_json.get("choices") or not response_json.get("choices")[0] or not response_json.get("choices")[0].get("message"):
             raise ConnectionError("Failed to get a response from the LLM service. Check your API key and network.")
 
         return response_json.get("choices")[0].get("message").get("content")
 
+    @traced("stream_text", "llm")
+    @beartype
+    def stream_text(self, messages: list):
+        """Yield the response text in pieces as the provider streams it (server-sent events)."""
+        response = self._post(messages, stream=True)
+        try:
+            for line in response.iter_lines():
+                if not line.startswith(b"data:"):
+                    continue
+                payload = line[len(b"data:"):].strip()
+                if payload == b"[DONE]":
+                    break
+                choices = json.loads(payload).get("choices") or [{}]
+                delta = (choices[0].get("delta") or {}).get("content")
+                if delta:
+                    yield delta
+        except requests.exceptions.RequestException as e:
+            raise ConnectionError(f"The response stream was interrupted: {str(e)}")
+        finally:
+            response.close()
+
     @beartype
     def construct_prompt(self, prompt: str, role: str):
         return {
@@ -0,0 +1,326 @@
+import base64
+import os
+import re
+import subprocess
+import tempfile
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+from services.tree_summary import TreeSummary, TREE_SUMMARY_DEPTH
+
+_RECORD = "\x1e"
+_MESSAGE_END = "\x1d"
+_NULL_SHA = "0" * 40
+_GITLINK_MODE = "160000"
+# One header line per commit (sha, author, date), then the raw message up to the end marker,
+# then the numstat lines of the commit.
+_LOG_FORMAT = "%x1e%H%x1f%an%x1f%aI%n%B%x1d"
+_REMOTE_NAME_RE = re.compile(r"[:/]([^/:]+/[^/]+?)(?:\.git)?/?$")
+_README_RE = re.compile(r"^readme(\.[a-z]+)?$", re.IGNORECASE)
+_LICENSE_RE = re.compile(r"^(licen[cs]e|copying)(\.[a-z]+)?$", re.IGNORECASE)
+
+# Extension to language, for the bytes-per-language breakdown GitHub computes with linguist.
+LANGUAGE_EXTENSIONS = {
+    ".py": "Python", ".pyi": "Python", ".ipynb": "Jupyter Notebook", ".js": "JavaScript", ".mjs": "JavaScript",
+    ".cjs": "JavaScript", ".jsx": "JavaScript", ".ts": "TypeScript", ".tsx": "TypeScript", ".java": "Java",
+    ".kt": "Kotlin", ".kts": "Kotlin", ".scala": "Scala", ".go": "Go", ".rs": "Rust", ".c": "C", ".h": "C",
+    ".cc": "C++", ".cpp": "C++", ".cxx": "C++", ".hpp": "C++", ".cs": "C#", ".m": "Objective-C",
+    ".swift": "Swift", ".rb": "Ruby", ".php": "PHP", ".pl": "Perl", ".lua": "Lua", ".r": "R", ".jl": "Julia",
+    ".dart": "Dart", ".ex": "Elixir", ".exs": "Elixir", ".erl": "Erlang", ".hs": "Haskell", ".clj": "Clojure",
+    ".sh": "Shell", ".bash": "Shell", ".zsh": "Shell", ".ps1": "PowerShell", ".sql": "SQL", ".html": "HTML",
+    ".css": "CSS", ".scss": "SCSS", ".vue": "Vue", ".svelte": "Svelte", ".tex": "TeX", ".zig": "Zig",
+    ".nix": "Nix", ".tf": "HCL", ".dockerfile": "Dockerfile", "Dockerfile": "Dockerfile", "Makefile": "Makefile",
+}
+
+
+class GitError(RuntimeError):
+    pass
+
+
+# One clone or fetch at a time per target directory, e.g. two server sessions roasting one repo.
+_clone_locks = {}
+_clone_locks_lock = threading.Lock()
+
+
+class LocalRepository:
+    """A git repository on disk, read with git itself instead of the GitHub API.
+
+    Commit history comes from `git log --numstat` and the file tree from `git ls-tree -r`,
+    both streamed, and turned into the same shapes the GitHub-backed collection produces.
+    In a partial clone nothing here reads blob sizes, and the blobs the diffs need are
+    fetched in one batch, so git never downloads them one at a time.
+    """
+
+    def __init__(self, path: str, name: Optional[str] = None, git_config: Optional[dict] = None):
+        self.path = os.path.abspath(path)
+        # Configuration for every git command (e.g. the auth header of a clone), through the
+        # environment so it doesn't show up in the process list.
+        self._env = _config_env(git_config) if git_config else None
+        try:
+            self._git("rev-parse", "--git-dir")
+        except (GitError, OSError):
+            raise ValueError(f"'{path}' is not a git repository.")
+        self._name = name
+
+    @classmethod
+    def clone(
+        cls,
+        repo_full_name: str,
+        directory: str,
+        base_url: Optional[str] = None,
+        token: Optional[str] = None
+    ) -> "LocalRepository":
+        """A blobless partial clone of a GitHub repository under `directory`, fetched again if it exists.
+
+        Commits and trees are downloaded up front; file contents only when something reads
+        them (the README, the license, the diffs behind `--numstat`).
+        """
+        server = (base_url or "https://github.com").rstrip("/")
+        server = server[:-len("/api/v3")] if server.endswith("/api/v3") else server.replace("://api.", "://")
+        url = f"{server}/{repo_full_name}.git"
+        config = {}
+        if token:
+            # Passed per command rather than stored in the clone's config.
+            credentials = base64.b64encode(f"x-access-token:{token}".encode()).decode()
+            config["http.extraHeader"] = f"Authorization: Basic {credentials}"
+        env = _config_env(config) if config else None
+
+        target = os.path.join(directory, repo_full_name.replace("/", "__") + ".git")
+        with _clone_locks_lock:
+            lock = _clone_locks.setdefault(target, threading.Lock())
+        with lock:
+            if os.path.isdir(target):
+                _run(["git", "-C", target, "fetch", "--prune", "--quiet", "origin", "+refs/heads/*:refs/heads/*"], "fetch", env=env)
+            else:
+                _run(["git", "clone", "--bare", "--filter=blob:none", "--quiet", url, target], "clone", env=env)
+        return cls(target, name=repo_full_name, git_config=config)
+
+    def _git(self, *args, input: Optional[str] = None, env: Optional[dict] = None) -> str:
+        return _run(["git", "-c", "core.quotepath=off", "-C", self.path, *args], args[0], input=input, env=env or self._env)
+
+    def _stream(self, *args) -> Iterator[str]:
+        """The output lines of a git command, read as git produces them."""
+        # stderr goes to a file: a pipe nobody reads until stdout ends would block git once full.
+        with tempfile.TemporaryFile() as stderr:
+            process = subprocess.Popen(
+                ["git", "-c", "core.quotepath=off", "-C", self.path, *args], env=self._env,
+                stdout=subprocess.PIPE, stderr=stderr, text=True, encoding="utf-8", errors="replace",
+            )
+            try:
+                yield from process.stdout
+            finally:
+                process.stdout.close()
+                if process.wait() != 0:
+                    stderr.seek(0)
+                    raise GitError(f"git {args[0]} failed: {stderr.read().decode('utf-8', 'replace').strip()}")
+
+    @property
+    def full_name(self) -> str:
+        """`owner/name` from the origin remote, or the directory name for a repository without one."""
+        if self._name:
+            return self._name
+        try:
+            match = _REMOTE_NAME_RE.search(self._git("config", "--get", "remote.origin.url").strip())
+        except GitError:
+            match = None
+        if match:
+            return match.group(1)
+        top = self._git("rev-parse", "--show-toplevel").strip() if not self.is_bare else self.path
+        return os.path.basename(top).removesuffix(".git")
+
+    @property
+    def is_bare(self) -> bool:
+        return self._git("rev-parse", "--is-bare-repository").strip() == "true"
+
+    @property
+    def promisor_remote(self) -> Optional[str]:
+        """The remote missing objects of a partial clone are fetched from, None for a full repository."""
+        try:
+            lines = self._git("config", "--get-regexp", r"^remote\..*\.promisor$").splitlines()
+        except GitError:
+            return None
+        for line in lines:
+            key, _, value = line.partition(" ")
+            if value.strip().lower() == "true":
+                return key[len("remote."):-len(".promisor")]
+        return None
+
+    def _window_args(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        max_commits: Optional[int] = None
+    ) -> list:
+        args = []
+        if max_commits:
+            args.append(f"--max-count={max_commits}")
+        if since:
+            args.append(f"--since={since.isoformat()}")
+        if until:
+            args.append(f"--until={until.isoformat()}")
+        return args
+
+    def _prefetch_diff_blobs(self, remote: str, revision: str, window: list):
+        """Fetch the missing blobs behind the diffs of the window in one request.
+
+        `git log --raw` lists the old and new blob of every change from the trees alone; the
+        ones not in the clone yet are fetched together, as git's own lazy fetch would, one by one.
+        Submodule commits (gitlinks) aren't in this repository at all and are left out.
+        """
+        wanted = set()
+        for line in self._stream("log", "--raw", "--no-abbrev", "--no-renames", "--format=", *window, revision, "--"):
+            if line.startswith(":"):
+                old_mode, new_mode, old, new, _ = line[1:].split("\t", 1)[0].split(" ", 4)
+                if old_mode != _GITLINK_MODE:
+                    wanted.add(old)
+                if new_mode != _GITLINK_MODE:
+                    wanted.add(new)
+        wanted.discard(_NULL_SHA)
+        if not wanted:
+            return
+        missing = wanted.difference(self._present_objects(wanted))
+        if missing:
+            self._git(
+                "-c", "fetch.negotiationAlgorithm=noop", "fetch", remote, "--no-tags", "--no-write-fetch-head",
+                "--recurse-submodules=no", "--filter=blob:none", "--stdin", input="\n".join(sorted(missing)) + "\n",
+            )
+
+    def _present_objects(self, ids: set) -> set:
+        """The objects of `ids` already in the repository, looked up without fetching the others.
+
+        `rev-list --missing=print` never lazy-fetches and `--ignore-missing` drops the absent ids
+        given to it, so the cost follows the ids asked about, not the size of the repository.
+        """
+        output = self._git(
+            "rev-list", "--objects", "--no-walk", "--ignore-missing", "--missing=print", "--stdin",
+            input="\n".join(sorted(ids)) + "\n", env=dict(self._env or os.environ, GIT_NO_LAZY_FETCH="1"),
+        )
+        return {line.split(" ", 1)[0] for line in output.splitlines() if line and not line.startswith("?")}
+
+    def iter_commits(
+        self,
+        branch: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        max_commits: Optional[int] = None
+    ) -> Iterator[dict]:
+        """Commits of `branch` (HEAD by default) inside the window, newest first, with their line stats."""
+        revision = branch or "HEAD"
+        window = self._window_args(since, until, max_commits)
+        remote = self.promisor_remote
+        if remote:
+            self._prefetch_diff_blobs(remote, revision, window)
+        args = ["log", f"--format={_LOG_FORMAT}", "--numstat", "--no-renames", "--no-color", *window, revision, "--"]
+
+        commit = None
+        message = None
+        for line in self._stream(*args):
+            line = line.rstrip("\n")
+            if line.startswith(_RECORD):
+                if commit is not None:
+                    yield commit
+                sha, author, date = line[1:].split("\x1f")
+                date = datetime.fromisoformat(date)
+                commit = {
+                    "sha": sha,
+                    "author": author,
+                    "date": date.astimezone(timezone.utc),
+                    # Minutes east of UTC the author committed in, for their local time of day.
+                    "utc_offset": int(date.utcoffset().total_seconds() // 60),
+                    "message": "",
+                    "changed_files": 0,
+                    "changed_lines": 0,
+                }
+                message = []
+            elif message is not None:
+                if line.endswith(_MESSAGE_END):
+                    message.append(line[:-1])
+                    commit["message"] = "\n".join(message).strip()
+                    message = None
+                else:
+                    message.append(line)
+            elif line and commit is not None:
+                added, deleted, _ = line.split("\t", 2)
+                commit["changed_files"] += 1
+                # Binary files show up as "-".
+                commit["changed_lines"] += int(added) if added.isdigit() else 0
+                commit["changed_lines"] += int(deleted) if deleted.isdigit() else 0
+        if commit is not None:
+            yield commit
+
+    def _iter_tree(self, branch: Optional[str] = None) -> Iterator[tuple]:
+        """(path, type) of every entry of the tree of `branch`, directories included.
+
+        No `-l`: printing blob sizes makes a partial clone fetch every blob it doesn't have.
+        """
+        for line in self._stream("ls-tree", "-r", "-t", branch or "HEAD"):
+            meta, path = line.rstrip("\n").split("\t", 1)
+            yield path, meta.split()[1]
+
+    def files_structure(self, branch: Optional[str] = None, max_depth: int = TREE_SUMMARY_DEPTH) -> dict:
+        summary = TreeSummary(max_depth)
+        for path, entry_type in self._iter_tree(branch):
+            summary.add(path, entry_type)
+        return summary.to_dict()
+
+    def languages(self, branch: Optional[str] = None) -> dict:
+        """Bytes per language, guessed from file extensions, like GitHub's languages breakdown.
+
+        Blob sizes need the blobs themselves, so a partial clone, which would have to download
+        every one of them, gets an empty breakdown.
+        """
+        if self.promisor_remote:
+            return {}
+        totals = Counter()
+        for line in self._stream("ls-tree", "-r", "-l", branch or "HEAD"):
+            meta, path = line.rstrip("\n").split("\t", 1)
+            _, entry_type, _, size = meta.split()
+            if entry_type != "blob":
+                continue
+            name = path.rsplit("/", 1)[-1]
+            language = LANGUAGE_EXTENSIONS.get(os.path.splitext(name)[1].lower()) or LANGUAGE_EXTENSIONS.get(name)
+            if language:
+                totals[language] += int(size)
+        return dict(totals.most_common())
+
+    def _top_level_file(self, pattern: re.Pattern, branch: Optional[str] = None) -> str:
+        revision = branch or "HEAD"
+        names = self._git("ls-tree", "--name-only", revision).splitlines()
+        for name in sorted(names, key=len):
+            if pattern.match(name):
+                return self._git("cat-file", "blob", f"{revision}:{name}")
+        return ""
+
+    def readme(self, branch: Optional[str] = None) -> str:
+        return self._top_level_file(_README_RE, branch)
+
+    def license(self, branch: Optional[str] = None) -> str:
+        return self._top_level_file(_LICENSE_RE, branch)
+
+    def branches_count(self) -> int:
+        """Local branches plus the origin's, each name counted once."""
+        refs = self._git("for-each-ref", "--format=%(refname)", "refs/heads", "refs/remotes/origin").splitlines()
+        names = {ref.split("/", 3)[-1] if ref.startswith("refs/remotes/") else ref[len("refs/heads/"):] for ref in refs}
+        names.discard("HEAD")
+        return len(names)
+
+
+def _config_env(config: dict) -> dict:
+    """The environment passing `config` to git as `-c` would, without putting it on the command line."""
+    # After any configuration already passed this way.
+    first = int(os.environ.get("GIT_CONFIG_COUNT") or 0)
+    env = dict(os.environ, GIT_CONFIG_COUNT=str(first + len(config)))
+    for index, (key, value) in enumerate(config.items(), start=first):
+        env[f"GIT_CONFIG_KEY_{index}"] = key
+        env[f"GIT_CONFIG_VALUE_{index}"] = value
+    return env
+
+
+def _run(command: list, action: str, input: Optional[str] = None, env: Optional[dict] = None) -> str:
+    completed = subprocess.run(
+        command, input=input, capture_output=True, text=True, encoding="utf-8", errors="replace", env=env
+    )
+    if completed.returncode != 0:
+        raise GitError(f"git {action} failed: {completed.stderr.strip()}")
+    return completed.stdout
@@ -0,0 +1,156 @@
+import json
+from typing import Optional
+from services.tree_summary import TreeSummary, TREE_SUMMARY_DEPTH
+from services.activity_table import json_default
+
+# Rough average for English text and JSON under the common BPE tokenizers; good enough
+# to keep a payload inside a budget without shipping a tokenizer.
+CHARS_PER_TOKEN = 4
+
+DEFAULT_TOKEN_BUDGET = 12000
+
+# Budget for the data payload, matched against the model id (first match wins). These stay
+# well below the context windows so the history and the reply still fit next to the prompt.
+MODEL_TOKEN_BUDGETS = {
+    "8192": 5000,
+    "gpt-4o": 60000,
+    "gpt-4.1": 100000,
+    "gpt-5": 100000,
+    "gpt-oss": 40000,
+    "llama-4": 40000,
+    "llama-3.1": 40000,
+    "llama-3.3": 40000,
+    "compound": 40000,
+}
+
+MAX_MESSAGE_CHARS = 300
+TEXT_FIELD_LIMITS = {
+    "repo_license": 500,
+    "repo_readme": 4000,
+    "profile_readme": 4000,
+}
+MIN_TEXT_FIELD_CHARS = 800
+MIN_TREE_DIRECTORIES = 30
+# Below this many activities, the readme and tree give up space first: commits carry the roast.
+MIN_ACTIVITIES = 50
+
+
+DIGEST_FIELDS = (
+    "repo_full_name", "repo_description", "repo_feasability", "stars_count", "forks_count",
+    "languages", "branches_count", "username", "name", "bio",
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def compact_json(data) -> str:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=json_default)
+
+
+def resolve_token_budget(model_id: Optional[str], override: int = 0) -> int:
+    """The payload budget for a model: the configured override, else the per-model default."""
+    if override and override > 0:
+        return override
+    model_id = (model_id or "").lower()
+    for marker, budget in MODEL_TOKEN_BUDGETS.items():
+        if marker in model_id:
+            return budget
+    return DEFAULT_TOKEN_BUDGET
+
+
+def describe_data(data: dict) -> str:
+    """A few-line digest of collected repo or user data, standing in for it in older history."""
+    digest = {field: data[field] for field in DIGEST_FIELDS if data.get(field) not in (None, "", {}, [])}
+    digest["activities_count"] = len(data.get("activities") or [])
+    return compact_json(digest)
+
+
+def truncate_text(text: str, limit: int) -> str:
+    """Keep the head of a text, noting how much was cut."""
+    if not text or len(text) <= limit:
+        return text
+    return f"{text[:limit]}\n... [truncated {len(text) - limit} chars]"
+
+
+def summarize_paths(paths: list, max_depth: int = TREE_SUMMARY_DEPTH) -> dict:
+    """Summarize a flat file list: per-directory file counts up to `max_depth` and an extension histogram."""
+    summary = TreeSummary(max_depth)
+    for path in paths:
+        summary.add(path)
+    return summary.to_dict()
+
+
+def _trim_tree_summary(summary: dict, limit: int) -> dict:
+    """Keep only the `limit` most populated directories of a tree summary."""
+    directories = summary.get("entries_per_directory")
+    if not isinstance(directories, dict) or len(directories) <= limit:
+        return summary
+    kept = sorted(directories.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return dict(summary, entries_per_directory=dict(sorted(kept)), directories_omitted=len(directories) - limit)
+
+
+def _shorten_activity(activity: dict) -> dict:
+    payload = activity.get("event_payload")
+    if not isinstance(payload, dict) or not payload.get("commit_messages"):
+        return activity
+    payload = dict(payload, commit_messages=[
+        truncate_text(message, MAX_MESSAGE_CHARS) for message in payload["commit_messages"] if message
+    ])
+    return dict(activity, event_payload=payload)
+
+
+def fit_to_budget(data: dict, budget: int):
+    """Serialize repo or user data compactly, trimming it until it fits in `budget` tokens.
+
+    Trimming goes from the cheapest loss to the most expensive one: the flat file list is
+    summarized, long commit messages and the license/readme are cut to their head, and then
+    the oldest activities are dropped, keeping the newest ones. If too few activities are
+    left, the readme and tree summary are squeezed further to make room. Returns the payload and its
+    estimated token count, which can still exceed the budget if even the minimum doesn't fit.
+    """
+    payload = compact_json(data)
+    if estimate_tokens(payload) <= budget:
+        return payload, estimate_tokens(payload)
+
+    data = dict(data)
+    if isinstance(data.get("files_structure"), list):
+        data["files_structure"] = summarize_paths(data["files_structure"])
+    activities = sorted(
+        (_shorten_activity(activity) for activity in data.get("activities") or []),
+        key=lambda activity: str(activity.get("event_created_at", "")),
+        reverse=True,
+    )
+    for field, limit in TEXT_FIELD_LIMITS.items():
+        if isinstance(data.get(field), str):
+            data[field] = truncate_text(data[field], limit)
+
+    def render(count: int) -> str:
+        return compact_json(dict(data, activities=activities[:count]))
+
+    def newest_that_fit() -> int:
+        low, high = 0, len(activities)
+        if estimate_tokens(render(high)) <= budget:
+            return high
+        while low < high:
+            middle = (low + high + 1) // 2
+            if estimate_tokens(render(middle)) <= budget:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    count = newest_that_fit()
+    if count < min(len(activities), MIN_ACTIVITIES) or estimate_tokens(render(count)) > budget:
+        for field in TEXT_FIELD_LIMITS:
+            if isinstance(data.get(field), str):
+                data[field] = truncate_text(data[field], MIN_TEXT_FIELD_CHARS)
+        if isinstance(data.get("files_structure"), dict):
+            data["files_structure"] = _trim_tree_summary(data["files_structure"], MIN_TREE_DIRECTORIES)
+        count = newest_that_fit()
+    if count < len(activities):
+        data["activities_omitted"] = len(activities) - count
+
+    payload = render(count)
+    return payload, estimate_tokens(payload)
@@ -0,0 +1,199 @@
+import random
+import threading
+import time
+from typing import Callable, Optional
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+
+DEFAULT_RESERVE = 50
+DEFAULT_PACE_BELOW = 0.2
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_MAX_WAIT = 120.0
+SECONDARY_LIMIT_WAIT = 60.0
+
+
+def _resource_for(url: str) -> str:
+    """Guess which rate limit bucket a request draws from, before GitHub tells us."""
+    path = urlparse(url).path
+    if path.endswith("/graphql"):
+        return "graphql"
+    if "/search/" in path:
+        return "search"
+    return "core"
+
+
+class RateLimitScheduler:
+    """Paces GitHub requests from the rate limit headers and retries throttled ones.
+
+    While more than `pace_below` of a bucket is left, requests go out immediately. Below that,
+    requests are spread evenly over the time left until the reset, leaving `reserve` calls
+    untouched, so a long run keeps working through the whole hourly window instead of
+    hitting the cliff halfway. The reserve is capped at a tenth of the bucket, so a small
+    unauthenticated limit isn't all reserve. Once only the reserve is left, or GitHub has
+    throttled a request, nothing goes out until the bucket resets (or the backoff ends); when
+    that is more than `max_wait` seconds away, a ConnectionError says when it resets instead.
+    Paced requests wait at most `max_wait` seconds each. Throttled responses (primary or
+    secondary limits) are retried up to `max_retries` times with jittered backoff, as long as
+    the wait stays under `max_wait`. Revalidations answered with 304 Not Modified don't count
+    against the bucket.
+    """
+
+    def __init__(
+        self,
+        reserve: int = DEFAULT_RESERVE,
+        pace_below: float = DEFAULT_PACE_BELOW,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        max_wait: float = DEFAULT_MAX_WAIT,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.time
+    ):
+        self.reserve = reserve
+        self.pace_below = pace_below
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        self._sleep = sleep
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._next_slot = {}
+        self._blocked_until = 0.0
+
+    def status(self, resource: str = "core") -> Optional[dict]:
+        """Last known `limit`, `remaining` and `reset` (epoch seconds) for a bucket."""
+        with self._lock:
+            bucket = self._buckets.get(resource)
+            return dict(bucket) if bucket else None
+
+    def _delay_for(self, resource: str, now: float) -> tuple:
+        """(seconds to wait, whether a slot was claimed). Called with the lock held.
+
+        Without a claimed slot the request may not go out yet at all (throttled, or down to
+        the reserve) and the caller has to ask again after waiting.
+        """
+        blocked = self._blocked_until - now
+        if blocked > 0:
+            return blocked, False
+        bucket = self._buckets.get(resource)
+        if not bucket:
+            return 0.0, True
+
+        window = max(bucket["reset"] - now, 0)
+        usable = bucket["remaining"] - min(self.reserve, bucket["limit"] // 10)
+        if window and usable <= 0:
+            return window, False
+        delay = 0.0
+        if window and bucket["remaining"] < bucket["limit"] * self.pace_below:
+            interval = window / usable
+            delay = min(max(self._next_slot.get(resource, now) - now, 0), self.max_wait)
+            self._next_slot[resource] = now + delay + interval
+        bucket["remaining"] -= 1
+        return delay, True
+
+    def acquire(self, url: str):
+        """Wait until a request to `url` may go out, and count it against its bucket.
+
+        Raises ConnectionError when the request would have to wait more than `max_wait` seconds
+        for the bucket to reset or a backoff to end.
+        """
+        resource = _resource_for(url)
+        while True:
+            now = self._clock()
+            with self._lock:
+                delay, claimed = self._delay_for(resource, now)
+            if claimed:
+                if delay > 0:
+                    self._sleep(delay)
+                return
+            if delay > self.max_wait:
+                resets_at = time.strftime("%H:%M:%S", time.localtime(now + delay))
+                raise ConnectionError(
+                    f"GitHub API rate limit exceeded, it resets at {resets_at}. "
+                    "Please wait or provide a token for a higher limit."
+                )
+            self._sleep(delay)
+
+    def _refund(self, response):
+        """Give back the request counted for a response that cost no quota (a 304)."""
+        resource = response.headers.get("X-RateLimit-Resource") or _resource_for(response.url or "")
+        with self._lock:
+            bucket = self._buckets.get(resource)
+            if bucket and bucket["remaining"] < bucket["limit"]:
+                bucket["remaining"] += 1
+
+    def record(self, response):
+        """Update the buckets from a response's rate limit headers."""
+        headers = response.headers
+        if "X-RateLimit-Remaining" not in headers:
+            return
+        resource = headers.get("X-RateLimit-Resource") or _resource_for(response.url or "")
+        try:
+            bucket = {
+                "limit": int(headers.get("X-RateLimit-Limit", 0)),
+                "remaining": int(headers["X-RateLimit-Remaining"]),
+                "reset": float(headers.get("X-RateLimit-Reset", 0)),
+            }
+        except ValueError:
+            return
+        with self._lock:
+            previous = self._buckets.get(resource)
+            # Concurrent responses come back out of order, keep the lowest count for the current window.
+            if previous and previous["reset"] == bucket["reset"]:
+                bucket["remaining"] = min(bucket["remaining"], previous["remaining"])
+            self._buckets[resource] = bucket
+
+    def retry_delay(self, response, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying a throttled response, or None if it wasn't throttled."""
+        if response.status_code not in (403, 429):
+            return None
+
+        headers = response.headers
+        now = self._clock()
+        retry_after = headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                delay = SECONDARY_LIMIT_WAIT
+        elif headers.get("X-RateLimit-Remaining") == "0":
+            delay = max(float(headers.get("X-RateLimit-Reset", now)) - now, 0) + 1
+        elif response.status_code == 429 or "secondary rate limit" in response.text.lower():
+            delay = SECONDARY_LIMIT_WAIT * (2 ** attempt)
+        else:
+            # A plain 403 (permissions, blocked resource), retrying won't help.
+            return None
+
+        delay += random.uniform(0, min(delay, 10) * 0.25)
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, now + delay)
+        return delay
+
+    def send(self, send: Callable, request, **kwargs):
+        """Send `request` with `send`, pacing it and retrying while GitHub throttles it."""
+        response = None
+        for attempt in range(self.max_retries + 1):
+            # Waits out the backoff `retry_delay` set, or the reset when only the reserve is left.
+            self.acquire(request.url)
+            if response is not None:
+                response.close()
+            response = send(request, **kwargs)
+            if response.status_code == 304:
+                self._refund(response)
+            self.record(response)
+            delay = self.retry_delay(response, attempt)
+            # A backoff longer than max_wait isn't waited out, GitHub's answer goes back as is.
+            if delay is None or delay > self.max_wait or attempt == self.max_retries:
+                return response
+        return response
+
+
+class ThrottledAdapter(HTTPAdapter):
+    """Transport adapter that sends every request through a RateLimitScheduler."""
+
+    def __init__(self, scheduler: Optional[RateLimitScheduler] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.scheduler = scheduler
+
+    def send(self, request, **kwargs):
+        if self.scheduler is None:
+            return super().send(request, **kwargs)
+        return self.scheduler.send(super().send, request, **kwargs)
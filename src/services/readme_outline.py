@@ -0,0 +1,116 @@
+import re
+
+# Bytes of a README worth downloading: headings, badges and the intro are near the top.
+README_MAX_BYTES = 32 * 1024
+README_INTRO_CHARS = 1500
+README_MAX_HEADINGS = 40
+README_MAX_BADGES = 20
+
+_FENCE_RE = re.compile(r"^\s*(```|~~~)")
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+_SETEXT_RE = re.compile(r"^(=+|-+)\s*$")
+_THEMATIC_BREAK_RE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+_COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+# A markdown image, optionally wrapped in a link: [![alt](src)](href) or ![alt](src).
+_MD_IMAGE_RE = re.compile(r"\[?!\[([^\]]*)\]\(([^)\s]+)[^)]*\)(?:\]\([^)]*\))?")
+_HTML_IMAGE_RE = re.compile(r"<img\b[^>]*>", re.IGNORECASE)
+_HTML_ALT_RE = re.compile(r"\balt\s*=\s*[\"']([^\"']*)[\"']", re.IGNORECASE)
+_HTML_SRC_RE = re.compile(r"\bsrc\s*=\s*[\"']([^\"']*)[\"']", re.IGNORECASE)
+_HTML_TAG_RE = re.compile(r"</?[a-zA-Z][^>]*>")
+_BADGE_HOSTS = ("shields.io", "badge", "badgen.net", "codecov.io", "travis-ci", "circleci.com", "coveralls.io")
+
+
+def _is_badge(src: str) -> bool:
+    src = src.lower()
+    return any(host in src for host in _BADGE_HOSTS)
+
+
+def _badges_in(line: str) -> tuple:
+    """The badge labels on a line, and the line with every image taken out."""
+    badges = []
+
+    def take(alt: str, src: str) -> str:
+        if _is_badge(src):
+            badges.append(alt.strip() or src.rsplit("/", 1)[-1])
+        return ""
+
+    line = _MD_IMAGE_RE.sub(lambda match: take(match.group(1), match.group(2)), line)
+    for tag in _HTML_IMAGE_RE.findall(line):
+        alt, src = _HTML_ALT_RE.search(tag), _HTML_SRC_RE.search(tag)
+        take(alt.group(1) if alt else "", src.group(1) if src else "")
+    line = _HTML_TAG_RE.sub("", line)
+    return badges, " ".join(line.split())
+
+
+def outline_readme(
+    text: str,
+    truncated: bool = False,
+    intro_chars: int = README_INTRO_CHARS,
+    max_headings: int = README_MAX_HEADINGS,
+    max_badges: int = README_MAX_BADGES
+) -> str:
+    """Cut a markdown README down to what says the most about a project in the fewest tokens.
+
+    Keeps the text of the first sections (up to `intro_chars`, code blocks left out), the
+    headings of the whole document as an outline, and the labels of its badges. `truncated`
+    says the text is only the head of a longer README.
+    """
+    if not text:
+        return ""
+    lines = _COMMENT_RE.sub("", text).splitlines()
+    if truncated and lines:
+        # The last line was probably cut in the middle.
+        lines.pop()
+
+    headings, badges, intro = [], [], []
+    intro_size = 0
+    in_code = False
+    previous = ""
+    for line in lines:
+        if _FENCE_RE.match(line):
+            in_code = not in_code
+            continue
+        if in_code:
+            continue
+        heading = _HEADING_RE.match(line)
+        title = None
+        if heading:
+            title = f"{heading.group(1)} {heading.group(2)}"
+        elif _SETEXT_RE.match(line) or _THEMATIC_BREAK_RE.match(line):
+            if not previous or not _SETEXT_RE.match(line):
+                # A horizontal rule.
+                previous = ""
+                continue
+            title = f"{'#' if line.strip()[0] == '=' else '##'} {previous}"
+            # The underlined line went into the intro as text; it's a heading after all.
+            if intro and intro[-1] == previous:
+                intro_size -= len(intro.pop())
+        if title:
+            headings.append(title)
+            if intro_size < intro_chars:
+                intro.append(title)
+                intro_size += len(title)
+            previous = ""
+            continue
+
+        line_badges, line = _badges_in(line)
+        badges.extend(line_badges)
+        if line and intro_size < intro_chars:
+            intro.append(line)
+            intro_size += len(line)
+        previous = line
+
+    intro_text = "\n".join(intro)
+    if len(intro_text) > intro_chars:
+        intro_text = intro_text[:intro_chars].rsplit(" ", 1)[0] + " ..."
+    parts = [intro_text] if intro_text else []
+    if len(headings) > 1:
+        shown = headings[:max_headings]
+        more = f" (+{len(headings) - len(shown)} more)" if len(headings) > len(shown) else ""
+        parts.append("Outline: " + " | ".join(shown) + more)
+    if badges:
+        unique = list(dict.fromkeys(badges))
+        parts.append("Badges: " + ", ".join(unique[:max_badges]))
+    if truncated:
+        parts.append("[README longer than what was read]")
+    return "\n\n".join(parts)
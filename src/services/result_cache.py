@@ -0,0 +1,31 @@
+import hashlib
+import json
+from typing import Optional
+from helpers.disk_cache import DiskCache
+
+RESULT_CACHE_MAX_BYTES = 20 * 1024 * 1024
+
+
+class ResultCache:
+    """Finished roasts on disk, keyed by a hash of everything the LLM was asked.
+
+    The same model, system prompt and rendered data prompt give the same key, so a roast of
+    unchanged data is served from disk instead of being generated again. Old entries are
+    evicted least recently used first once the cache outgrows its size limit.
+    """
+
+    def __init__(self, cache: DiskCache):
+        self.cache = cache
+
+    @staticmethod
+    def key(provider: Optional[str], model_id: Optional[str], system_prompt: str, prompt: str) -> str:
+        material = json.dumps([provider, model_id, system_prompt, prompt], ensure_ascii=False)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        data = self.cache.get(key)
+        return data.decode("utf-8") if data is not None else None
+
+    def set(self, key: str, response: str):
+        if response:
+            self.cache.set(key, response.encode("utf-8"))
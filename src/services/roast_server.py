@@ -0,0 +1,344 @@
+import json
+import queue
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from urllib.parse import urlparse
+from helpers.config import DEFAULT_SERVER_WORKERS, DEFAULT_SERVER_QUEUE_SIZE
+
+MAX_SESSIONS = 256
+SESSION_IDLE_SECONDS = 3600
+# How long a request may wait for its roast (queueing included) before a 504.
+REQUEST_TIMEOUT = 300.0
+MAX_BODY_BYTES = 64 * 1024
+
+
+class Overloaded(Exception):
+    """The work queue is full; the client should retry later."""
+
+
+class WorkerPool:
+    """A fixed number of worker threads over a bounded queue.
+
+    Submitting to a full queue fails right away with `Overloaded` rather than letting work
+    (and waiting clients) pile up without limit.
+    """
+
+    def __init__(self, workers: int = DEFAULT_SERVER_WORKERS, queue_size: int = DEFAULT_SERVER_QUEUE_SIZE):
+        self._queue = queue.Queue(maxsize=max(queue_size, 1))
+        self._active = 0
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"roast-server-worker-{i}", daemon=True)
+            for i in range(max(workers, 1))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def workers(self) -> int:
+        return len(self._threads)
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        future = Future()
+        try:
+            self._queue.put_nowait((future, fn, args, kwargs))
+        except queue.Full:
+            raise Overloaded()
+        return future
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, fn, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            with self._lock:
+                self._active += 1
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._active -= 1
+
+    def shutdown(self):
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+
+class Session:
+    __slots__ = ("history", "lock", "last_used")
+
+    def __init__(self, history):
+        self.history = history
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+
+class SessionStore:
+    """Chat sessions by id, each with a conversation of its own.
+
+    Sessions idle for longer than `idle_seconds` expire, and past `max_sessions` the least
+    recently used one makes room for the new one.
+    """
+
+    def __init__(
+        self,
+        new_history: Callable,
+        max_sessions: int = MAX_SESSIONS,
+        idle_seconds: float = SESSION_IDLE_SECONDS,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self._new_history = new_history
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self._clock = clock
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _expire(self, now: float):
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_used <= self.idle_seconds and len(self._sessions) < self.max_sessions:
+                return
+            del self._sessions[session_id]
+
+    def get(self, session_id: Optional[str] = None) -> tuple:
+        """`(id, session)` of an existing session, or of a new one when no id is given.
+
+        Raises KeyError for an id that doesn't exist (anymore).
+        """
+        now = self._clock()
+        with self._lock:
+            if session_id:
+                session = self._sessions.get(session_id)
+                if session is None or now - session.last_used > self.idle_seconds:
+                    self._sessions.pop(session_id, None)
+                    raise KeyError(session_id)
+                self._sessions.move_to_end(session_id)
+            else:
+                self._expire(now)
+                session_id = uuid.uuid4().hex
+                session = self._sessions[session_id] = Session(self._new_history())
+            session.last_used = now
+            return session_id, session
+
+    def drop(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+
+def _parse_datetime(value) -> Optional[datetime]:
+    if value in (None, ""):
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{value}' is not an ISO 8601 date.")
+
+
+class RoastServer(ThreadingHTTPServer):
+    """HTTP API over one long-lived GitRoaster, so caches and connections stay warm between requests.
+
+    Request threads only parse and wait; the roasts run on a bounded `WorkerPool`, and a
+    request that finds its queue full gets a 503 with `Retry-After` right away. Roasts from a
+    partial clone (`"clone": true`) run git on the server's disk, so they're refused unless
+    `allow_clone` is set.
+    """
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple,
+        roaster,
+        workers: int = DEFAULT_SERVER_WORKERS,
+        queue_size: int = DEFAULT_SERVER_QUEUE_SIZE,
+        max_sessions: int = MAX_SESSIONS,
+        request_timeout: float = REQUEST_TIMEOUT,
+        allow_clone: bool = False
+    ):
+        super().__init__(address, RoastRequestHandler)
+        self.roaster = roaster
+        self.pool = WorkerPool(workers, queue_size)
+        self.sessions = SessionStore(roaster.new_session, max_sessions=max_sessions)
+        self.request_timeout = request_timeout
+        self.allow_clone = allow_clone
+        self.started = time.monotonic()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown()
+
+    def handle_error(self, request, client_address):
+        # A client hanging up is its own business, not a server error.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def run_in_session(self, session, fn: Callable, abandoned: threading.Event):
+        # One request at a time per conversation; other sessions carry on in parallel.
+        with session.lock:
+            # The request gave up (504) while this waited for the session, nobody wants the result.
+            if abandoned.is_set():
+                raise FutureTimeoutError()
+            return fn(session.history)
+
+
+class RoastRequestHandler(BaseHTTPRequestHandler):
+    """Routes: POST /roast/repo, POST /roast/user, POST /chat, DELETE /sessions/<id>, GET /health."""
+    protocol_version = "HTTP/1.1"
+    server_version = "GitRoaster"
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, obj, status: int = 200, headers: Optional[dict] = None):
+        body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status: int, message: str, headers: Optional[dict] = None):
+        self.send_json({"error": message}, status=status, headers=headers)
+
+    def read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            # The unread body would be taken for the next request on this connection.
+            self.close_connection = True
+            raise ValueError("Request body too large.")
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not isinstance(body, dict):
+            raise ValueError("Expected a JSON object.")
+        return body
+
+    def do_GET(self):
+        if urlparse(self.path).path != "/health":
+            return self.send_error_json(404, "Not found.")
+        pool = self.server.pool
+        self.send_json({
+            "status": "ok",
+            "workers": pool.workers,
+            "active": pool.active,
+            "queued": pool.queued,
+            "sessions": len(self.server.sessions),
+            "uptime_seconds": round(time.monotonic() - self.server.started, 1),
+        })
+
+    def do_DELETE(self):
+        path = urlparse(self.path).path
+        if not path.startswith("/sessions/"):
+            return self.send_error_json(404, "Not found.")
+        if not self.server.sessions.drop(path[len("/sessions/"):]):
+            return self.send_error_json(404, "Unknown session.")
+        self.send_json({"deleted": True})
+
+    def do_POST(self):
+        route = urlparse(self.path).path
+        handlers = {"/roast/repo": self._roast_repo, "/roast/user": self._roast_user, "/chat": self._chat}
+        try:
+            # Read the body even for an unknown route, or it would be taken for the next request.
+            body = self.read_json()
+            handler = handlers.get(route)
+            if handler is None:
+                return self.send_error_json(404, "Not found.")
+            work = handler(body)
+            session_id, session = self.server.sessions.get(body.get("session"))
+            abandoned = threading.Event()
+            future = self.server.pool.submit(self.server.run_in_session, session, work, abandoned)
+            try:
+                result = future.result(timeout=self.server.request_timeout)
+            except FutureTimeoutError:
+                # Still queued: drop it. Waiting for the session: it gives up once it gets there.
+                abandoned.set()
+                future.cancel()
+                raise
+        except Overloaded:
+            return self.send_error_json(503, "Too many roasts in progress, try again shortly.", {"Retry-After": "1"})
+        except KeyError:
+            return self.send_error_json(404, "Unknown or expired session.")
+        except FutureTimeoutError:
+            return self.send_error_json(504, "The roast took too long.")
+        except ValueError as e:
+            return self.send_error_json(400, str(e))
+        except ConnectionError as e:
+            return self.send_error_json(502, str(e))
+        except Exception as e:
+            return self.send_error_json(500, f"An unexpected error occurred: {e}")
+        self.send_json(dict(result, session=session_id))
+
+    # Each route validates its body and returns the work to run with the session's history.
+
+    def _roast_repo(self, body: dict) -> Callable:
+        roaster = self.server.roaster
+        window = {
+            "branch": body.get("branch"),
+            "since": _parse_datetime(body.get("since")),
+            "until": _parse_datetime(body.get("until")),
+        }
+        if "max_commits" in body:
+            max_commits = body["max_commits"]
+            if max_commits is not None and (not isinstance(max_commits, int) or isinstance(max_commits, bool) or max_commits < 0):
+                raise ValueError("max_commits must be a non-negative integer.")
+            window["max_commits"] = max_commits or None
+        clone = body.get("clone", False)
+        if clone and not self.server.allow_clone:
+            raise ValueError("Roasting from a clone is disabled on this server (start it with --allow-clone).")
+
+        def roast(history):
+            review, cached = roaster.roast_in_session(
+                history, "repo", body.get("repo"),
+                use_cache=body.get("use_cache", True), refresh=body.get("refresh", False), clone=bool(clone),
+                **window
+            )
+            return {"review": review, "cached": cached}
+        return roast
+
+    def _roast_user(self, body: dict) -> Callable:
+        roaster = self.server.roaster
+
+        def roast(history):
+            review, cached = roaster.roast_in_session(
+                history, "user", body.get("username"),
+                use_cache=body.get("use_cache", True), refresh=body.get("refresh", False)
+            )
+            return {"review": review, "cached": cached}
+        return roast
+
+    def _chat(self, body: dict) -> Callable:
+        message = body.get("message")
+        if not message:
+            raise ValueError("A message is required.")
+        roaster = self.server.roaster
+        return lambda history: {"reply": roaster.chat_in_session(history, message)}
@@ -0,0 +1,79 @@
+import threading
+import time
+from typing import Callable, Hashable
+from cachetools import TTLCache
+
+
+class _Call:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlightCache:
+    """A thread-safe TTL cache where each missing key is loaded by one caller only.
+
+    The first caller to miss a key runs the loader; callers asking for the same key while
+    it runs wait for that result instead of loading it again. A loader error is raised to
+    everyone waiting on that call but never cached, so the next caller tries afresh.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, timer: Callable[[], float] = time.monotonic):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl, timer=timer)
+        self._calls = {}
+        self._lock = threading.Lock()
+        # Bumped by `clear`, so a load that started before it doesn't put its stale value back.
+        self._generation = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._cache
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._cache)
+
+    def get_or_load(self, key: Hashable, load: Callable[[], object]):
+        with self._lock:
+            try:
+                return self._cache[key]
+            except KeyError:
+                pass
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                generation = self._generation
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = load()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if call.error is None and generation == self._generation:
+                    self._cache[key] = call.value
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+        return call.value
+
+    def set(self, key: Hashable, value):
+        with self._lock:
+            self._cache[key] = value
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._calls.clear()
+            self._generation += 1
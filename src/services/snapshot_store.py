@@ -0,0 +1,92 @@
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+from services.activity_table import json_default
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS repo_snapshots (
+    repo TEXT NOT NULL,
+    branch TEXT NOT NULL,
+    max_commits INTEGER NOT NULL,
+    head_sha TEXT NOT NULL,
+    tree_sha TEXT,
+    readme_sha TEXT,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (repo, branch)
+)
+"""
+_FIELDS = ("max_commits", "head_sha", "tree_sha", "readme_sha", "data", "updated_at")
+
+
+class SnapshotStore:
+    """Collected repository data in a SQLite file, with the shas it was built at.
+
+    One row per repository and branch: the `repo_data` dict, the head commit it goes up to,
+    the root tree and the README blob it saw. Comparing those with the current
+    ones tells what has to be collected again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # sqlite3's own context manager commits but leaves the connection open.
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def get(self, repo_full_name: str, branch: str) -> Optional[dict]:
+        """The snapshot of a repository branch, with its `data` decoded, or None."""
+        with self._lock, self._connect() as connection:
+            row = connection.execute(
+                f"SELECT {', '.join(_FIELDS)} FROM repo_snapshots WHERE repo = ? AND branch = ?",
+                (repo_full_name, branch),
+            ).fetchone()
+        if row is None:
+            return None
+        snapshot = dict(zip(_FIELDS, row))
+        try:
+            snapshot["data"] = json.loads(snapshot["data"])
+        except ValueError:
+            return None
+        return snapshot
+
+    def put(
+        self,
+        repo_full_name: str,
+        branch: str,
+        data: dict,
+        head_sha: str,
+        max_commits: Optional[int] = None,
+        tree_sha: Optional[str] = None,
+        readme_sha: Optional[str] = None
+    ):
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO repo_snapshots (repo, branch, " + ", ".join(_FIELDS) + ") "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    repo_full_name, branch, max_commits or 0, head_sha, tree_sha, readme_sha,
+                    json.dumps(data, ensure_ascii=False, default=json_default), time.time(),
+                ),
+            )
+
+    def delete(self, repo_full_name: str, branch: Optional[str] = None):
+        """Forget the snapshots of a repository (only of `branch` when given)."""
+        with self._lock, self._connect() as connection:
+            if branch is None:
+                connection.execute("DELETE FROM repo_snapshots WHERE repo = ?", (repo_full_name,))
+            else:
+                connection.execute("DELETE FROM repo_snapshots WHERE repo = ? AND branch = ?", (repo_full_name, branch))
@@ -0,0 +1,206 @@
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+from requests.adapters import HTTPAdapter
+from services.http_cache import CACHE_STATUS_HEADER
+
+
+class Span:
+    __slots__ = ("name", "category", "start", "end", "thread", "http_calls", "cache_hits", "bytes", "error")
+
+    def __init__(self, name: str, category: str, start: float):
+        self.name = name
+        self.category = category
+        self.start = start
+        self.end = None
+        self.thread = threading.get_ident()
+        self.http_calls = 0
+        self.cache_hits = 0
+        self.bytes = 0
+        self.error = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+
+class Tracer:
+    """Collects timed spans and the HTTP traffic inside them, while enabled.
+
+    Spans nest per thread; an HTTP response counts towards every span open on the thread
+    that made the request. Disabled, spans and HTTP records cost a single attribute check.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.spans = []
+            self.requests = []
+            self.origin = time.perf_counter()
+
+    def enable(self):
+        self.reset()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, name: str, category: str = "app"):
+        if not self.enabled:
+            yield None
+            return
+        span = Span(name, category, time.perf_counter())
+        stack = self._stack()
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            span.end = time.perf_counter()
+            stack.remove(span)
+            with self._lock:
+                self.spans.append(span)
+
+    def record_http(self, method: str, url: str, status: int, start: float, size: int, cache_status: Optional[str]):
+        """Record one HTTP exchange and add it to the spans open on this thread."""
+        if not self.enabled:
+            return
+        cache_hit = cache_status in ("fresh", "revalidated")
+        for span in self._stack():
+            span.http_calls += 1
+            span.cache_hits += cache_hit
+            span.bytes += size
+        with self._lock:
+            self.requests.append({
+                "method": method, "url": url, "status": status, "start": start, "end": time.perf_counter(),
+                "bytes": size, "cache": cache_status, "thread": threading.get_ident(),
+            })
+
+    def summary(self) -> list:
+        """Spans aggregated by name, slowest total first."""
+        rows = {}
+        for span in self.spans:
+            row = rows.setdefault(span.name, {
+                "name": span.name, "category": span.category, "count": 0, "seconds": 0.0,
+                "http_calls": 0, "cache_hits": 0, "bytes": 0, "errors": 0,
+            })
+            row["count"] += 1
+            row["seconds"] += span.duration
+            row["http_calls"] += span.http_calls
+            row["cache_hits"] += span.cache_hits
+            row["bytes"] += span.bytes
+            row["errors"] += span.error is not None
+        return sorted(rows.values(), key=lambda row: row["seconds"], reverse=True)
+
+    def totals(self) -> dict:
+        return {
+            "http_calls": len(self.requests),
+            "cache_hits": sum(request["cache"] in ("fresh", "revalidated") for request in self.requests),
+            "bytes": sum(request["bytes"] for request in self.requests),
+        }
+
+    def chrome_trace(self) -> dict:
+        """The spans and requests in the Chrome trace event format (chrome://tracing, Perfetto)."""
+        pid = os.getpid()
+
+        def micros(seconds: float) -> float:
+            return round((seconds - self.origin) * 1e6, 1)
+
+        events = []
+        for span in self.spans:
+            args = {"http_calls": span.http_calls, "cache_hits": span.cache_hits, "bytes": span.bytes}
+            if span.error:
+                args["error"] = span.error
+            events.append({
+                "name": span.name, "cat": span.category, "ph": "X", "pid": pid, "tid": span.thread,
+                "ts": micros(span.start), "dur": round(span.duration * 1e6, 1), "args": args,
+            })
+        for request in self.requests:
+            events.append({
+                "name": f"{request['method']} {request['url']}", "cat": "http", "ph": "X", "pid": pid,
+                "tid": request["thread"], "ts": micros(request["start"]),
+                "dur": round((request["end"] - request["start"]) * 1e6, 1),
+                "args": {"status": request["status"], "bytes": request["bytes"], "cache": request["cache"]},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f)
+
+
+tracer = Tracer()
+
+
+def traced(name: Optional[str] = None, category: str = "app"):
+    """Decorator recording each call of a function (or each run of a generator) as a span."""
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def generator_wrapper(*args, **kwargs):
+                if not tracer.enabled:
+                    return (yield from fn(*args, **kwargs))
+                with tracer.span(span_name, category):
+                    return (yield from fn(*args, **kwargs))
+            return generator_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return fn(*args, **kwargs)
+            with tracer.span(span_name, category):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def trace_methods(category: str):
+    """Class decorator tracing every public method defined on the class."""
+    def decorator(cls):
+        for attribute, value in list(vars(cls).items()):
+            if not attribute.startswith("_") and inspect.isfunction(value):
+                setattr(cls, attribute, traced(attribute, category)(value))
+        return cls
+    return decorator
+
+
+class TracingAdapter(HTTPAdapter):
+    """Transport adapter reporting every exchange (status, bytes, cache hit, latency) to the tracer."""
+
+    def send(self, request, stream=False, **kwargs):
+        if not tracer.enabled:
+            return super().send(request, stream=stream, **kwargs)
+        started = time.perf_counter()
+        response = super().send(request, stream=stream, **kwargs)
+        if stream:
+            # The body hasn't been read yet, and reading it here would defeat the streaming.
+            size = int(response.headers.get("Content-Length") or 0)
+        else:
+            # The session reads the body right after this anyway, this only moves it inside the timing.
+            size = len(response.content or b"")
+        tracer.record_http(
+            request.method, request.url, response.status_code, started, size,
+            response.headers.get(CACHE_STATUS_HEADER)
+        )
+        return response
@@ -0,0 +1,212 @@
+import codecs
+import json
+import os
+import re
+from collections import Counter
+from typing import Iterable, Optional
+
+TREE_SUMMARY_DEPTH = 2
+TREE_SUMMARY_EXTENSIONS = 15
+MAX_NOTABLE_FILES = 40
+MAX_TOP_LEVEL_FILES = 100
+
+# Files (by lowercase name) and path fragments that say something about a repo at a glance.
+NOTABLE_NAMES = {
+    "readme", "readme.md", "readme.rst", "license", "license.md", "license.txt", "contributing.md",
+    "changelog.md", "dockerfile", "docker-compose.yml", "docker-compose.yaml", "makefile",
+    "package.json", "pyproject.toml", "setup.py", "requirements.txt", "cargo.toml", "go.mod",
+    "pom.xml", "build.gradle", "gemfile", "composer.json", ".gitignore", ".env", ".ds_store",
+}
+NOTABLE_FRAGMENTS = (".github/workflows/", "node_modules/", "__pycache__/", ".idea/", ".vscode/")
+
+_TREE_KEY_RE = re.compile(r'"tree"\s*:\s*\[')
+_SHA_RE = re.compile(r'"sha"\s*:\s*"([^"]+)"')
+_TRUNCATED_RE = re.compile(r'"truncated"\s*:\s*(true|false)')
+
+
+class _Node:
+    __slots__ = ("count", "children")
+
+    def __init__(self):
+        self.count = 0
+        self.children = {}
+
+
+class TreeSummary:
+    """Depth-limited summary of a file tree, built one path at a time.
+
+    Files below `max_depth` are only counted against their ancestor at that depth, so memory
+    grows with the number of shallow directories, not with the number of files.
+    """
+
+    def __init__(self, max_depth: int = TREE_SUMMARY_DEPTH):
+        self.max_depth = max_depth
+        self.root = _Node()
+        self.directories = 0
+        self.size = 0
+        self.extensions = Counter()
+        self.notable_files = []
+        self.truncated = False
+
+    def _node(self, parts, create: bool = True) -> Optional[_Node]:
+        node = self.root
+        for part in parts[:self.max_depth]:
+            child = node.children.get(part)
+            if child is None:
+                if not create:
+                    return None
+                child = node.children[part] = _Node()
+            node = child
+        return node
+
+    def add(self, path: str, entry_type: str = "blob", size: Optional[int] = None):
+        if entry_type == "tree":
+            self.directories += 1
+            # Keep empty shallow directories visible too.
+            self._node(path.split("/"))
+            return
+        if entry_type != "blob":
+            return
+
+        parts = path.split("/")
+        node = self.root
+        node.count += 1
+        for part in parts[:-1][:self.max_depth]:
+            node = node.children.setdefault(part, _Node())
+            node.count += 1
+        if len(parts) == 1 and len(self.root.children) < MAX_TOP_LEVEL_FILES:
+            self.root.children.setdefault(parts[0], None)
+
+        name = parts[-1]
+        self.extensions[os.path.splitext(name)[1] or name] += 1
+        self.size += size or 0
+        if len(self.notable_files) < MAX_NOTABLE_FILES and (
+            name.lower() in NOTABLE_NAMES or any(fragment in path + "/" for fragment in NOTABLE_FRAGMENTS)
+        ):
+            self.notable_files.append(path)
+
+    def merge(self, other: "TreeSummary", prefix: str):
+        """Fold the summary of the subtree at `prefix` into this one."""
+        prefix_parts = prefix.split("/") if prefix else []
+        node = self.root
+        node.count += other.root.count
+        for part in prefix_parts[:self.max_depth]:
+            node = node.children.setdefault(part, _Node())
+            node.count += other.root.count
+
+        def shift(source: _Node, parts: list):
+            for name, child in source.children.items():
+                child_parts = parts + [name]
+                if child is None:
+                    if len(child_parts) == 1:
+                        self.root.children.setdefault(name, None)
+                    continue
+                if len(child_parts) > self.max_depth:
+                    continue
+                self._node(child_parts).count += child.count
+                shift(child, child_parts)
+
+        if len(prefix_parts) < self.max_depth:
+            shift(other.root, prefix_parts)
+        self.directories += other.directories
+        self.size += other.size
+        self.extensions.update(other.extensions)
+        room = MAX_NOTABLE_FILES - len(self.notable_files)
+        self.notable_files.extend(f"{prefix}/{path}" if prefix else path for path in other.notable_files[:room])
+        self.truncated = self.truncated or other.truncated
+
+    def to_dict(self) -> dict:
+        per_directory = {}
+
+        def walk(node: _Node, parts: list):
+            for name, child in sorted(node.children.items()):
+                if child is None:
+                    continue
+                path = parts + [name]
+                per_directory["/".join(path)] = child.count
+                walk(child, path)
+
+        walk(self.root, [])
+        summary = {
+            "total_entries": self.root.count,
+            "total_directories": self.directories,
+            "top_level": sorted(name + ("/" if child is not None else "") for name, child in self.root.children.items()),
+            "entries_per_directory": per_directory,
+            "extensions": dict(self.extensions.most_common(TREE_SUMMARY_EXTENSIONS)),
+            "notable_files": self.notable_files,
+        }
+        if self.truncated:
+            summary["truncated"] = True
+        return summary
+
+
+class TreeListing:
+    """Streams the entries of a git trees API response without loading the whole document.
+
+    Iterate to get the entries one by one; `sha` is known after the first chunk and
+    `truncated` once the iteration is done.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+        self._in_tree = False
+        self.sha = None
+        self.truncated = False
+
+    def _read(self) -> bool:
+        for chunk in self._chunks:
+            if chunk:
+                self._buffer += self._decoder.decode(chunk)
+                return True
+        self._buffer += self._decoder.decode(b"", final=True)
+        return False
+
+    def read_header(self):
+        """Read until the start of the entry array, picking up the tree sha on the way."""
+        while True:
+            match = _TREE_KEY_RE.search(self._buffer)
+            if match:
+                header, self._buffer = self._buffer[:match.start()], self._buffer[match.end():]
+                sha = _SHA_RE.search(header)
+                self.sha = sha.group(1) if sha else None
+                self._in_tree = True
+                return
+            if not self._read():
+                raise ValueError("Unexpected git tree response: no tree entries")
+
+    def __iter__(self):
+        if not self._in_tree:
+            self.read_header()
+        position = 0
+        while True:
+            while True:
+                while position < len(self._buffer) and self._buffer[position] in " \t\r\n,":
+                    position += 1
+                if position < len(self._buffer):
+                    break
+                self._buffer, position = "", 0
+                if not self._read():
+                    raise ValueError("Unexpected end of git tree response")
+
+            if self._buffer[position] == "]":
+                break
+            try:
+                entry, position = self._json.raw_decode(self._buffer, position)
+            except json.JSONDecodeError:
+                # The entry continues in the next chunk.
+                self._buffer, position = self._buffer[position:], 0
+                if not self._read():
+                    raise
+                continue
+            yield entry
+            if position > 65536:
+                self._buffer, position = self._buffer[position:], 0
+
+        rest, self._buffer = self._buffer[position:], ""
+        while not _TRUNCATED_RE.search(rest) and self._read():
+            rest, self._buffer = rest + self._buffer, ""
+        match = _TRUNCATED_RE.search(rest)
+        self.truncated = bool(match and match.group(1) == "true")